@@ -1,18 +1,57 @@
+import atexit
+import time
+import uuid
+from datetime import date, timedelta
 import streamlit as st
 from quiz_manager import QuizManager
-from llm_client import LLMClient
-from datetime import datetime
+from selection_engine import NUMPY_AVAILABLE
+from llm_client import LLMClient, GENERATION_CHUNK_SIZE
+from grading_cache import GradingCache
+from results_store import ResultsStore
+from quiz_pipeline import QuizPipeline
+from question_pools import DIFFICULTY_BANDS, QUESTION_SOURCES, QUESTION_TYPES, QuizFilter
+
+
+@st.cache_resource
+def get_quiz_manager() -> QuizManager:
+    """One question bank per process, shared by every browser session"""
+    quiz_manager = QuizManager(lazy=True, vectorized=NUMPY_AVAILABLE)
+    #Pending journal records are folded into questions.json when the server stops
+    atexit.register(quiz_manager.flush)
+    return quiz_manager
+
+
+@st.cache_resource
+def get_grading_cache() -> GradingCache:
+    """One grading cache per process, sessions share verdicts and batch their writes"""
+    grading_cache = GradingCache()
+    #Verdicts not saved yet by save_if_due are written when the server stops
+    atexit.register(grading_cache.save)
+    return grading_cache
+
+
+@st.cache_resource
+def get_results_store() -> ResultsStore:
+    """One results database connection per process, shared by every browser session"""
+    results_store = ResultsStore()
+    #Scores logged to results.txt by earlier versions become part of the history
+    results_store.import_legacy_results()
+    return results_store
 
 
 def init_session_state():
     """Initialize session state for persistent objects and quiz state."""
     if "quiz_manager" not in st.session_state:
-        st.session_state.quiz_manager = QuizManager()
+        st.session_state.quiz_manager = get_quiz_manager()
+    if "results_store" not in st.session_state:
+        st.session_state.results_store = get_results_store()
     if "llm_client" not in st.session_state:
         try:
-            st.session_state.llm_client = LLMClient()
+            st.session_state.llm_client = LLMClient(grading_cache=get_grading_cache())
         except ValueError:
             st.session_state.llm_client = None
+    if "quiz_pipeline" not in st.session_state and st.session_state.llm_client:
+        st.session_state.quiz_pipeline = QuizPipeline(st.session_state.quiz_manager, st.session_state.llm_client)
     # Quiz session state
     if "quiz_questions" not in st.session_state:
         st.session_state.quiz_questions = []
@@ -28,6 +67,24 @@ def init_session_state():
         st.session_state.quiz_answered = False
     if "quiz_feedback" not in st.session_state:
         st.session_state.quiz_feedback = None
+    if "quiz_deferred" not in st.session_state:
+        st.session_state.quiz_deferred = False
+    if "quiz_answers" not in st.session_state:
+        st.session_state.quiz_answers = []
+    if "quiz_review" not in st.session_state:
+        st.session_state.quiz_review = None
+    if "quiz_outcomes" not in st.session_state:
+        st.session_state.quiz_outcomes = []
+    if "quiz_grades" not in st.session_state:
+        st.session_state.quiz_grades = []
+    if "quiz_latencies" not in st.session_state:
+        st.session_state.quiz_latencies = []
+    if "quiz_shown_at" not in st.session_state:
+        st.session_state.quiz_shown_at = 0.0
+    if "quiz_started_at" not in st.session_state:
+        st.session_state.quiz_started_at = 0.0
+    if "quiz_session_key" not in st.session_state:
+        st.session_state.quiz_session_key = None
 
 
 def generate_questions_page():
@@ -37,31 +94,72 @@ def generate_questions_page():
         st.error("OpenAI API key not configured. Set the OPENAI_API_KEY environment variable.")
         return
 
-    topic = st.text_input("What topic would you like to study?")
-    num_questions = st.number_input("How many questions?", min_value=1, max_value=20, value=5)
+    topic = st.text_input("What topic would you like to study?", help="Separate several topics with commas")
+    num_questions = st.number_input("How many questions?", min_value=1, max_value=200, value=5)
 
     if st.button("Generate", type="primary"):
-        if not topic.strip():
+        topics = [t.strip() for t in topic.split(",") if t.strip()]
+        if not topics:
             st.warning("Please enter a topic.")
             return
 
-        with st.spinner(f"Generating {num_questions} questions about {topic}..."):
-            questions = st.session_state.llm_client.generate_questions(topic, num_questions)
+        llm = st.session_state.llm_client
+        qm = st.session_state.quiz_manager
+        if len(topics) == 1 and num_questions <= GENERATION_CHUNK_SIZE:
+            #Stream: each question is rendered and saved as soon as it arrives
+            status = st.empty()
+            status.info(f"Generating {num_questions} questions about {topics[0]}...")
+            questions = []
+            skipped = 0
+            for q in llm.stream_questions(topics[0], num_questions):
+                if not qm.add_questions([q]):
+                    skipped += 1
+                    continue
+                questions.append(q)
+                status.info(f"Generated {len(questions)}/{num_questions} questions...")
+                _show_generated_question(q)
+            status.empty()
+            if questions or skipped:
+                st.success(f"Generated {len(questions)} questions!")
+                _show_skipped_duplicates(skipped)
+            else:
+                st.error("Failed to generate questions. Check your API key and try again.")
+            return
+
+        if len(topics) > 1:
+            with st.spinner(f"Generating {num_questions} questions for each of {len(topics)} topics..."):
+                results = llm.generate_questions_for_topics(topics, num_questions)
+            questions = [q for topic_questions in results.values() for q in topic_questions]
+        else:
+            with st.spinner(f"Generating {num_questions} questions about {topics[0]}..."):
+                questions = llm.generate_questions(topics[0], num_questions)
 
         if questions:
-            st.session_state.quiz_manager.add_questions(questions)
-            st.success(f"Generated {len(questions)} questions!")
-            for q in questions:
-                with st.expander(f"{q.type.upper()} - {q.text[:80]}..."):
-                    st.write(f"**Answer:** {q.correct_answer}")
-                    if q.options:
-                        st.write("**Options:**")
-                        for i, opt in enumerate(q.options, 1):
-                            st.write(f"  {i}. {opt}")
+            added = qm.add_questions(questions)
+            st.success(f"Generated {len(added)} questions!")
+            _show_skipped_duplicates(len(questions) - len(added))
+            for q in added:
+                _show_generated_question(q)
         else:
             st.error("Failed to generate questions. Check your API key and try again.")
 
 
+def _show_skipped_duplicates(skipped):
+    """Tell the user how many generated questions were already in the bank."""
+    if skipped:
+        st.info(f"Skipped {skipped} near-duplicates of questions already in the bank.")
+
+
+def _show_generated_question(q):
+    """Render one generated question with its answer."""
+    with st.expander(f"{q.type.upper()} - {q.text[:80]}..."):
+        st.write(f"**Answer:** {q.correct_answer}")
+        if q.options:
+            st.write("**Options:**")
+            for i, opt in enumerate(q.options, 1):
+                st.write(f"  {i}. {opt}")
+
+
 def view_statistics_page():
     st.header("Statistics")
 
@@ -71,35 +169,36 @@ def view_statistics_page():
         st.info("No questions available yet. Generate some questions first!")
         return
 
-    # Overview metrics
-    total = len(qm.questions)
-    enabled = sum(1 for q in qm.questions if q.enabled)
-    attempted = sum(1 for q in qm.questions if q.times_shown > 0)
+    # Overview metrics, read from QuizManager's running aggregates
+    overall = qm.get_overall_stats()
 
     col1, col2, col3 = st.columns(3)
-    col1.metric("Total Questions", total)
-    col2.metric("Enabled", enabled)
-    col3.metric("Attempted", attempted)
+    col1.metric("Total Questions", overall["total"])
+    col2.metric("Enabled", overall["enabled"])
+    col3.metric("Attempted", overall["attempted"])
 
     st.divider()
 
-    # Group by topic
-    topics = {}
-    for q in qm.questions:
-        topics.setdefault(q.topic, []).append(q)
-
-    for topic, questions in sorted(topics.items()):
-        enabled_count = sum(1 for q in questions if q.enabled)
-        shown = [q for q in questions if q.times_shown > 0]
-
-        with st.expander(f"{topic} ({len(questions)} questions, {enabled_count} enabled)"):
-            if shown:
-                avg_success = sum(q.get_correct_percentage() for q in shown) / len(shown)
+    for topic, stats in qm.get_topic_stats().items():
+        with st.expander(f"{topic} ({stats['total']} questions, {stats['enabled']} enabled)"):
+            if stats["attempted"]:
+                avg_success = stats["avg_success"]
                 st.progress(avg_success / 100, text=f"Average success rate: {avg_success:.1f}%")
-                st.write(f"Questions attempted: {len(shown)}/{len(questions)}")
+                st.write(f"Questions attempted: {stats['attempted']}/{stats['total']}")
             else:
                 st.write("No questions attempted yet.")
 
+    # Progress over time, one row per day from the results history
+    daily = st.session_state.results_store.daily_summary(
+        start_day=(date.today() - timedelta(days=365)).isoformat()
+    )
+    if daily:
+        st.divider()
+        st.subheader("Progress (last 12 months)")
+        st.line_chart(daily, x="day", y="score_pct")
+        st.caption(f"{sum(d['tests'] for d in daily)} quizzes, "
+                   f"{sum(d['questions'] for d in daily)} questions answered")
+
     # Token usage
     if st.session_state.llm_client:
         st.divider()
@@ -110,20 +209,47 @@ def view_statistics_page():
         c2.metric("Completion Tokens", usage["completion_tokens"])
         c3.metric("Total Tokens", usage["total_tokens"])
 
+        grading = st.session_state.llm_client.get_grading_stats()
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Graded Locally", grading["local"])
+        c2.metric("Grading Cache Hits", grading["cached"])
+        c3.metric("Grading API Calls", grading["api"])
+        c4.metric("API Calls Avoided", f"{grading['avoided_pct']:.0f}%")
+
+        calls = st.session_state.llm_client.get_call_stats()
+        if calls:
+            st.subheader("API Call Latency (this session)")
+            st.table([
+                {"Call": kind, "Calls": stats["calls"], "Errors": stats["errors"],
+                 "Cache Hits": stats["cache_hits"],
+                 "p50 ms": round(stats["p50_ms"]), "p95 ms": round(stats["p95_ms"]),
+                 "p99 ms": round(stats["p99_ms"]), "TTFT p50 ms": round(stats["ttft_p50_ms"]),
+                 "Tokens": stats["prompt_tokens"] + stats["completion_tokens"]}
+                for kind, stats in calls.items()
+            ])
+
+
+def _session_filter():
+    """Quiz filter from the setup widgets, an empty filter draws from the whole bank."""
+    return QuizFilter(
+        topics=st.session_state.get("quiz_filter_topics"),
+        types=st.session_state.get("quiz_filter_types"),
+        sources=st.session_state.get("quiz_filter_sources"),
+        difficulties=st.session_state.get("quiz_filter_difficulties")
+    )
+
 
 def _start_quiz(mode):
     """Start a quiz session."""
     qm = st.session_state.quiz_manager
     count = st.session_state.quiz_num_questions
+    # Filtered sessions draw from a candidate pool the manager keeps up to date
+    quiz_filter = _session_filter()
 
     if mode == "practice":
-        questions = []
-        for _ in range(count):
-            q = qm.selecting_weighted_question()
-            if q:
-                questions.append(q)
+        questions = qm.select_weighted_questions(count, quiz_filter)
     else:
-        questions = qm.select_unique_random_questions(count)
+        questions = qm.select_unique_random_questions(count, quiz_filter)
 
     st.session_state.quiz_questions = questions
     st.session_state.quiz_index = 0
@@ -132,22 +258,82 @@ def _start_quiz(mode):
     st.session_state.quiz_mode = mode
     st.session_state.quiz_answered = False
     st.session_state.quiz_feedback = None
+    # Deferred feedback collects answers and grades them in one batch at the end
+    st.session_state.quiz_deferred = mode == "test" and st.session_state.get("quiz_deferred_feedback", False)
+    st.session_state.quiz_answers = []
+    st.session_state.quiz_review = None
+    # Answers graded in the background: (question, user_answer, future, latency)
+    st.session_state.quiz_grades = []
+    # Per-question outcomes for the results history, the key makes saving idempotent across reruns
+    st.session_state.quiz_outcomes = []
+    st.session_state.quiz_latencies = []
+    st.session_state.quiz_started_at = st.session_state.quiz_shown_at = time.time()
+    st.session_state.quiz_session_key = uuid.uuid4().hex
+
+    pipeline = st.session_state.quiz_pipeline
+    for topic in {q.topic for q in questions}:
+        pipeline.top_up(topic)
+
+
+def _answer_latency():
+    """Seconds since the current question was shown."""
+    return time.time() - st.session_state.quiz_shown_at
+
+
+def _store_answer(question, user_answer):
+    """Keep the answer for batch grading and move on (deferred feedback)."""
+    st.session_state.quiz_answers.append((question, user_answer))
+    st.session_state.quiz_latencies.append(_answer_latency())
+    st.session_state.quiz_index += 1
+    st.session_state.quiz_shown_at = time.time()
+
+
+def _grade_deferred_answers():
+    """Grade all collected answers in one batch and record the attempts."""
+    answers = st.session_state.quiz_answers
+    results = st.session_state.llm_client.evaluate_answers(answers)
+    review = []
+    for (question, user_answer), is_correct, latency in zip(answers, results, st.session_state.quiz_latencies):
+        st.session_state.quiz_manager.record_attempt(question, is_correct)
+        if is_correct:
+            st.session_state.quiz_score += 1
+        review.append((question, user_answer, is_correct))
+        st.session_state.quiz_outcomes.append((question, is_correct, latency))
+    st.session_state.quiz_review = review
+
+
+def _collect_graded_answers():
+    """Wait for background grading to finish and build the review (immediate feedback)."""
+    review = []
+    for question, user_answer, future, latency in st.session_state.quiz_grades:
+        is_correct = future.result()
+        if is_correct:
+            st.session_state.quiz_score += 1
+        review.append((question, user_answer, is_correct))
+        st.session_state.quiz_outcomes.append((question, is_correct, latency))
+    st.session_state.quiz_review = review
 
 
 def _submit_answer(question, user_answer):
-    """Evaluate the user's answer and store feedback."""
-    llm = st.session_state.llm_client
-    is_correct = llm.evaluate_answer(question, user_answer)
-    question.record_attempt(is_correct)
-    st.session_state.quiz_manager.save_questions()
-
-    if is_correct:
-        st.session_state.quiz_score += 1
-        st.session_state.quiz_feedback = ("correct", "")
-    else:
-        st.session_state.quiz_feedback = ("incorrect", question.correct_answer)
-
+    """Start grading the user's answer in the background, feedback shows when it is ready."""
+    pipeline = st.session_state.quiz_pipeline
+    latency = _answer_latency()
+    future = pipeline.grade(question, user_answer)
+    st.session_state.quiz_grades.append((question, user_answer, future, latency))
+    st.session_state.quiz_feedback = future
     st.session_state.quiz_answered = True
+    pipeline.top_up(question.topic)
+
+
+@st.fragment(run_every=0.5)
+def _show_feedback(future, correct_answer):
+    """Verdict of the last answer, redrawn until background grading has finished."""
+    if not future.done():
+        st.info("Checking your answer... you can already go on to the next question.")
+    elif future.result():
+        st.success("Correct!")
+    else:
+        st.error(f"Incorrect. The correct answer is: {correct_answer}")
 
 
 def _next_question():
@@ -155,6 +341,16 @@ def _next_question():
     st.session_state.quiz_index += 1
     st.session_state.quiz_answered = False
     st.session_state.quiz_feedback = None
+    st.session_state.quiz_shown_at = time.time()
+
+
+def _save_results(mode):
+    """Add the finished quiz to the results history (once, reruns are ignored)."""
+    st.session_state.results_store.record_test(
+        mode, st.session_state.quiz_outcomes,
+        duration=time.time() - st.session_state.quiz_started_at,
+        session_key=st.session_state.quiz_session_key
+    )
 
 
 def _end_quiz():
@@ -167,7 +363,7 @@ def _end_quiz():
 def _quiz_page(mode):
     """Shared quiz UI for practice and test modes."""
     title = "Practice Mode" if mode == "practice" else "Test Mode"
-    subtitle = "Focuses on difficult questions" if mode == "practice" else "Random questions, no repetition"
+    subtitle = "Questions due for review first, then difficult ones" if mode == "practice" else "Random questions, no repetition"
 
     st.header(title)
     st.caption(subtitle)
@@ -182,18 +378,37 @@ def _quiz_page(mode):
         st.info("No questions available. Generate some questions first!")
         return
 
-    enabled_count = sum(1 for q in qm.questions if q.enabled)
+    enabled_count = qm.enabled_count()
     if enabled_count == 0:
         st.warning("No enabled questions available. Enable some questions in Manage Questions.")
         return
 
     # Quiz not started yet
     if not st.session_state.quiz_active:
-        max_q = enabled_count
+        with st.expander("Focus on some questions", expanded=False):
+            st.multiselect("Topics", qm.get_topics(), key="quiz_filter_topics")
+            col1, col2, col3 = st.columns(3)
+            col1.multiselect("Types", QUESTION_TYPES, key="quiz_filter_types")
+            col2.multiselect("Sources", QUESTION_SOURCES, key="quiz_filter_sources")
+            col3.multiselect("Difficulty", DIFFICULTY_BANDS, key="quiz_filter_difficulties",
+                             help="new: never answered, hard: under 50% correct, easy: 80% or more")
+        quiz_filter = _session_filter()
+        max_q = qm.count_matching(quiz_filter)
+        if max_q == 0:
+            st.warning("No enabled questions match these filters.")
+            return
+        if not quiz_filter.is_empty():
+            st.caption(f"{max_q} questions match: {quiz_filter.describe()}")
+        # Keep the previous choice valid when the filters shrink the pool
+        if st.session_state.get("quiz_num_questions", 0) > max_q:
+            st.session_state.quiz_num_questions = max_q
         st.number_input(
             "How many questions?", min_value=1, max_value=max_q,
             value=min(5, max_q), key="quiz_num_questions"
         )
+        if mode == "test":
+            st.checkbox("Show feedback only at the end (grades all answers in one request)",
+                        value=True, key="quiz_deferred_feedback")
         st.button("Start Quiz", type="primary", on_click=_start_quiz, args=(mode,))
         return
 
@@ -203,6 +418,13 @@ def _quiz_page(mode):
 
     # Quiz complete
     if idx >= total:
+        if st.session_state.quiz_review is None:
+            with st.spinner("Grading your answers..."):
+                if st.session_state.quiz_deferred:
+                    _grade_deferred_answers()
+                else:
+                    _collect_graded_answers()
+
         score = st.session_state.quiz_score
         st.subheader(f"Quiz Complete! Score: {score}/{total}")
         pct = (score / total * 100) if total > 0 else 0
@@ -215,18 +437,22 @@ def _quiz_page(mode):
         else:
             st.warning("Keep studying, you'll improve!")
 
-        # Log results for test mode
-        if mode == "test":
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            with open("results.txt", "a") as f:
-                f.write(f"{timestamp} - Score: {score}/{total}\n")
-            st.caption("Results saved to results.txt")
+        if st.session_state.quiz_review:
+            for i, (question, user_answer, is_correct) in enumerate(st.session_state.quiz_review, 1):
+                with st.expander(f"{'✅' if is_correct else '❌'} {i}. {question.text[:70]}"):
+                    st.write(f"**Your answer:** {user_answer}")
+                    st.write(f"**Correct answer:** {question.correct_answer}")
+
+        _save_results(mode)
+        st.caption("Results saved to your history")
 
         st.button("Start New Quiz", on_click=_end_quiz)
         return
 
-    # Display current question
+    # Display current question, the next one is read from disk while this one is answered
     question = questions[idx]
+    if idx + 1 < total:
+        st.session_state.quiz_pipeline.prefetch(questions[idx + 1])
     st.progress((idx) / total, text=f"Question {idx + 1} of {total}")
     st.subheader(question.text)
 
@@ -243,18 +469,16 @@ def _quiz_page(mode):
             if st.button("Submit", type="primary"):
                 if question.type != "mcq" and not user_answer.strip():
                     st.warning("Please enter an answer.")
+                elif st.session_state.quiz_deferred:
+                    _store_answer(question, user_answer)
+                    st.rerun()
                 else:
-                    with st.spinner("Evaluating..."):
-                        _submit_answer(question, user_answer)
+                    _submit_answer(question, user_answer)
                     st.rerun()
 
     # Show feedback
     if st.session_state.quiz_answered and st.session_state.quiz_feedback:
-        result, correct_answer = st.session_state.quiz_feedback
-        if result == "correct":
-            st.success("Correct!")
-        else:
-            st.error(f"Incorrect. The correct answer is: {correct_answer}")
+        _show_feedback(st.session_state.quiz_feedback, question.correct_answer)
 
         if idx + 1 < total:
             st.button("Next Question", on_click=_next_question)
@@ -280,13 +504,30 @@ def manage_questions_page():
         return
 
     # Filter options
-    topics = sorted(set(q.topic for q in qm.questions))
+    topics = qm.get_topics()
     selected_topic = st.selectbox("Filter by topic:", ["All"] + topics)
 
-    filtered = qm.questions if selected_topic == "All" else [q for q in qm.questions if q.topic == selected_topic]
+    filtered = qm.questions if selected_topic == "All" else qm.questions_by_topic(selected_topic)
 
     st.write(f"Showing {len(filtered)} questions")
 
+    with st.expander("Near-duplicate questions"):
+        # Only computed on request, it hashes the text of every enabled question
+        if st.button("Find near-duplicates"):
+            st.session_state.duplicate_pairs = qm.find_near_duplicates()
+        pairs = st.session_state.get("duplicate_pairs")
+        if pairs is not None and not pairs:
+            st.write("No near-duplicates among the enabled questions.")
+        elif pairs:
+            st.write(f"{len(pairs)} enabled questions repeat an earlier one:")
+            for kept, duplicate in pairs:
+                st.write(f"- {duplicate.text[:70]}  \n  duplicates: {kept.text[:70]}")
+            if st.button("Disable these duplicates", type="primary"):
+                for _, duplicate in pairs:
+                    qm.set_enabled(duplicate, False)
+                st.session_state.duplicate_pairs = None
+                st.rerun()
+
     for q in filtered:
         status = "Enabled" if q.enabled else "Disabled"
         pct = q.get_correct_percentage()
@@ -306,8 +547,7 @@ def manage_questions_page():
 
             action = "Disable" if q.enabled else "Enable"
             if st.button(f"{action} this question", key=f"toggle_{q.id}"):
-                q.enabled = not q.enabled
-                qm.save_questions()
+                qm.set_enabled(q, not q.enabled)
                 st.rerun()
 
 
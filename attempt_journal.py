@@ -0,0 +1,179 @@
+import itertools
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+from question import Question
+
+try:
+    import fcntl
+except ImportError:  # Windows, a single process is assumed
+    fcntl = None
+
+
+class FileLock:
+    """Advisory lock shared between processes through a lock file (no-op without fcntl)"""
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+        self._file = None
+        #flock() is per open file, threads of one process take turns on the handle
+        self._thread_lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self, mode: int) -> Iterator[None]:
+        with self._thread_lock:
+            if fcntl is None:
+                yield
+                return
+            if self._file is None:
+                self._file = open(self.filename, 'a')
+            fcntl.flock(self._file.fileno(), mode)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+    def shared(self):
+        return self._locked(fcntl.LOCK_SH if fcntl else 0)
+
+    def exclusive(self):
+        return self._locked(fcntl.LOCK_EX if fcntl else 0)
+
+
+class AttemptJournal:
+    """Append-only log of question attempts, toggles and additions stored next to the question bank
+
+    Several processes may append to the same journal, every record carries
+    the id of the writer that appended it. Every rotation ends the moved
+    records with a {"rotation": id} marker. The snapshot stores the last
+    marker it folded in, so records a crash left behind are never applied twice."""
+    def __init__(self, filename: str, writer: Optional[str] = None) -> None:
+        self.filename = filename
+        self.rotated_filename = filename + ".compacting"
+        self.writer = writer or uuid.uuid4().hex[:12]
+        #Appends hold the lock shared, rotation holds it exclusively
+        self.file_lock = FileLock(filename + ".lock")
+        #Number of records written since the last compaction
+        self.entries = 0
+
+    def append(self, question_id: str, was_correct: bool, schedule: Optional[Dict] = None) -> None:
+        """Write one attempt record with the resulting review schedule, cost does not depend on bank size"""
+        record = {"id": question_id, "correct": was_correct}
+        if schedule:
+            record.update(schedule)
+        self._write(record)
+
+    def append_enabled(self, question_id: str, enabled: bool) -> None:
+        """Write one enable/disable record"""
+        self._write({"id": question_id, "enabled": enabled})
+
+    def append_added(self, question: Question) -> None:
+        """Write a newly added question"""
+        self._write({"id": question.id, "add": question.to_dict()})
+
+    def _write(self, record: Dict) -> None:
+        record["w"] = self.writer
+        line = json.dumps(record) + "\n"
+        with self.file_lock.shared():
+            with open(self.filename, 'a') as file:
+                file.write(line)
+            #Counted under the lock, appends from parallel threads and rotate() take turns
+            self.entries += 1
+
+    @staticmethod
+    def _read(filename: str) -> Iterator[Dict]:
+        try:
+            with open(filename, 'r') as file:
+                for line in file:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        #Torn last line after a crash, skip it
+                        continue
+                    yield record
+        except FileNotFoundError:
+            return
+
+    @staticmethod
+    def _after_marker(records: Iterator[Dict], folded: Optional[str]) -> List[Dict]:
+        """Records after the rotation marker folded (all if it is not there), markers dropped"""
+        pending = []
+        for record in records:
+            if "rotation" in record:
+                if record["rotation"] == folded:
+                    #Everything up to here is already in the snapshot
+                    pending = []
+                continue
+            pending.append(record)
+        return pending
+
+    def replay(self, folded: Optional[str] = None) -> Iterator[Dict]:
+        """Yield saved records not yet in the snapshot, in the order they were written"""
+        self.entries = 0
+        #A compaction interrupted by a crash leaves its records in the rotated file,
+        #folded is the snapshot's last marker in case the snapshot was already written
+        rotated = self._after_marker(self._read(self.rotated_filename), folded)
+        for record in itertools.chain(rotated, self._read(self.filename)):
+            self.entries += 1
+            yield record
+
+    def own_records(self) -> Iterator[Dict]:
+        """Yield records this writer appended since the last rotation"""
+        for record in self._read(self.filename):
+            if record.get("w") == self.writer:
+                yield record
+
+    def rotate(self) -> bool:
+        """Move current records aside for compaction, new appends start a fresh file
+
+        Returns False when there was nothing to rotate."""
+        with self.file_lock.exclusive():
+            self.entries = 0
+            if os.path.exists(self.rotated_filename):
+                #Left over from an interrupted compaction, fold it together with the new records
+                if os.path.exists(self.filename):
+                    with open(self.rotated_filename, 'a') as rotated:
+                        for record in self._read(self.filename):
+                            rotated.write(json.dumps(record) + "\n")
+                    os.remove(self.filename)
+            else:
+                try:
+                    os.replace(self.filename, self.rotated_filename)
+                except FileNotFoundError:
+                    return False
+            with open(self.rotated_filename, 'a') as rotated:
+                rotated.write(json.dumps({"rotation": uuid.uuid4().hex}) + "\n")
+            return True
+
+    def read_rotated(self, folded: Optional[str] = None) -> List[Dict]:
+        """Records moved aside by rotate() that come after the folded marker"""
+        return self._after_marker(self._read(self.rotated_filename), folded)
+
+    def last_rotation(self) -> Optional[str]:
+        """Id of the newest rotation marker, what a snapshot folding the rotated file records"""
+        marker = None
+        for record in self._read(self.rotated_filename):
+            marker = record.get("rotation", marker)
+        return marker
+
+    def discard_rotated(self) -> None:
+        """Remove rotated records once they are stored in the snapshot"""
+        try:
+            os.remove(self.rotated_filename)
+        except FileNotFoundError:
+            pass
+
+    def clear(self) -> None:
+        """Remove all records once they are stored in the snapshot"""
+        with self.file_lock.exclusive():
+            for filename in (self.filename, self.rotated_filename):
+                try:
+                    os.remove(filename)
+                except FileNotFoundError:
+                    pass
+            self.entries = 0
@@ -0,0 +1,87 @@
+"""Latency, throughput and memory of QuizManager hot paths on synthetic banks
+
+Run from the project root: python -m benchmarks.bench_hot_paths [count ...]"""
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, Iterable
+from benchmarks.harness import measure_latency, measure_once, print_results
+from benchmarks.synthetic import write_bank
+from question import Question
+from question_pools import DIFFICULTY_BANDS, QuizFilter
+from quiz_manager import QuizManager
+from selection_engine import NUMPY_AVAILABLE
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+#Keeps background compaction out of the measurements, it is timed separately
+NO_AUTOSAVE = 3600.0
+
+
+def _new_question(number: int) -> Question:
+    return Question("history", f"Freshly generated history question {number}: why did event {number} happen?",
+                    "freeform", f"Because of cause {number}", source="generated")
+
+
+def run(sizes: Iterable[int] = DEFAULT_SIZES, seed: int = 0) -> Dict[str, Dict[str, float]]:
+    """Benchmark every size, results are keyed hot_paths/<size>/<operation>"""
+    results = {}
+    rng = random.Random(seed)
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, "questions.json")
+            write_bank(filename, size, seed)
+            prefix = f"hot_paths/{size}"
+
+            results[f"{prefix}/load_questions"] = measure_once(
+                lambda: QuizManager(filename=filename, save_delay=NO_AUTOSAVE))
+            results[f"{prefix}/load_questions_lazy"] = measure_once(
+                lambda: QuizManager(filename=filename, lazy=True, save_delay=NO_AUTOSAVE))
+
+            manager = QuizManager(filename=filename, save_delay=NO_AUTOSAVE)
+            ids = itertools.cycle([q.id for q in rng.sample(manager.questions, min(size, 1000))])
+            questions = itertools.cycle(rng.sample(manager.questions, min(size, 1000)))
+
+            results[f"{prefix}/select_due_question"] = measure_latency(manager.select_due_question)
+            results[f"{prefix}/selecting_weighted_question"] = measure_latency(manager.selecting_weighted_question)
+            results[f"{prefix}/select_weighted_questions_20"] = measure_latency(
+                lambda: manager.select_weighted_questions(20))
+            results[f"{prefix}/select_unique_random_questions_20"] = measure_latency(
+                lambda: manager.select_unique_random_questions(20))
+            #Building a filtered session's candidate pool: 15 band combinations cycle
+            #through the MAX_POOLS cache, so every call builds a pool from scratch
+            difficulties = itertools.cycle([bands for size in range(1, len(DIFFICULTY_BANDS) + 1)
+                                            for bands in itertools.combinations(DIFFICULTY_BANDS, size)])
+            results[f"{prefix}/build_filtered_pool"] = measure_latency(
+                lambda: manager.count_matching(QuizFilter(topics=["history"], difficulties=next(difficulties))),
+                samples=50, batch=1)
+            #Filtered session: the topic's candidate pool is built during warmup, then reused
+            history = QuizFilter(topics=["history"], difficulties=["new", "hard"])
+            results[f"{prefix}/selecting_weighted_question_filtered"] = measure_latency(
+                lambda: manager.selecting_weighted_question(history))
+            if NUMPY_AVAILABLE:
+                vectorized = QuizManager(filename=filename, save_delay=NO_AUTOSAVE, vectorized=True)
+                results[f"{prefix}/build_filtered_pool_numpy"] = measure_latency(
+                    lambda: vectorized.count_matching(QuizFilter(topics=["history"], difficulties=next(difficulties))),
+                    samples=50, batch=1)
+                del vectorized
+            results[f"{prefix}/find_question_by_id"] = measure_latency(
+                lambda: manager.find_question_by_id(next(ids)), batch=100)
+            #Includes the near-duplicate lookup, the topic's index is built during warmup
+            new_numbers = itertools.count()
+            results[f"{prefix}/add_question_checked"] = measure_latency(
+                lambda: manager.add_questions([_new_question(next(new_numbers))]), samples=50)
+            results[f"{prefix}/record_attempt"] = measure_latency(
+                lambda: manager.record_attempt(next(questions), rng.random() < 0.5), samples=100)
+
+            start = time.perf_counter()
+            manager.flush()
+            results[f"{prefix}/compact_journal"] = {"seconds": time.perf_counter() - start}
+            results[f"{prefix}/save_questions"] = measure_once(manager.save_questions)
+    return results
+
+
+if __name__ == "__main__":
+    print_results(run([int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES))
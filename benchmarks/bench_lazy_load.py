@@ -0,0 +1,41 @@
+"""Startup time and peak memory of eager vs lazy loading
+
+Run from the project root: python -m benchmarks.bench_lazy_load [count]"""
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from benchmarks.synthetic import write_bank
+from storage import JSONStorage
+
+
+def measure(storage: JSONStorage):
+    """Time without tracing (tracemalloc slows allocation), then memory with it"""
+    gc.collect()
+    start = time.perf_counter()
+    questions = storage.load()
+    elapsed = time.perf_counter() - start
+    del questions
+    gc.collect()
+    tracemalloc.start()
+    questions = storage.load()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return questions, elapsed, retained, peak
+
+
+def main(count: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "questions.json")
+        write_bank(filename, count)
+        print(f"{count} questions, file size {os.path.getsize(filename) / 2**20:.1f} MiB")
+        for label, lazy in (("eager json.load", False), ("lazy streaming", True)):
+            questions, elapsed, retained, peak = measure(JSONStorage(filename, lazy=lazy))
+            print(f"  {label:16s} load {elapsed:.3f}s  retained {retained / 2**20:7.1f} MiB  peak {peak / 2**20:7.1f} MiB")
+            del questions
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,72 @@
+"""Memory per question and load time of a large bank
+
+Run from the project root: python -m benchmarks.bench_question_memory [count]"""
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from benchmarks.synthetic import write_bank
+from question import Question
+from storage import JSONStorage
+
+
+def copy_str(value: str) -> str:
+    return (value + " ")[:-1]
+
+
+class DictQuestion:
+    """Previous layout: regular object with __dict__ and no interning"""
+    def __init__(self, data):
+        self.enabled = data.get("enabled", True)
+        self.times_shown = data.get("times_shown", 0)
+        self.times_correct = data.get("times_correct", 0)
+        #Fresh string copies, like json.load returns for every record
+        self.topic = copy_str(data["topic"])
+        self.text = data["text"]
+        self.type = copy_str(data["type"])
+        self.correct_answer = data["correct_answer"]
+        self.options = data.get("options", [])
+        self.source = copy_str(data.get("source", "manual"))
+        self.id = data.get("id")
+
+
+def measure(label, build):
+    """Return (seconds, bytes retained) for building the objects"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    objects = build()
+    elapsed = time.perf_counter() - start
+    retained, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return label, objects, elapsed, retained
+
+
+def main(count: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        filename = os.path.join(tmp, "questions.json")
+        write_bank(filename, count)
+        storage = JSONStorage(filename)
+
+        data = JSONStorage(filename).load()
+        dicts = [q.to_dict() for q in data]
+        del data
+
+        results = [
+            measure("Question (__slots__, interned)", lambda: [Question.from_dict(d) for d in dicts]),
+            measure("dict-based object (old layout)", lambda: [DictQuestion(d) for d in dicts]),
+        ]
+
+        print(f"{count} questions")
+        for label, objects, elapsed, retained in results:
+            print(f"  {label:32s} {retained / count:8.0f} bytes/question  build {elapsed:.3f}s")
+
+        start = time.perf_counter()
+        storage.load()
+        print(f"  JSONStorage.load (parse + build) {time.perf_counter() - start:.3f}s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,95 @@
+"""End-to-end simulated quiz session against the offline FakeBackend
+
+Generation, practice answers (select, grade, record) and a batch-graded
+test run through the real QuizManager and LLMClient code paths, only the
+API is replaced. Run from the project root:
+python -m benchmarks.bench_session [answers] [latency_seconds]"""
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict
+from benchmarks.harness import percentile, print_results
+from grading_cache import GradingCache
+from llm_backend import FakeBackend
+from llm_client import LLMClient, RETRYABLE_ERRORS
+from llm_metrics import LLMMetrics
+from quiz_manager import QuizManager
+from request_scheduler import RequestScheduler, RateLimiter
+
+DEFAULT_ANSWERS = 300
+DEFAULT_LATENCY = 0.02
+
+
+def _simulated_answer(question, rng: random.Random) -> str:
+    """Right about 60% of the time, blank or off-topic otherwise"""
+    if question.type == "mcq":
+        return question.correct_answer if rng.random() < 0.6 else rng.choice(question.options)
+    roll = rng.random()
+    if roll < 0.3:
+        return question.correct_answer
+    if roll < 0.4:
+        return "I don't know"
+    return f"my guess number {rng.randint(0, 50)}"
+
+
+def run(answers: int = DEFAULT_ANSWERS, latency: float = DEFAULT_LATENCY,
+        error_rate: float = 0.02, seed: int = 0) -> Dict[str, Dict[str, float]]:
+    """Simulate one user session, results are keyed session/<phase>"""
+    rng = random.Random(seed)
+    backend = FakeBackend(latency=latency, error_rate=error_rate, seed=seed)
+    #Generous limits and short backoff, the provider limits are not what is measured here
+    scheduler = RequestScheduler(RateLimiter(requests_per_minute=10**6, tokens_per_minute=10**9),
+                                 retryable=RETRYABLE_ERRORS, sleep=lambda seconds: time.sleep(min(seconds, latency)))
+    client = LLMClient(backend=backend, grading_cache=GradingCache(filename=None), scheduler=scheduler,
+                       metrics=LLMMetrics(filename=None))
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = QuizManager(filename=os.path.join(tmp, "questions.json"))
+
+        start = time.perf_counter()
+        for topic in ("history", "biology", "python"):
+            manager.add_questions(client.generate_questions(topic, 40))
+        seconds = time.perf_counter() - start
+        results["session/generate_120_questions"] = {"seconds": seconds,
+                                                     "questions_per_sec": len(manager.questions) / seconds}
+
+        timings = []
+        start = time.perf_counter()
+        for _ in range(answers):
+            answer_start = time.perf_counter()
+            question = manager.selecting_weighted_question()
+            is_correct = client.evaluate_answer(question, _simulated_answer(question, rng))
+            manager.record_attempt(question, is_correct)
+            timings.append(time.perf_counter() - answer_start)
+        seconds = time.perf_counter() - start
+        timings.sort()
+        results["session/practice_answer"] = {
+            "mean_us": seconds / answers * 1e6,
+            "p50_us": percentile(timings, 50) * 1e6,
+            "p95_us": percentile(timings, 95) * 1e6,
+            "p99_us": percentile(timings, 99) * 1e6,
+            "ops_per_sec": answers / seconds
+        }
+
+        start = time.perf_counter()
+        test = manager.select_unique_random_questions(25)
+        verdicts = client.evaluate_answers([(q, _simulated_answer(q, rng)) for q in test])
+        for question, is_correct in zip(test, verdicts):
+            manager.record_attempt(question, is_correct)
+        results["session/test_25_batch_graded"] = {"seconds": time.perf_counter() - start}
+        manager.flush()
+
+    grading = client.get_grading_stats()
+    results["session/api"] = {"calls": backend.get_stats()["calls"],
+                              "retries": scheduler.get_stats()["retries"],
+                              "avoided_pct": grading["avoided_pct"],
+                              "total_tokens": client.get_token_usage()["total_tokens"]}
+    return results
+
+
+if __name__ == "__main__":
+    print_results(run(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ANSWERS,
+                      float(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_LATENCY))
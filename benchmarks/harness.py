@@ -0,0 +1,117 @@
+"""Measurement helpers, baseline files and regression checks shared by the benchmarks"""
+import gc
+import json
+import platform
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+#Metrics compared against the baseline, all of them lower is better. Tail
+#percentiles are reported but not compared, they are too noisy on shared machines
+COMPARED_METRICS = ("p50_us", "seconds", "peak_mib")
+#Differences below these are timer or allocator noise, never regressions
+NOISE_FLOOR = {"p50_us": 1.0, "seconds": 0.01, "peak_mib": 0.5}
+DEFAULT_TOLERANCE = 0.25
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def measure_latency(operation: Callable[[], object], samples: int = 200, batch: int = 10,
+                    warmup: int = 10) -> Dict[str, float]:
+    """Latency percentiles and throughput of a fast operation
+
+    Each sample times batch calls and divides, so sub-microsecond operations
+    are not dominated by the cost of reading the clock."""
+    for _ in range(warmup):
+        operation()
+    gc.collect()
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        for _ in range(batch):
+            operation()
+        timings.append((time.perf_counter() - start) / batch)
+    timings.sort()
+    mean = sum(timings) / len(timings)
+    return {
+        "mean_us": mean * 1e6,
+        "p50_us": percentile(timings, 50) * 1e6,
+        "p95_us": percentile(timings, 95) * 1e6,
+        "p99_us": percentile(timings, 99) * 1e6,
+        "ops_per_sec": 1 / mean if mean else 0.0
+    }
+
+
+def measure_once(operation: Callable[[], object]) -> Dict[str, float]:
+    """Wall time and peak traced memory of a slow operation
+
+    It runs twice, timed without tracing (tracemalloc slows allocation)
+    and then traced for the memory peak."""
+    gc.collect()
+    start = time.perf_counter()
+    result = operation()
+    seconds = time.perf_counter() - start
+    del result
+    gc.collect()
+    tracemalloc.start()
+    result = operation()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {"seconds": seconds, "peak_mib": peak / 2**20}
+
+
+def save_baseline(results: Dict[str, Dict[str, float]], filename: str) -> None:
+    """Write results with the machine they were measured on"""
+    with open(filename, 'w') as file:
+        json.dump({
+            "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                        "processor": platform.processor()},
+            "results": results
+        }, file, indent=4)
+
+
+def load_baseline(filename: str) -> Dict[str, Dict[str, float]]:
+    """Results saved by save_baseline"""
+    with open(filename, 'r') as file:
+        return json.load(file)["results"]
+
+
+def find_regressions(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+                     tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """Describe every metric more than tolerance worse than its baseline"""
+    regressions = []
+    for name, metrics in results.items():
+        old_metrics = baseline.get(name)
+        if not old_metrics:
+            continue
+        for metric in COMPARED_METRICS:
+            if metric not in metrics or metric not in old_metrics:
+                continue
+            new, old = metrics[metric], old_metrics[metric]
+            if new - old > NOISE_FLOOR[metric] and new > old * (1 + tolerance):
+                regressions.append(f"{name} {metric}: {old:.2f} -> {new:.2f} (+{(new / old - 1) * 100 if old else float('inf'):.0f}%)")
+    return regressions
+
+
+def print_results(results: Dict[str, Dict[str, float]]) -> None:
+    """One line per benchmark"""
+    for name, metrics in results.items():
+        parts = []
+        if "p50_us" in metrics:
+            parts.append(f"p50 {metrics['p50_us']:9.2f}us  p95 {metrics['p95_us']:9.2f}us  "
+                         f"p99 {metrics['p99_us']:9.2f}us  {metrics['ops_per_sec']:12.0f} ops/s")
+        if "seconds" in metrics:
+            parts.append(f"{metrics['seconds']:8.3f}s")
+        if "peak_mib" in metrics:
+            parts.append(f"peak {metrics['peak_mib']:8.1f} MiB")
+        for key, value in metrics.items():
+            if key not in ("mean_us", "p50_us", "p95_us", "p99_us", "ops_per_sec", "seconds", "peak_mib"):
+                parts.append(f"{key} {value:.2f}")
+        print(f"  {name:55s} " + "  ".join(parts))
@@ -0,0 +1,55 @@
+"""Run the benchmark suite and compare it with a saved baseline
+
+Run from the project root:
+    python -m benchmarks.run                       # 1k, 10k, 100k banks + simulated session
+    python -m benchmarks.run --sizes 1000,1000000  # up to 1M questions
+    python -m benchmarks.run --save-baseline       # record the current numbers
+Exits with status 1 when a metric is worse than the baseline by more than --tolerance."""
+import argparse
+import os
+import sys
+from benchmarks import bench_hot_paths
+from benchmarks.harness import (DEFAULT_TOLERANCE, find_regressions, load_baseline,
+                                print_results, save_baseline)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="AI Learning Companion benchmarks")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in bench_hot_paths.DEFAULT_SIZES),
+                        help="comma separated bank sizes")
+    parser.add_argument("--no-session", action="store_true", help="skip the simulated quiz session")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="overwrite the baseline with this run")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown before a metric counts as a regression (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    results = bench_hot_paths.run(int(size) for size in args.sizes.split(","))
+    if not args.no_session:
+        #Needs the openai package for its error types, the API itself is never called
+        from benchmarks import bench_session
+        results.update(bench_session.run())
+    print_results(results)
+
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}, run with --save-baseline first")
+        return 0
+
+    regressions = find_regressions(results, load_baseline(args.baseline), args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print(f"\nNo regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
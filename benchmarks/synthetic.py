@@ -0,0 +1,39 @@
+"""Synthetic question banks for benchmarks"""
+import json
+import random
+import uuid
+from typing import Dict, List
+
+TOPICS = ["history", "python", "biology", "chemistry", "geography",
+          "physics", "literature", "economics", "music", "astronomy"]
+
+
+def make_question_dicts(count: int, seed: int = 0, num_topics: int = len(TOPICS)) -> List[Dict]:
+    """Question dictionaries in the questions.json format"""
+    rng = random.Random(seed)
+    topics = TOPICS[:num_topics]
+    questions = []
+    for i in range(count):
+        topic = rng.choice(topics)
+        shown = rng.randint(0, 10)
+        is_mcq = rng.random() < 0.6
+        options = [f"Option {j} for question {i}" for j in range(4)] if is_mcq else None
+        questions.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "topic": topic,
+            "text": f"Synthetic {topic} question number {i}: explain concept {rng.randint(0, 10**6)}?",
+            "type": "mcq" if is_mcq else "freeform",
+            "correct_answer": options[rng.randrange(4)] if is_mcq else f"Reference answer {i}",
+            "options": options,
+            "source": "generated" if rng.random() < 0.8 else "manual",
+            "enabled": rng.random() < 0.9,
+            "times_shown": shown,
+            "times_correct": rng.randint(0, shown)
+        })
+    return questions
+
+
+def write_bank(filename: str, count: int, seed: int = 0) -> None:
+    """Write a synthetic questions.json"""
+    with open(filename, 'w') as file:
+        json.dump(make_question_dicts(count, seed), file, indent=4)
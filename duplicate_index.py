@@ -0,0 +1,95 @@
+import hashlib
+import struct
+from typing import Dict, List, Optional, Set, Tuple
+from question import Question
+from grading_cache import normalize_answer
+
+#Questions with the same answer sharing at least this fraction of character
+#shingles are near-duplicates ("What is the capital of France?" and "Which
+#city is the capital of France?" share 0.61)
+DEFAULT_THRESHOLD = 0.6
+SHINGLE_SIZE = 4
+#64 MinHash values in 16 bands of 4: pairs at similarity 0.6 become candidates
+#about 90% of the time (0.7: 99%), pairs below 0.3 rarely do
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS = NUM_PERMUTATIONS // BANDS
+
+#One extendable-output hash per shingle gives all 64 hash values at once, the
+#per-position minimum is then taken in C by map(min, zip(...))
+_HASH_VALUES = struct.Struct(f"<{NUM_PERMUTATIONS}I")
+
+
+def shingles(text: str) -> Set[str]:
+    """Overlapping character k-grams of the normalized text"""
+    text = normalize_answer(text)
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text_shingles: Set[str]) -> Tuple[int, ...]:
+    """MinHash signature, matching positions estimate the Jaccard similarity of two sets"""
+    rows = [_HASH_VALUES.unpack(hashlib.shake_128(shingle.encode("utf-8")).digest(_HASH_VALUES.size))
+            for shingle in text_shingles]
+    return tuple(map(min, zip(*rows)))
+
+
+def jaccard(first: Set[str], second: Set[str]) -> float:
+    if not first and not second:
+        return 1.0
+    return len(first & second) / len(first | second)
+
+
+class DuplicateIndex:
+    """MinHash LSH index of question text for one topic
+
+    Each signature is split into bands and each band is hashed, together
+    with the normalized correct answer, into a bucket. A lookup only
+    compares against questions sharing a bucket, so it costs the same
+    however many questions are indexed, and "capital of France" is never
+    a candidate for "capital of Spain". Candidates are confirmed by exact
+    shingle similarity."""
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD) -> None:
+        self.threshold = threshold
+        self.buckets: List[Dict[int, List[Question]]] = [{} for _ in range(BANDS)]
+        #Question id -> its bucket keys, for every indexed question
+        self._keys: Dict[str, List[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @staticmethod
+    def _band_keys(question: Question, signature: Tuple[int, ...]) -> List[int]:
+        answer = normalize_answer(question.correct_answer)
+        return [hash((answer, signature[band * ROWS:(band + 1) * ROWS])) for band in range(BANDS)]
+
+    def add(self, question: Question) -> None:
+        if question.id not in self._keys:
+            self._insert(question, self._band_keys(question, minhash(shingles(question.text))))
+
+    def _insert(self, question: Question, band_keys: List[int]) -> None:
+        for band, key in enumerate(band_keys):
+            self.buckets[band].setdefault(key, []).append(question)
+        self._keys[question.id] = band_keys
+
+    def add_unless_duplicate(self, question: Question) -> Optional[Question]:
+        """Index question and return None, or return its duplicate without indexing it"""
+        duplicate, band_keys = self._lookup(question, shingles(question.text))
+        if duplicate is None and question.id not in self._keys:
+            self._insert(question, band_keys)
+        return duplicate
+
+    def _lookup(self, question: Question, question_shingles: Set[str]) -> Tuple[Optional[Question], List[int]]:
+        seen = {question.id}
+        band_keys = self._band_keys(question, minhash(question_shingles))
+        for band, key in enumerate(band_keys):
+            for candidate in self.buckets[band].get(key, ()):
+                if candidate.id in seen:
+                    continue
+                seen.add(candidate.id)
+                #Answers are equal unless two band keys collided
+                if normalize_answer(candidate.correct_answer) == normalize_answer(question.correct_answer) and \
+                        jaccard(question_shingles, shingles(candidate.text)) >= self.threshold:
+                    return candidate, band_keys
+        return None, band_keys
@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+import re
+import string
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from question import Question
+
+DEFAULT_CACHE_FILE = "grading_cache.json"
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_TTL_SECONDS = 30 * 24 * 60 * 60  # 30 days
+#New verdicts collected before save_if_due() rewrites the cache file
+DEFAULT_SAVE_EVERY = 20
+
+#Apostrophes are dropped ("don't" -> "dont"), other punctuation separates words ("covid-19" -> "covid 19")
+_PUNCTUATION = str.maketrans({c: ("" if c == "'" else " ") for c in string.punctuation})
+
+
+def normalize_answer(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    text = (text or "").lower().replace("\u2019", "'").translate(_PUNCTUATION)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class GradingCache:
+    """LRU cache of freeform grading verdicts with time-to-live, saved to JSON
+
+    Thread-safe: answers are graded on worker threads that share one cache.
+    Saves are batched and merge what other processes wrote to the file."""
+    def __init__(self, filename: Optional[str] = DEFAULT_CACHE_FILE,
+                 max_entries: int = DEFAULT_MAX_ENTRIES,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 save_every: int = DEFAULT_SAVE_EVERY) -> None:
+        self.filename = filename
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.save_every = save_every
+        #Verdicts stored since the last save
+        self.unsaved = 0
+        #key -> [verdict, stored_at], most recently used last
+        self.entries: "OrderedDict[str, list]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.RLock()
+        self.load()
+
+    @staticmethod
+    def make_key(question: Question, user_answer: str) -> str:
+        """Key on question id, reference answer and the normalized user answer"""
+        raw = "\x1f".join([question.id, question.correct_answer, normalize_answer(user_answer)])
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, question: Question, user_answer: str) -> Optional[bool]:
+        """Return a cached verdict or None"""
+        key = self.make_key(question, user_answer)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or time.time() - entry[1] > self.ttl_seconds:
+                if entry is not None:
+                    del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, question: Question, user_answer: str, verdict: bool) -> None:
+        """Store a verdict, evicting the least recently used entries"""
+        key = self.make_key(question, user_answer)
+        with self.lock:
+            self.entries[key] = [verdict, time.time()]
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self.unsaved += 1
+
+    def _read_file(self) -> Dict[str, list]:
+        try:
+            with open(self.filename, 'r') as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _merge(self, data: Dict[str, list]) -> None:
+        """Add unexpired entries from the file that are not in memory, as least recently used"""
+        now = time.time()
+        merged = OrderedDict((key, [verdict, stored_at]) for key, (verdict, stored_at) in data.items()
+                             if key not in self.entries and now - stored_at <= self.ttl_seconds)
+        merged.update(self.entries)
+        self.entries = merged
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def load(self) -> None:
+        """Load unexpired entries from the cache file"""
+        if not self.filename:
+            return
+        data = self._read_file()
+        with self.lock:
+            self._merge(data)
+
+    def save_if_due(self) -> None:
+        """Save once save_every verdicts are waiting, call save() before exiting"""
+        if self.unsaved >= self.save_every:
+            self.save()
+
+    def save(self) -> None:
+        """Write entries to the cache file (unique temp file + rename), never raises
+
+        Entries other processes saved in the meantime are merged in first,
+        so one process's save does not drop another one's verdicts."""
+        if not self.filename:
+            return
+        temp_name = None
+        try:
+            data = self._read_file()
+            #Copy under the lock, other threads keep grading while the file is written
+            with self.lock:
+                self._merge(data)
+                entries = dict(self.entries)
+                self.unsaved = 0
+            #A temp file per write, several clients may save the same cache at once
+            directory = os.path.dirname(os.path.abspath(self.filename))
+            fd, temp_name = tempfile.mkstemp(prefix=".grading-cache-", suffix=".tmp", dir=directory)
+            with os.fdopen(fd, 'w') as file:
+                json.dump(entries, file)
+            os.replace(temp_name, self.filename)
+        except Exception as e:
+            #A failed cache write must not change the grading result
+            print(f"Could not save grading cache: {e}")
+            if temp_name is not None:
+                try:
+                    os.remove(temp_name)
+                except OSError:
+                    pass
+
+    def get_stats(self) -> Dict[str, float]:
+        """Hit/miss counters for this session"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self.entries),
+                "hit_rate": (self.hits / lookups * 100) if lookups else 0.0
+            }
@@ -0,0 +1,83 @@
+import json
+from typing import Any, List
+
+
+class JSONArrayStreamParser:
+    """Incremental parser for a JSON array arriving in pieces
+
+    feed() returns every array element completed by the new text, so
+    callers can use the first items before the whole array has arrived.
+    Text before the opening bracket (e.g. a ```json fence) is ignored."""
+    def __init__(self) -> None:
+        self.buffer = ""
+        self.position = 0           # next character of buffer to scan
+        self.started = False        # opening "[" seen
+        self.done = False           # closing "]" seen
+        self.depth = 0              # 1 = directly inside the top-level array
+        self.in_string = False
+        self.escaped = False
+        self.element_start = None   # buffer index where the current element begins
+        self.errors = 0             # elements that were not valid JSON
+
+    def feed(self, text: str) -> List[Any]:
+        """Add text and return the elements it completed"""
+        if self.done:
+            return []
+        self.buffer += text
+        elements: List[Any] = []
+        buffer = self.buffer
+        i = self.position
+        while i < len(buffer) and not self.done:
+            char = buffer[i]
+            if not self.started:
+                if char == "[":
+                    self.started = True
+                    self.depth = 1
+            elif self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+                if self.depth == 1 and self.element_start is None:
+                    self.element_start = i
+            elif char in "{[":
+                if self.depth == 1 and self.element_start is None:
+                    self.element_start = i
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    #End of the top-level array, flush a trailing scalar element
+                    self._emit(buffer[self.element_start:i], elements)
+                    self.done = True
+                elif self.depth == 1:
+                    self._emit(buffer[self.element_start:i + 1], elements)
+            elif char == "," and self.depth == 1:
+                self._emit(buffer[self.element_start:i], elements)
+            elif not char.isspace() and self.depth == 1 and self.element_start is None:
+                self.element_start = i
+            i += 1
+
+        #Drop text that has been fully consumed so the buffer stays small
+        keep_from = i if self.element_start is None else self.element_start
+        self.buffer = buffer[keep_from:]
+        self.position = i - keep_from
+        if self.element_start is not None:
+            self.element_start -= keep_from
+        return elements
+
+    def _emit(self, raw: str, elements: List[Any]) -> None:
+        if self.element_start is None:
+            return
+        self.element_start = None
+        raw = raw.strip()
+        if not raw:
+            return
+        try:
+            elements.append(json.loads(raw))
+        except json.JSONDecodeError:
+            self.errors += 1
@@ -0,0 +1,161 @@
+import json
+import sys
+import threading
+from typing import Dict, Iterator, Tuple
+from question import Question
+
+#Characters read from questions.json per step while streaming
+DEFAULT_CHUNK_SIZE = 1 << 20
+#Key of the header element compaction writes first in questions.json, it is not a question
+SNAPSHOT_HEADER_KEY = "snapshot"
+
+_TEXT = Question.text
+_CORRECT_ANSWER = Question.correct_answer
+_OPTIONS = Question.options
+
+
+def iter_records(filename: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[int, int, Dict]]:
+    """Stream a JSON array file, yielding (byte offset, byte length, record) per element
+
+    Only one chunk plus the current record is held in memory, each record
+    is decoded by the C json decoder as soon as it is complete."""
+    decoder = json.JSONDecoder()
+    #newline="" keeps \r\n untouched so character counts match the bytes on disk
+    with open(filename, 'r', encoding='utf-8', newline='') as file:
+        buffer = ""
+        position = 0
+        byte_position = 0       # file offset of buffer[position]
+        started = False
+        eof = False
+        while True:
+            #Skip separators between records
+            start = position
+            while position < len(buffer) and (buffer[position] in " \t\r\n," or
+                                              (not started and buffer[position] == "[")):
+                if buffer[position] == "[":
+                    started = True
+                position += 1
+            byte_position += len(buffer[start:position].encode('utf-8'))
+
+            if position >= len(buffer) or (position > 0 and position >= chunk_size):
+                #Drop consumed text and read the next chunk
+                buffer = buffer[position:]
+                position = 0
+                if not eof:
+                    chunk = file.read(chunk_size)
+                    eof = not chunk
+                    buffer += chunk
+                    continue
+                if not buffer:
+                    return
+
+            if buffer[position] == "]":
+                return
+
+            try:
+                record, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                #Record continues in the next chunk
+                chunk = file.read(chunk_size)
+                eof = not chunk
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+
+            length = len(buffer[position:end].encode('utf-8'))
+            yield byte_position, length, record
+            byte_position += length
+            position = end
+
+
+class LazyBankFile:
+    """Open handle to questions.json used to read single records on demand
+
+    Keeping the handle open means an atomic replace of the file does not
+    change what not-yet-loaded questions point at."""
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+        self.file = open(filename, 'rb')
+        #Reentrant, LazyQuestion._load holds it around read_record
+        self.lock = threading.RLock()
+
+    def read_record(self, offset: int, length: int) -> Dict:
+        with self.lock:
+            self.file.seek(offset)
+            raw = self.file.read(length)
+        return json.loads(raw)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def _lazy_field(slot):
+    """Property that loads the full record the first time a heavy field is used"""
+    def getter(self):
+        if self._bank_file is not None:
+            self._load()
+        return slot.__get__(self, Question)
+
+    def setter(self, value):
+        if self._bank_file is not None:
+            self._load()
+        slot.__set__(self, value)
+
+    return property(getter, setter)
+
+
+class LazyQuestion(Question):
+    """Question whose text, answer and options stay on disk until first used"""
+    __slots__ = ("_bank_file", "_offset", "_length")
+
+    text = _lazy_field(_TEXT)
+    correct_answer = _lazy_field(_CORRECT_ANSWER)
+    options = _lazy_field(_OPTIONS)
+
+    @classmethod
+    def from_record(cls, data: Dict, bank_file: LazyBankFile, offset: int, length: int) -> 'LazyQuestion':
+        """Keep only the lightweight fields of a parsed record"""
+        question = cls.__new__(cls)
+        question.id = data.get("id")
+        question.topic = sys.intern(data["topic"])
+        question.type = sys.intern(data["type"])
+        question.source = sys.intern(data.get("source", "manual"))
+        question.enabled = data.get("enabled", True)
+        question.times_shown = data.get("times_shown", 0)
+        question.times_correct = data.get("times_correct", 0)
+        question.set_schedule(data)
+        question._bank_file = bank_file
+        question._offset = offset
+        question._length = length
+        return question
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._bank_file is None
+
+    def _load(self) -> None:
+        bank_file = self._bank_file
+        if bank_file is None:
+            return
+        #Prefetch threads and the UI may load the same question at once,
+        #the second one finds it loaded once it gets the lock
+        with bank_file.lock:
+            if self._bank_file is None:
+                return
+            data = bank_file.read_record(self._offset, self._length)
+            if data.get("id") != self.id:
+                raise RuntimeError(f"{bank_file.filename} changed on disk, reload the question bank")
+            _TEXT.__set__(self, data["text"])
+            _CORRECT_ANSWER.__set__(self, data["correct_answer"])
+            _OPTIONS.__set__(self, data.get("options", []))
+            self._bank_file = None
+
+
+def load_lazy_questions(filename: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> list:
+    """Stream questions.json into LazyQuestion objects"""
+    bank_file = LazyBankFile(filename)
+    return [LazyQuestion.from_record(record, bank_file, offset, length)
+            for offset, length, record in iter_records(filename, chunk_size)
+            if SNAPSHOT_HEADER_KEY not in record]
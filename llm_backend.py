@@ -0,0 +1,194 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import Dict, Iterator, List, Optional
+import httpx
+from openai import OpenAI, AsyncOpenAI, RateLimitError
+
+#Environment switch for running the apps without network, e.g. LLM_BACKEND=fake streamlit run app.py
+BACKEND_ENV_VAR = "LLM_BACKEND"
+FAKE_LATENCY_ENV_VAR = "FAKE_LLM_LATENCY"
+FAKE_ERROR_RATE_ENV_VAR = "FAKE_LLM_ERROR_RATE"
+
+#Characters of streamed content per fake chunk
+FAKE_STREAM_CHUNK_CHARS = 16
+
+
+class ChatBackend:
+    """Interface for whatever answers chat completion requests
+
+    Responses have the shape of OpenAI chat completions (choices, message,
+    delta, usage) so LLMClient does not care which backend it talks to."""
+
+    def complete(self, model: str, messages: List[Dict], temperature: float, stream: bool = False):
+        """Return a chat completion, or an iterator of chunks when stream is True"""
+        raise NotImplementedError
+
+    async def complete_async(self, model: str, messages: List[Dict], temperature: float):
+        """Async chat completion (no streaming)"""
+        raise NotImplementedError
+
+    async def aclose(self) -> None:
+        """Release connections opened by complete_async"""
+
+
+class OpenAIBackend(ChatBackend):
+    """OpenAI API, retries are left to LLMClient's scheduler"""
+    def __init__(self, api_key: str, http_client: Optional[httpx.Client] = None) -> None:
+        self.api_key = api_key
+        self.client = OpenAI(api_key=api_key, max_retries=0, http_client=http_client)
+        #An async pool belongs to one event loop, it is opened per asyncio.run and closed by aclose()
+        self.async_client: Optional[AsyncOpenAI] = None
+
+    def complete(self, model: str, messages: List[Dict], temperature: float, stream: bool = False):
+        kwargs = {}
+        if stream:
+            #Usage arrives in a final chunk with no choices
+            kwargs = {"stream": True, "stream_options": {"include_usage": True}}
+        return self.client.chat.completions.create(
+            model=model, temperature=temperature, messages=messages, **kwargs
+        )
+
+    async def complete_async(self, model: str, messages: List[Dict], temperature: float):
+        if self.async_client is None:
+            self.async_client = AsyncOpenAI(api_key=self.api_key, max_retries=0)
+        return await self.async_client.chat.completions.create(
+            model=model, temperature=temperature, messages=messages
+        )
+
+    async def aclose(self) -> None:
+        if self.async_client is not None:
+            await self.async_client.close()
+            self.async_client = None
+
+
+def _usage(prompt_tokens: int, completion_tokens: int) -> SimpleNamespace:
+    return SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                           total_tokens=prompt_tokens + completion_tokens)
+
+
+class FakeBackend(ChatBackend):
+    """Local deterministic stand-in for the API, for tests and offline benchmarks
+
+    Generation prompts get numbered questions about the requested topic,
+    grading prompts get verdicts derived from a hash of the answer, so the
+    same seed always produces the same session. Latency, error rate and
+    token counts are configurable."""
+    def __init__(self, latency: float = 0.0, token_latency: float = 0.0,
+                 error_rate: float = 0.0, correct_rate: float = 0.7,
+                 prompt_tokens: Optional[int] = None, completion_tokens: Optional[int] = None,
+                 seed: int = 0) -> None:
+        self.latency = latency                  # seconds before the first output
+        self.token_latency = token_latency      # extra seconds per completion token
+        self.error_rate = error_rate            # share of calls failing with a 429
+        self.correct_rate = correct_rate        # share of freeform answers graded correct
+        self.prompt_tokens = prompt_tokens      # fixed counts, estimated from text length when None
+        self.completion_tokens = completion_tokens
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+
+    #Building responses
+
+    def _reply(self, messages: List[Dict]) -> str:
+        prompt = messages[-1]["content"]
+        match = re.match(r"\s*Generate (\d+) study questions about (.+?)\.(?: This is batch (\d+) of \d+,[^\n]*)?\n", prompt)
+        if match:
+            return self._questions(int(match.group(1)), match.group(2), int(match.group(3) or 1))
+        items = re.findall(r"Item (\d+):\nQuestion: [^\n]*\nCorrect answer: ([^\n]*)\nUser's answer: ([^\n]*)", prompt)
+        if items:
+            return json.dumps([{"item": int(n), "verdict": self._verdict(answer, user_answer)}
+                               for n, answer, user_answer in items])
+        answer = re.search(r"Correct answer: (.*)", prompt)
+        user_answer = re.search(r"User's answer: (.*)", prompt)
+        return self._verdict(answer.group(1) if answer else "", user_answer.group(1) if user_answer else "")
+
+    def _questions(self, count: int, topic: str, part: int) -> str:
+        questions = []
+        for i in range(count):
+            number = (part - 1) * 1000 + i + 1
+            if i % 2 == 0:
+                options = [f"Option {k} of {number}" for k in range(1, 5)]
+                questions.append({"text": f"Question {number} about {topic}?", "type": "mcq",
+                                  "correct_answer": options[number % 4], "options": options})
+            else:
+                questions.append({"text": f"Explain point {number} of {topic}.", "type": "freeform",
+                                  "correct_answer": f"Answer {number} about {topic}", "options": None})
+        return json.dumps(questions)
+
+    def _verdict(self, correct_answer: str, user_answer: str) -> str:
+        digest = hashlib.sha1(f"{self.seed}\x1f{correct_answer}\x1f{user_answer}".encode("utf-8")).digest()
+        return "correct" if digest[0] / 256 < self.correct_rate else "incorrect"
+
+    def _count_tokens(self, messages: List[Dict], content: str) -> SimpleNamespace:
+        prompt_tokens = self.prompt_tokens
+        if prompt_tokens is None:
+            prompt_tokens = sum(len(m["content"]) for m in messages) // 4
+        completion_tokens = self.completion_tokens
+        if completion_tokens is None:
+            completion_tokens = max(1, len(content) // 4)
+        return _usage(prompt_tokens, completion_tokens)
+
+    def _start_call(self) -> None:
+        """Count the call and raise a simulated rate limit error for error_rate of them"""
+        with self.lock:
+            self.calls += 1
+            failed = self.rng.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        if failed:
+            response = httpx.Response(429, request=httpx.Request("POST", "http://fake-llm/chat/completions"))
+            raise RateLimitError("Simulated rate limit", response=response, body=None)
+
+    def _response(self, content: str, usage: SimpleNamespace) -> SimpleNamespace:
+        message = SimpleNamespace(role="assistant", content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(index=0, message=message, finish_reason="stop")],
+                               usage=usage)
+
+    #ChatBackend
+
+    def complete(self, model: str, messages: List[Dict], temperature: float, stream: bool = False):
+        self._start_call()
+        content = self._reply(messages)
+        usage = self._count_tokens(messages, content)
+        if stream:
+            return self._stream(content, usage)
+        time.sleep(self.latency + self.token_latency * usage.completion_tokens)
+        return self._response(content, usage)
+
+    def _stream(self, content: str, usage: SimpleNamespace) -> Iterator[SimpleNamespace]:
+        time.sleep(self.latency)
+        per_chunk = self.token_latency * usage.completion_tokens * FAKE_STREAM_CHUNK_CHARS / max(1, len(content))
+        for start in range(0, len(content), FAKE_STREAM_CHUNK_CHARS):
+            if per_chunk:
+                time.sleep(per_chunk)
+            delta = SimpleNamespace(content=content[start:start + FAKE_STREAM_CHUNK_CHARS])
+            yield SimpleNamespace(choices=[SimpleNamespace(index=0, delta=delta)], usage=None)
+        yield SimpleNamespace(choices=[], usage=usage)
+
+    async def complete_async(self, model: str, messages: List[Dict], temperature: float):
+        self._start_call()
+        content = self._reply(messages)
+        usage = self._count_tokens(messages, content)
+        await asyncio.sleep(self.latency + self.token_latency * usage.completion_tokens)
+        return self._response(content, usage)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Calls served and simulated failures"""
+        return {"calls": self.calls, "errors": self.errors}
+
+
+def backend_from_env() -> Optional[ChatBackend]:
+    """FakeBackend when LLM_BACKEND=fake, None means use the OpenAI API"""
+    if os.getenv(BACKEND_ENV_VAR, "").lower() != "fake":
+        return None
+    return FakeBackend(latency=float(os.getenv(FAKE_LATENCY_ENV_VAR, "0.2")),
+                       error_rate=float(os.getenv(FAKE_ERROR_RATE_ENV_VAR, "0")))
@@ -1,7 +1,18 @@
 import os
-from openai import OpenAI, APIError, APIConnectionError, RateLimitError, AuthenticationError
-from typing import List, Dict
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+from openai import APIError, APIConnectionError, RateLimitError, AuthenticationError, InternalServerError
+from typing import Iterator, List, Dict, Optional, Tuple
 from question import Question
+from json_stream import JSONArrayStreamParser
+from grading_cache import GradingCache
+from pre_grader import pre_grade
+from request_scheduler import RequestScheduler
+from llm_backend import ChatBackend, OpenAIBackend, backend_from_env
+from llm_metrics import LLMMetrics
 import json
 
 # OpenAI API Configuration Constants
@@ -9,24 +20,39 @@ DEFAULT_MODEL = "gpt-4o-mini"
 QUESTION_GENERATION_TEMPERATURE = 0.8  # Higher creativity for diverse questions
 ANSWER_EVALUATION_TEMPERATURE = 0.2    # Lower for consistent, strict grading
 
-class LLMClient:
-    """OpenAI API handling question generation and evaluation"""
-    def __init__(self, api_key: str | None = None) -> None:
+# Async client limits
+DEFAULT_MAX_CONCURRENCY = 4       # Simultaneous requests per AsyncLLMClient
+DEFAULT_REQUEST_TIMEOUT = 60.0    # Seconds before a single request is abandoned
 
-        self.api_key = api_key if api_key else os.getenv("OPENAI_API_KEY")
-        if not self.api_key:
-            raise ValueError("OpenAI API key not found. Set OPENAI_API_KEY environment variable.")
-        self.client = OpenAI(api_key=self.api_key)
+# Large generation requests are split into chunks that run in parallel
+GENERATION_CHUNK_SIZE = 10        # Questions per request
+MAX_CHUNK_RETRIES = 2             # Extra attempts for a chunk that failed or came back short
 
-        #Token usage tracking
-        self.total_prompt_tokens = 0
-        self.total_completion_tokens = 0
-        self.total_tokens = 0
-        
-    def generate_questions(self, topic: str, num_questions: int = 5 ) -> List[Question]:
-        """Generate study questions using OpenAI LLM"""
+# Freeform answers graded together in one request by evaluate_answers
+BATCH_GRADING_SIZE = 25
+
+# Connection pool shared by every LLMClient of the process
+HTTP_MAX_CONNECTIONS = 20
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 10
+HTTP_KEEPALIVE_EXPIRY = 30.0      # Seconds an idle connection is kept open
 
-        prompt = f"""Generate {num_questions} study questions about {topic}.
+# Completion tokens expected per request, used to reserve tokens-per-minute capacity
+GENERATION_TOKENS_PER_QUESTION = 120
+GRADING_COMPLETION_TOKENS = 5
+BATCH_GRADING_TOKENS_PER_ITEM = 15
+
+# Errors worth retrying: 429s, network failures and 5xx responses
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, InternalServerError)
+
+GENERATION_SYSTEM_PROMPT = "You are a helpful study assistant that provides educational questions."
+GRADING_SYSTEM_PROMPT = "You are a strict quiz grader. Always follow numerated grading rules exactly as specified."
+
+
+def build_generation_prompt(topic: str, num_questions: int, part: int = 1, parts: int = 1) -> str:
+    """Prompt asking for num_questions questions as a JSON array"""
+    #Parallel chunks are told apart so they do not all produce the same questions
+    batch_note = f" This is batch {part} of {parts}, cover different aspects than the other batches." if parts > 1 else ""
+    return f"""Generate {num_questions} study questions about {topic}.{batch_note}
     Return ONLY a JSON array with this exact format (no other text):
     [
         {{
@@ -45,136 +71,730 @@ class LLMClient:
 
     Mix of MCQ and freeform questions. Make them challenging and educational."""
 
+
+def build_grading_prompt(question: Question, user_answer: str) -> str:
+    """Prompt asking for a one word verdict on a freeform answer"""
+    return f"""You are a quiz grader. Grade answers based on meaning, not exact wording.
+
+Question: {question.text}
+Correct answer: {question.correct_answer}
+User's answer: {user_answer}
+
+Grading rules:
+1. If user says "I don't know", "not sure", "no idea", or leaves it blank -> Return "incorrect"
+2. If the answer is completely unrelated to the question -> Return "incorrect"
+3. If the answer is missing key facts from the correct answer -> Return "incorrect"
+4. If the answer is semantically correct (same meaning) even with different wording, spelling, or formatting -> Return "correct"
+5. Accept answers that demonstrate actual knowledge of the topic, even if worded differently
+
+Examples:
+- "COVID-19 pandemic" vs "covid 19" -> BOTH CORRECT (same meaning)
+- "Paris Agreement" vs "paris agreement" -> BOTH CORRECT (case doesn't matter)
+- "World War 2" vs "WW2" vs "WWII" -> ALL CORRECT (same meaning)
+
+You must respond with EXACTLY one word: "correct" or "incorrect"
+No explanations, no extra text."""
+
+
+def build_batch_grading_prompt(items: List[Tuple[Question, str]]) -> str:
+    """Prompt grading several answers at once, the rubric is sent only once"""
+    answers = "\n\n".join(
+        f"Item {n}:\nQuestion: {question.text}\nCorrect answer: {question.correct_answer}\nUser's answer: {user_answer}"
+        for n, (question, user_answer) in enumerate(items, 1)
+    )
+    return f"""You are a quiz grader. Grade answers based on meaning, not exact wording.
+
+Grading rules:
+1. If user says "I don't know", "not sure", "no idea", or leaves it blank -> "incorrect"
+2. If the answer is completely unrelated to the question -> "incorrect"
+3. If the answer is missing key facts from the correct answer -> "incorrect"
+4. If the answer is semantically correct (same meaning) even with different wording, spelling, or formatting -> "correct"
+5. Accept answers that demonstrate actual knowledge of the topic, even if worded differently
+
+{answers}
+
+Return ONLY a JSON array with one object per item (no other text):
+[{{"item": 1, "verdict": "correct"}}, {{"item": 2, "verdict": "incorrect"}}]"""
+
+
+def parse_batch_verdicts(response_text: str, count: int) -> List[Optional[bool]]:
+    """Map a batch grading reply to verdicts by item number, None when missing"""
+    verdicts: List[Optional[bool]] = [None] * count
+    for entry in JSONArrayStreamParser().feed(response_text):
+        if not isinstance(entry, dict):
+            continue
+        item = entry.get("item")
+        verdict = str(entry.get("verdict", "")).strip().lower()
+        if isinstance(item, int) and 1 <= item <= count and verdict in ("correct", "incorrect"):
+            verdicts[item - 1] = verdict == "correct"
+    return verdicts
+
+
+def estimate_tokens(prompt: str, completion_tokens: int) -> int:
+    """Rough request size, about four characters per prompt token"""
+    return (len(GENERATION_SYSTEM_PROMPT) + len(prompt)) // 4 + completion_tokens
+
+
+_shared_lock = threading.Lock()
+_shared_http_client: Optional[httpx.Client] = None
+_shared_scheduler: Optional[RequestScheduler] = None
+
+
+def get_shared_http_client() -> httpx.Client:
+    """One keep-alive connection pool for every generation and grading call"""
+    global _shared_http_client
+    with _shared_lock:
+        if _shared_http_client is None:
+            _shared_http_client = httpx.Client(
+                timeout=DEFAULT_REQUEST_TIMEOUT,
+                limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS,
+                                    max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY)
+            )
+        return _shared_http_client
+
+
+def get_shared_scheduler() -> RequestScheduler:
+    """Process-wide scheduler, provider rate limits apply to the API key, not to one client"""
+    global _shared_scheduler
+    with _shared_lock:
+        if _shared_scheduler is None:
+            _shared_scheduler = RequestScheduler(retryable=RETRYABLE_ERRORS)
+        return _shared_scheduler
+
+
+def split_into_chunks(num_questions: int, chunk_size: int = GENERATION_CHUNK_SIZE) -> List[int]:
+    """Chunk sizes for a request, e.g. 25 -> [10, 10, 5]"""
+    full, rest = divmod(max(0, num_questions), chunk_size)
+    return [chunk_size] * full + ([rest] if rest else [])
+
+
+def is_valid_question_data(q_data) -> bool:
+    """Check one generated item has everything a Question needs"""
+    if not isinstance(q_data, dict):
+        return False
+    text = q_data.get("text")
+    answer = q_data.get("correct_answer")
+    if not isinstance(text, str) or not text.strip() or not isinstance(answer, str) or not answer.strip():
+        return False
+    if q_data.get("type") == "freeform":
+        return True
+    if q_data.get("type") == "mcq":
+        options = q_data.get("options")
+        return (isinstance(options, list) and len(options) >= 2
+                and all(isinstance(o, str) for o in options) and answer in options)
+    return False
+
+
+def parse_generated_questions(response_text: str, topic: str) -> List[Question]:
+    """Convert the JSON array returned by the LLM into Question objects
+
+    Malformed items are dropped one by one instead of failing the batch."""
+    #Parse JSON response, converts JSON string  -> Python list
+    questions_data = json.loads(response_text)
+    if not isinstance(questions_data, list):
+        raise json.JSONDecodeError("Expected a JSON array", response_text, 0)
+
+    #Convert to Question object
+    questions = []
+    #Loop through each question dictionary
+    for q_data in questions_data:
+        if is_valid_question_data(q_data):
+            questions.append(question_from_data(q_data, topic))
+
+    return questions
+
+
+def question_from_data(q_data: Dict, topic: str) -> Question:
+    """Create a Question object from one generated item"""
+    return Question(
+        topic=topic,
+        text=q_data["text"],
+        question_type=q_data["type"],
+        correct_answer=q_data["correct_answer"],
+        options=q_data.get("options"),
+        source="generated"
+    )
+
+
+def grade_mcq(question: Question, user_answer: str) -> bool:
+    """For MCQ comparing strings or numbers"""
+    #Check if user entered a number (1, 2, 3, 4)
+    if user_answer.isdigit():
+        option_index = int(user_answer) - 1  #Convert to 0-based index
+        if 0 <= option_index < len(question.options):
+            user_answer = question.options[option_index]
+    return user_answer == question.correct_answer
+
+
+def make_backend(api_key: str | None, backend: Optional[ChatBackend]) -> ChatBackend:
+    """Given backend, LLM_BACKEND=fake, or the OpenAI API (which needs a key)"""
+    if backend is None:
+        backend = backend_from_env()
+    if backend is not None:
+        return backend
+    if not api_key:
+        raise ValueError("OpenAI API key not found. Set OPENAI_API_KEY environment variable.")
+    #Retries are done by the scheduler, the SDK's own retry loop would ignore the rate limiter
+    return OpenAIBackend(api_key, http_client=get_shared_http_client())
+
+
+class LLMClient:
+    """LLM API handling question generation and evaluation
+
+    Requests go to a ChatBackend, the OpenAI API unless another backend
+    (e.g. llm_backend.FakeBackend for offline benchmarks) is given."""
+    def __init__(self, api_key: str | None = None,
+                 grading_cache: Optional[GradingCache] = None,
+                 scheduler: Optional[RequestScheduler] = None,
+                 backend: Optional[ChatBackend] = None,
+                 metrics: Optional[LLMMetrics] = None) -> None:
+
+        self.api_key = api_key if api_key else os.getenv("OPENAI_API_KEY")
+        self.backend = make_backend(self.api_key, backend)
+        self.scheduler = scheduler if scheduler is not None else get_shared_scheduler()
+        #Per-call latency, token and outcome records, appended to llm_calls.jsonl
+        self.metrics = metrics if metrics is not None else LLMMetrics()
+
+        #Token usage tracking, the lock protects it from parallel chunk threads
+        self.total_prompt_tokens = 0
+        self.total_completion_tokens = 0
+        self.total_tokens = 0
+        self.usage_lock = threading.Lock()
+
+        #Freeform verdicts already graded, repeat answers cost no tokens
+        self.grading_cache = grading_cache if grading_cache is not None else GradingCache()
+
+        #Freeform grading counters, used to report how many API calls were avoided,
+        #usage_lock guards them too since batches are graded on worker threads
+        self.freeform_gradings = 0
+        self.local_gradings = 0
+
+    def _track_usage(self, usage) -> None:
+        """Add the usage block of one response to the running totals"""
+        if usage:
+            with self.usage_lock:
+                self.total_prompt_tokens += usage.prompt_tokens
+                self.total_completion_tokens += usage.completion_tokens
+                self.total_tokens += usage.total_tokens
+
+    def _count_freeform(self, local_verdict: Optional[bool]) -> None:
+        """Count one freeform grading, and whether it was decided locally"""
+        with self.usage_lock:
+            self.freeform_gradings += 1
+            if local_verdict is not None:
+                self.local_gradings += 1
+
+    def _create(self, kind: str, estimated_tokens: int, **kwargs):
+        """Chat completion through the rate limiter with retries on transient errors
+
+        Non-streaming calls are recorded in metrics under kind, streams are
+        recorded by the caller once the last chunk has arrived."""
+        started = time.perf_counter()
+        try:
+            response = self.scheduler.call(
+                lambda: self.backend.complete(DEFAULT_MODEL, **kwargs),
+                estimated_tokens
+            )
+        except Exception as e:
+            self.metrics.record(kind, DEFAULT_MODEL, started, outcome=type(e).__name__,
+                                cache="miss" if kind != "generation" else None)
+            raise
+        if not kwargs.get("stream"):
+            self.metrics.record(kind, DEFAULT_MODEL, started, usage=response.usage,
+                                cache="miss" if kind != "generation" else None)
+            if response.usage:
+                self.scheduler.limiter.record_usage(estimated_tokens, response.usage.total_tokens)
+        return response
+
+    def add_token_usage(self, usage: Dict[str, int]) -> None:
+        """Merge totals reported by another client, e.g. an AsyncLLMClient"""
+        with self.usage_lock:
+            self.total_prompt_tokens += usage["prompt_tokens"]
+            self.total_completion_tokens += usage["completion_tokens"]
+            self.total_tokens += usage["total_tokens"]
+
+    def generate_questions(self, topic: str, num_questions: int = 5 ) -> List[Question]:
+        """Generate study questions using OpenAI LLM
+
+        Requests above GENERATION_CHUNK_SIZE are split into chunks that run
+        in parallel, each chunk is validated and retried on its own."""
+        chunks = split_into_chunks(num_questions)
+        if len(chunks) <= 1:
+            return self._generate_chunk(topic, num_questions)
+
+        with ThreadPoolExecutor(max_workers=DEFAULT_MAX_CONCURRENCY) as executor:
+            futures = [executor.submit(self._generate_chunk, topic, size, part, len(chunks))
+                       for part, size in enumerate(chunks, 1)]
+            #Partial results are merged, a failed chunk only loses its own questions
+            return [q for future in futures for q in future.result()]
+
+    def _generate_chunk(self, topic: str, num_questions: int, part: int = 1, parts: int = 1) -> List[Question]:
+        """Generate one chunk, retrying for whatever is still missing"""
+        questions: List[Question] = []
+        for _ in range(1 + MAX_CHUNK_RETRIES):
+            missing = num_questions - len(questions)
+            if missing <= 0:
+                break
+            try:
+                questions.extend(self._request_questions(topic, missing, part, parts)[:missing])
+
+            except json.JSONDecodeError as e:
+                #For JSON parsing issues
+                print(f"Error parsing LLM response: {e}")
+            except AuthenticationError as e:
+                print(f"Authentication error: Invalid API key - {e}")
+                break
+            except RateLimitError as e:
+                print(f"Rate limit exceeded: {e}")
+            except APIConnectionError as e:
+                print(f"Connection error: Unable to reach OpenAI API - {e}")
+            except APIError as e:
+                print(f"OpenAI API error: {e}")
+            except Exception as e:
+                print(f"Unexpected error generating questions: {e}")
+                break
+        return questions
+
+    def _request_questions(self, topic: str, num_questions: int, part: int = 1, parts: int = 1) -> List[Question]:
+        """One generation request, errors are raised to the caller"""
+        prompt = build_generation_prompt(topic, num_questions, part, parts)
+
+        #Calling OpenAI API
+        response = self._create(
+            "generation",
+            estimate_tokens(prompt, num_questions * GENERATION_TOKENS_PER_QUESTION),
+            temperature=QUESTION_GENERATION_TEMPERATURE,
+            messages=[
+                {"role": "system", "content": GENERATION_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ]
+        )
+
+        #Track token usage
+        self._track_usage(response.usage)
+
+        response_text = response.choices[0].message.content
+
+        return parse_generated_questions(response_text, topic)
+
+    def stream_questions(self, topic: str, num_questions: int = 5) -> Iterator[Question]:
+        """Generate questions as a stream, yielding each one as soon as it is complete"""
+        prompt = build_generation_prompt(topic, num_questions)
+        parser = JSONArrayStreamParser()
+        started = time.perf_counter()
+
         try:
-            #Calling OpenAI API
-            response = self.client.chat.completions.create(
-                model=DEFAULT_MODEL,
+            stream = self._create(
+                "generation_stream",
+                estimate_tokens(prompt, num_questions * GENERATION_TOKENS_PER_QUESTION),
                 temperature=QUESTION_GENERATION_TEMPERATURE,
                 messages=[
-                    {"role": "system", "content": "You are a helpful study assistant that provides educational questions."},
+                    {"role": "system", "content": GENERATION_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
-                ]
+                ],
+                stream=True
             )
 
-            #Track token usage
-            if response.usage:
-                self.total_prompt_tokens += response.usage.prompt_tokens
-                self.total_completion_tokens += response.usage.completion_tokens
-                self.total_tokens += response.usage.total_tokens
-
-            response_text = response.choices[0].message.content
-
-            #Parse JSON response, converts JSON string  -> Python list
-            questions_data = json.loads(response_text)
-
-            #Convert to Question object
-            questions = []
-            #Loop through each question dictionary
-            for q_data in questions_data:
-            #Create a Question object for each one
-                question = Question(
-                    topic=topic,
-                    text=q_data["text"],
-                    question_type=q_data["type"],
-                    correct_answer=q_data["correct_answer"],
-                    options=q_data.get("options"),
-                    source="generated"
-                )
-                questions.append(question)
+            for chunk in self._record_stream(stream, started):
+                self._track_usage(chunk.usage)
+                if not chunk.choices:
+                    continue
+                content = chunk.choices[0].delta.content
+                if not content:
+                    continue
+                for q_data in parser.feed(content):
+                    if is_valid_question_data(q_data):
+                        yield question_from_data(q_data, topic)
 
-            return questions
+            if parser.errors:
+                print(f"Skipped {parser.errors} malformed question(s) in the LLM response")
 
-        except json.JSONDecodeError as e:
-            #For JSON parsing issues
-            print(f"Error parsing LLM response: {e}")
-            return []
         except AuthenticationError as e:
             print(f"Authentication error: Invalid API key - {e}")
-            return []
         except RateLimitError as e:
             print(f"Rate limit exceeded: {e}")
-            return []
         except APIConnectionError as e:
             print(f"Connection error: Unable to reach OpenAI API - {e}")
-            return []
         except APIError as e:
             print(f"OpenAI API error: {e}")
-            return []
         except Exception as e:
-            print(f"Unexpected error generating questions: {e}")
-            return []
-        
+            print(f"Unexpected error streaming questions: {e}")
+
+    def _record_stream(self, stream, started: float):
+        """Pass stream chunks through, then record time to first token, usage and outcome"""
+        first_token = None
+        usage = None
+        try:
+            for chunk in stream:
+                usage = chunk.usage or usage
+                if first_token is None and chunk.choices and chunk.choices[0].delta.content:
+                    first_token = time.perf_counter()
+                yield chunk
+        except Exception as e:
+            self.metrics.record("generation_stream", DEFAULT_MODEL, started, usage=usage,
+                                ttft=first_token, outcome=type(e).__name__)
+            raise
+        self.metrics.record("generation_stream", DEFAULT_MODEL, started, usage=usage, ttft=first_token)
+
+    def generate_questions_for_topics(self, topics: List[str], num_questions: int = 5,
+                                      max_concurrency: int = DEFAULT_MAX_CONCURRENCY) -> Dict[str, List[Question]]:
+        """Generate questions for several topics concurrently (blocking wrapper)"""
+        async def run() -> Dict[str, List[Question]]:
+            async with AsyncLLMClient(self.api_key, max_concurrency=max_concurrency,
+                                      grading_cache=self.grading_cache,
+                                      scheduler=self.scheduler,
+                                      backend=self.backend,
+                                      metrics=self.metrics) as async_client:
+                results = await async_client.generate_for_topics(topics, num_questions)
+                self.add_token_usage(async_client.get_token_usage())
+                return results
+
+        return asyncio.run(run())
+
     def evaluate_answer(self, question: Question, user_answer: str) -> bool:
         """Evaluate if user's answer is correct using AI for freeform questions"""
 
         #For MCQ comparing strings or numbers
         if question.type == "mcq":
-            #Check if user entered a number (1, 2, 3, 4)
-            if user_answer.isdigit():
-                option_index = int(user_answer) - 1  #Convert to 0-based index
-                if 0 <= option_index < len(question.options):
-                    user_answer = question.options[option_index]
-            return user_answer == question.correct_answer
-        
-        # Freeform AI grade evaluation 
+            return grade_mcq(question, user_answer)
+
+        # Freeform AI grade evaluation
         else:
-            prompt = f"""You are a quiz grader. Grade answers based on meaning, not exact wording.
+            #Blank, "I don't know" and near-exact answers never reach the API
+            local_verdict = pre_grade(question, user_answer)
+            self._count_freeform(local_verdict)
+            if local_verdict is not None:
+                return local_verdict
 
-Question: {question.text}
-Correct answer: {question.correct_answer}
-User's answer: {user_answer}
+            started = time.perf_counter()
+            cached = self.grading_cache.get(question, user_answer)
+            if cached is not None:
+                self.metrics.record("grading", None, started, cache="hit")
+                return cached
 
-Grading rules:
-1. If user says "I don't know", "not sure", "no idea", or leaves it blank -> Return "incorrect"
-2. If the answer is completely unrelated to the question -> Return "incorrect"
-3. If the answer is missing key facts from the correct answer -> Return "incorrect"
-4. If the answer is semantically correct (same meaning) even with different wording, spelling, or formatting -> Return "correct"
-5. Accept answers that demonstrate actual knowledge of the topic, even if worded differently
+            return self._grade_freeform_with_llm(question, user_answer)
 
-Examples:
-- "COVID-19 pandemic" vs "covid 19" -> BOTH CORRECT (same meaning)
-- "Paris Agreement" vs "paris agreement" -> BOTH CORRECT (case doesn't matter)
-- "World War 2" vs "WW2" vs "WWII" -> ALL CORRECT (same meaning)
+    def _grade_freeform_with_llm(self, question: Question, user_answer: str) -> bool:
+        """Grade one freeform answer with a chat completion"""
+        prompt = build_grading_prompt(question, user_answer)
 
-You must respond with EXACTLY one word: "correct" or "incorrect"
-No explanations, no extra text."""
+        try:
+            response = self._create(
+                "grading",
+                estimate_tokens(prompt, GRADING_COMPLETION_TOKENS),
+                temperature=ANSWER_EVALUATION_TEMPERATURE,
+                messages=[
+                    {"role": "system", "content": GRADING_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ]
+            )
+
+            #Track token usage
+            self._track_usage(response.usage)
+
+            response_text = response.choices[0].message.content.strip().lower()
+
+            #Check if AI responds with exactly "correct"
+            is_correct = response_text == "correct"
+
+            #Only successful verdicts are cached, errors fall through below
+            self.grading_cache.put(question, user_answer, is_correct)
+            self.grading_cache.save_if_due()
+            return is_correct
+
+        except AuthenticationError as e:
+            print(f"Authentication error: Invalid API key - {e}")
+            return False
+        except RateLimitError as e:
+            print(f"Rate limit exceeded: {e}")
+            return False
+        except APIConnectionError as e:
+            print(f"Connection error: Unable to reach OpenAI API - {e}")
+            return False
+        except APIError as e:
+            print(f"OpenAI API error: {e}")
+            return False
+        except Exception as e:
+            print(f"Unexpected error evaluating answer: {e}")
+            return False
+
+    def evaluate_answers(self, answers: List[Tuple[Question, str]]) -> List[bool]:
+        """Evaluate many answers at once, results keep input order
+
+        MCQ, trivial and cached answers are graded locally, the remaining
+        freeform answers share one grading request per BATCH_GRADING_SIZE."""
+        results: List[Optional[bool]] = [None] * len(answers)
+        pending = []
+        for i, (question, user_answer) in enumerate(answers):
+            if question.type == "mcq":
+                results[i] = grade_mcq(question, user_answer)
+                continue
+            local_verdict = pre_grade(question, user_answer)
+            self._count_freeform(local_verdict)
+            if local_verdict is not None:
+                results[i] = local_verdict
+                continue
+            started = time.perf_counter()
+            results[i] = self.grading_cache.get(question, user_answer)
+            if results[i] is None:
+                pending.append(i)
+            else:
+                self.metrics.record("grading", None, started, cache="hit")
+
+        for start in range(0, len(pending), BATCH_GRADING_SIZE):
+            batch = pending[start:start + BATCH_GRADING_SIZE]
+            verdicts = self._grade_batch([answers[i] for i in batch])
+            for i, verdict in zip(batch, verdicts):
+                if verdict is None:
+                    #Item missing from the batch reply, grade it on its own
+                    verdict = self._grade_freeform_with_llm(*answers[i])
+                else:
+                    self.grading_cache.put(answers[i][0], answers[i][1], verdict)
+                results[i] = verdict
+        if pending:
+            self.grading_cache.save_if_due()
+        return results
+
+    def _grade_batch(self, items: List[Tuple[Question, str]]) -> List[Optional[bool]]:
+        """Grade several freeform answers in one request, None where no verdict came back"""
+        prompt = build_batch_grading_prompt(items)
+        try:
+            response = self._create(
+                "batch_grading",
+                estimate_tokens(prompt, len(items) * BATCH_GRADING_TOKENS_PER_ITEM),
+                temperature=ANSWER_EVALUATION_TEMPERATURE,
+                messages=[
+                    {"role": "system", "content": GRADING_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ]
+            )
+            self._track_usage(response.usage)
+            return parse_batch_verdicts(response.choices[0].message.content, len(items))
+
+        except AuthenticationError as e:
+            print(f"Authentication error: Invalid API key - {e}")
+        except RateLimitError as e:
+            print(f"Rate limit exceeded: {e}")
+        except APIConnectionError as e:
+            print(f"Connection error: Unable to reach OpenAI API - {e}")
+        except APIError as e:
+            print(f"OpenAI API error: {e}")
+        except Exception as e:
+            print(f"Unexpected error evaluating answers: {e}")
+        return [None] * len(items)
+
+    def get_token_usage(self) -> Dict[str, int]:
+        """Get total token usage statistics"""
+        return {
+            "prompt_tokens": self.total_prompt_tokens,
+            "completion_tokens": self.total_completion_tokens,
+            "total_tokens": self.total_tokens
+        }
+
+    def get_cache_stats(self) -> Dict[str, float]:
+        """Get grading cache hit/miss statistics"""
+        return self.grading_cache.get_stats()
+
+    def get_call_stats(self) -> Dict[str, Dict[str, float]]:
+        """Per call kind (generation, grading, ...): calls, errors, cache hits, tokens, p50/p95/p99 ms"""
+        return self.metrics.summary()
+
+    def export_call_records(self, filename: str) -> int:
+        """Write recent per-call records as JSON lines, returns how many were written"""
+        return self.metrics.export_jsonl(filename)
+
+    def get_scheduler_stats(self) -> Dict[str, float]:
+        """Retries and time spent waiting for rate limit capacity (shared by the process)"""
+        return self.scheduler.get_stats()
+
+    def get_grading_stats(self) -> Dict[str, float]:
+        """Get how freeform answers were graded and the share of avoided API calls"""
+        cache_hits = self.grading_cache.hits
+        avoided = self.local_gradings + cache_hits
+        return {
+            "freeform_gradings": self.freeform_gradings,
+            "local": self.local_gradings,
+            "cached": cache_hits,
+            "api": self.freeform_gradings - avoided,
+            "avoided_pct": (avoided / self.freeform_gradings * 100) if self.freeform_gradings else 0.0
+        }
+
+
+class AsyncLLMClient:
+    """Async LLM client for running many generation or grading requests at once
+
+    A semaphore bounds how many requests are in flight and every request
+    has its own timeout, so a batch takes about as long as its slowest call."""
+    def __init__(self, api_key: str | None = None,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+                 grading_cache: Optional[GradingCache] = None,
+                 scheduler: Optional[RequestScheduler] = None,
+                 backend: Optional[ChatBackend] = None,
+                 metrics: Optional[LLMMetrics] = None) -> None:
+
+        self.api_key = api_key if api_key else os.getenv("OPENAI_API_KEY")
+        self.backend = make_backend(self.api_key, backend)
+        self.scheduler = scheduler if scheduler is not None else get_shared_scheduler()
+        self.metrics = metrics if metrics is not None else LLMMetrics()
+        self.request_timeout = request_timeout
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+        #Token usage tracking
+        self.total_prompt_tokens = 0
+        self.total_completion_tokens = 0
+        self.total_tokens = 0
 
+        self.grading_cache = grading_cache if grading_cache is not None else GradingCache()
+
+    async def __aenter__(self) -> "AsyncLLMClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Close the underlying HTTP connections"""
+        await self.backend.aclose()
+
+    def _track_usage(self, usage) -> None:
+        if usage:
+            self.total_prompt_tokens += usage.prompt_tokens
+            self.total_completion_tokens += usage.completion_tokens
+            self.total_tokens += usage.total_tokens
+
+    async def _complete(self, kind: str, temperature: float, system_prompt: str, prompt: str,
+                        completion_tokens: int = GRADING_COMPLETION_TOKENS) -> str:
+        """One chat completion, bounded by the semaphore, the rate limiter and the request timeout"""
+        estimated_tokens = estimate_tokens(prompt, completion_tokens)
+        cache = "miss" if kind != "generation" else None
+        async with self.semaphore:
+            #Time spent queued behind the semaphore is not part of the call
+            started = time.perf_counter()
             try:
-                response = self.client.chat.completions.create(
-                    model=DEFAULT_MODEL,
-                    temperature=ANSWER_EVALUATION_TEMPERATURE,
-                    messages=[
-                        {"role": "system", "content": "You are a strict quiz grader. Always follow numerated grading rules exactly as specified."},
-                        {"role": "user", "content": prompt}
-                    ]
+                response = await self.scheduler.call_async(
+                    lambda: asyncio.wait_for(
+                        self.backend.complete_async(
+                            DEFAULT_MODEL,
+                            temperature=temperature,
+                            messages=[
+                                {"role": "system", "content": system_prompt},
+                                {"role": "user", "content": prompt}
+                            ]
+                        ),
+                        timeout=self.request_timeout
+                    ),
+                    estimated_tokens
                 )
+            except Exception as e:
+                self.metrics.record(kind, DEFAULT_MODEL, started, outcome=type(e).__name__, cache=cache)
+                raise
+        self.metrics.record(kind, DEFAULT_MODEL, started, usage=response.usage, cache=cache)
+        self._track_usage(response.usage)
+        if response.usage:
+            self.scheduler.limiter.record_usage(estimated_tokens, response.usage.total_tokens)
+        return response.choices[0].message.content
 
-                #Track token usage
-                if response.usage:
-                    self.total_prompt_tokens += response.usage.prompt_tokens
-                    self.total_completion_tokens += response.usage.completion_tokens
-                    self.total_tokens += response.usage.total_tokens
-
-                response_text = response.choices[0].message.content.strip().lower()
+    async def generate_questions(self, topic: str, num_questions: int = 5) -> List[Question]:
+        """Generate study questions for one topic, large requests run as parallel chunks"""
+        chunks = split_into_chunks(num_questions)
+        if len(chunks) <= 1:
+            return await self._generate_chunk(topic, num_questions)
+        results = await asyncio.gather(
+            *(self._generate_chunk(topic, size, part, len(chunks)) for part, size in enumerate(chunks, 1))
+        )
+        return [q for chunk in results for q in chunk]
 
-                #Check if AI responds with exactly "correct"
-                return response_text == "correct"
+    async def _generate_chunk(self, topic: str, num_questions: int, part: int = 1, parts: int = 1) -> List[Question]:
+        """Generate one chunk, retrying for whatever is still missing"""
+        questions: List[Question] = []
+        for _ in range(1 + MAX_CHUNK_RETRIES):
+            missing = num_questions - len(questions)
+            if missing <= 0:
+                break
+            try:
+                response_text = await self._complete(
+                    "generation", QUESTION_GENERATION_TEMPERATURE, GENERATION_SYSTEM_PROMPT,
+                    build_generation_prompt(topic, missing, part, parts),
+                    missing * GENERATION_TOKENS_PER_QUESTION
+                )
+                questions.extend(parse_generated_questions(response_text, topic)[:missing])
 
+            except json.JSONDecodeError as e:
+                print(f"Error parsing LLM response for '{topic}': {e}")
+            except asyncio.TimeoutError:
+                print(f"Request timed out generating questions for '{topic}'")
             except AuthenticationError as e:
                 print(f"Authentication error: Invalid API key - {e}")
-                return False
+                break
             except RateLimitError as e:
                 print(f"Rate limit exceeded: {e}")
-                return False
             except APIConnectionError as e:
                 print(f"Connection error: Unable to reach OpenAI API - {e}")
-                return False
             except APIError as e:
                 print(f"OpenAI API error: {e}")
-                return False
             except Exception as e:
-                print(f"Unexpected error evaluating answer: {e}")
-                return False
+                print(f"Unexpected error generating questions: {e}")
+                break
+        return questions
+
+    async def generate_for_topics(self, topics: List[str], num_questions: int = 5) -> Dict[str, List[Question]]:
+        """Generate questions for every topic concurrently, keyed by topic"""
+        results = await asyncio.gather(
+            *(self.generate_questions(topic, num_questions) for topic in topics)
+        )
+        return dict(zip(topics, results))
+
+    async def evaluate_answer(self, question: Question, user_answer: str) -> bool:
+        """Evaluate an answer, freeform answers are graded by the LLM"""
+        if question.type == "mcq":
+            return grade_mcq(question, user_answer)
+
+        local_verdict = pre_grade(question, user_answer)
+        if local_verdict is not None:
+            return local_verdict
+
+        started = time.perf_counter()
+        cached = self.grading_cache.get(question, user_answer)
+        if cached is not None:
+            self.metrics.record("grading", None, started, cache="hit")
+            return cached
+
+        try:
+            response_text = await self._complete(
+                "grading", ANSWER_EVALUATION_TEMPERATURE, GRADING_SYSTEM_PROMPT,
+                build_grading_prompt(question, user_answer)
+            )
+            is_correct = response_text.strip().lower() == "correct"
+            self.grading_cache.put(question, user_answer, is_correct)
+            self.grading_cache.save_if_due()
+            return is_correct
+
+        except asyncio.TimeoutError:
+            print("Request timed out evaluating answer")
+            return False
+        except AuthenticationError as e:
+            print(f"Authentication error: Invalid API key - {e}")
+            return False
+        except RateLimitError as e:
+            print(f"Rate limit exceeded: {e}")
+            return False
+        except APIConnectionError as e:
+            print(f"Connection error: Unable to reach OpenAI API - {e}")
+            return False
+        except APIError as e:
+            print(f"OpenAI API error: {e}")
+            return False
+        except Exception as e:
+            print(f"Unexpected error evaluating answer: {e}")
+            return False
+
+    async def evaluate_answers(self, answers: List[tuple]) -> List[bool]:
+        """Grade (question, answer) pairs concurrently, results keep input order"""
+        return list(await asyncio.gather(
+            *(self.evaluate_answer(question, answer) for question, answer in answers)
+        ))
 
     def get_token_usage(self) -> Dict[str, int]:
         """Get total token usage statistics"""
@@ -182,4 +802,4 @@ No explanations, no extra text."""
             "prompt_tokens": self.total_prompt_tokens,
             "completion_tokens": self.total_completion_tokens,
             "total_tokens": self.total_tokens
-        }
\ No newline at end of file
+        }
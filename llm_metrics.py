@@ -0,0 +1,166 @@
+import json
+import math
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_METRICS_FILE = "llm_calls.jsonl"
+#Recent call records kept in memory for export, older ones are only in the file
+MAX_RECENT_RECORDS = 10_000
+
+#Histogram buckets grow by 10% from 0.1 ms, percentiles are accurate to about 5%
+HISTOGRAM_MIN_MS = 0.1
+HISTOGRAM_GROWTH = 1.1
+HISTOGRAM_BUCKETS = 200         # up to roughly 19 hours
+
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram, constant memory whatever the number of calls"""
+    def __init__(self) -> None:
+        self.counts = [0] * HISTOGRAM_BUCKETS
+        self.total = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    @staticmethod
+    def _bucket(ms: float) -> int:
+        if ms <= HISTOGRAM_MIN_MS:
+            return 0
+        return min(HISTOGRAM_BUCKETS - 1, int(math.log(ms / HISTOGRAM_MIN_MS, HISTOGRAM_GROWTH)) + 1)
+
+    def add(self, ms: float) -> None:
+        self.counts[self._bucket(ms)] += 1
+        self.total += 1
+        self.sum_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, pct: float) -> float:
+        """Upper edge of the bucket holding the pct-th value, 0 when empty"""
+        if not self.total:
+            return 0.0
+        rank = max(1, math.ceil(pct / 100 * self.total))
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.max_ms, HISTOGRAM_MIN_MS * HISTOGRAM_GROWTH ** bucket)
+        return self.max_ms
+
+    def mean(self) -> float:
+        return self.sum_ms / self.total if self.total else 0.0
+
+
+class LLMMetrics:
+    """Per-call records of LLM requests with latency histograms per call kind
+
+    Every record is appended to filename as one JSON line (if set), so the
+    history survives restarts and can be analysed offline."""
+    def __init__(self, filename: Optional[str] = DEFAULT_METRICS_FILE) -> None:
+        self.filename = filename
+        self.records: deque = deque(maxlen=MAX_RECENT_RECORDS)
+        #kind -> aggregates, built incrementally so summaries cost nothing extra
+        self.kinds: Dict[str, Dict] = {}
+        self.lock = threading.Lock()
+
+    def record(self, kind: str, model: Optional[str], started: float, usage=None,
+               ttft: Optional[float] = None, outcome: str = "ok", cache: Optional[str] = None) -> Dict:
+        """Store one call, started and ttft are time.perf_counter() values"""
+        now = time.perf_counter()
+        record = {
+            "ts": time.time(),
+            "kind": kind,
+            "model": model,
+            "wall_ms": (now - started) * 1000,
+            "ttft_ms": (ttft - started) * 1000 if ttft is not None else None,
+            "prompt_tokens": usage.prompt_tokens if usage else 0,
+            "completion_tokens": usage.completion_tokens if usage else 0,
+            "outcome": outcome,
+            "cache": cache
+        }
+        with self.lock:
+            self.records.append(record)
+            self._aggregate(record)
+            if self.filename:
+                try:
+                    with open(self.filename, 'a') as file:
+                        file.write(json.dumps(record) + "\n")
+                except OSError as e:
+                    #Losing a metrics line must never fail the request itself
+                    print(f"Could not write LLM metrics: {e}")
+        return record
+
+    def _aggregate(self, record: Dict) -> None:
+        stats = self.kinds.get(record["kind"])
+        if stats is None:
+            stats = self.kinds[record["kind"]] = {
+                "calls": 0, "errors": 0, "cache_hits": 0,
+                "prompt_tokens": 0, "completion_tokens": 0,
+                "wall": LatencyHistogram(), "ttft": LatencyHistogram()
+            }
+        if record["cache"] == "hit":
+            #Answered without an API call, kept out of the latency histograms
+            stats["cache_hits"] += 1
+            return
+        stats["calls"] += 1
+        if record["outcome"] != "ok":
+            stats["errors"] += 1
+        stats["prompt_tokens"] += record["prompt_tokens"]
+        stats["completion_tokens"] += record["completion_tokens"]
+        stats["wall"].add(record["wall_ms"])
+        if record["ttft_ms"] is not None:
+            stats["ttft"].add(record["ttft_ms"])
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per call kind: API calls, errors, cache hits, tokens and p50/p95/p99 latency in milliseconds"""
+        with self.lock:
+            result = {}
+            for kind, stats in sorted(self.kinds.items()):
+                wall, ttft = stats["wall"], stats["ttft"]
+                result[kind] = {
+                    "calls": stats["calls"],
+                    "errors": stats["errors"],
+                    "cache_hits": stats["cache_hits"],
+                    "prompt_tokens": stats["prompt_tokens"],
+                    "completion_tokens": stats["completion_tokens"],
+                    "mean_ms": wall.mean(),
+                    "p50_ms": wall.percentile(50),
+                    "p95_ms": wall.percentile(95),
+                    "p99_ms": wall.percentile(99),
+                    "ttft_p50_ms": ttft.percentile(50),
+                    "ttft_p95_ms": ttft.percentile(95)
+                }
+            return result
+
+    def export_jsonl(self, filename: str) -> int:
+        """Write the records kept in memory to a JSON lines file, returns the count"""
+        with self.lock:
+            records = list(self.records)
+        with open(filename, 'w') as file:
+            for record in records:
+                file.write(json.dumps(record) + "\n")
+        return len(records)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict]) -> "LLMMetrics":
+        """Rebuild aggregates from saved records, e.g. load_records(DEFAULT_METRICS_FILE)"""
+        metrics = cls(filename=None)
+        for record in records:
+            metrics.records.append(record)
+            metrics._aggregate(record)
+        return metrics
+
+
+def load_records(filename: str = DEFAULT_METRICS_FILE) -> List[Dict]:
+    """Read a metrics file written by LLMMetrics, skipping torn lines"""
+    records = []
+    try:
+        with open(filename, 'r') as file:
+            for line in file:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return records
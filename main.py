@@ -1,13 +1,19 @@
+from typing import List, Optional
 from quiz_manager import QuizManager
-from llm_client import LLMClient
+from selection_engine import NUMPY_AVAILABLE
+from llm_client import LLMClient, GENERATION_CHUNK_SIZE
 from question import Question
-from datetime import datetime
+from question_pools import DIFFICULTY_BANDS, QUESTION_SOURCES, QUESTION_TYPES, QuizFilter
+from results_store import ResultsStore
+from datetime import date, timedelta
+import time
 
 def generate_questions_mode(quiz_manager: QuizManager, llm_client: LLMClient) -> None:
     """Generate new questions using LLM"""
     print("\n=== Generate Questions ===")
 
-    topic = input("\nWhat topic would you like to study? ").strip()
+    topic = input("\nWhat topic would you like to study? (separate several with commas) ").strip()
+    topics = [t.strip() for t in topic.split(",") if t.strip()]
 
     try:
         num_questions = int(input("How many questions? (default 5): ").strip() or "5")
@@ -15,12 +21,48 @@ def generate_questions_mode(quiz_manager: QuizManager, llm_client: LLMClient) ->
         print("Invalid number. Using 5 questions")
         num_questions = 5
 
+    if len(topics) > 1:
+        #Topics are generated concurrently, total time is close to the slowest topic
+        print(f"\nGenerating {num_questions} questions for each of {len(topics)} topics...")
+        results = llm_client.generate_questions_for_topics(topics, num_questions)
+        added_total = 0
+        for topic_name, questions in results.items():
+            added = quiz_manager.add_questions(questions)
+            added_total += len(added)
+            print(f"  {topic_name}: {len(added)} questions")
+            _report_skipped(len(questions) - len(added))
+        print(f"Generated {added_total} questions!")
+        return
+    if topics:
+        topic = topics[0]
+
     print(f"\nGenerating {num_questions} questions about {topic}...")
-    questions = llm_client.generate_questions(topic, num_questions)
-    quiz_manager.add_questions(questions)
-    print(f"Generated {len(questions)} questions!")
+    if num_questions > GENERATION_CHUNK_SIZE:
+        #Large requests run as parallel chunks instead of one long stream
+        questions = llm_client.generate_questions(topic, num_questions)
+        added = quiz_manager.add_questions(questions)
+        print(f"Generated {len(added)} questions!")
+        _report_skipped(len(questions) - len(added))
+        return
 
-def view_statistics(quiz_manager: QuizManager, llm_client: LLMClient) -> None:
+    #Each question is shown and saved as soon as it has been generated
+    count = 0
+    skipped = 0
+    for question in llm_client.stream_questions(topic, num_questions):
+        if not quiz_manager.add_questions([question]):
+            skipped += 1
+            continue
+        count += 1
+        print(f"  {count}. [{question.type.upper()}] {question.text[:70]}")
+    print(f"Generated {count} questions!")
+    _report_skipped(skipped)
+
+def _report_skipped(skipped: int) -> None:
+    """Tell the user how many generated questions were already in the bank"""
+    if skipped:
+        print(f"Skipped {skipped} near-duplicates of questions already in the bank")
+
+def view_statistics(quiz_manager: QuizManager, llm_client: LLMClient, results_store: ResultsStore) -> None:
     """Display statistics about questions"""
     print("\n=== Question Statistics ===")
 
@@ -28,27 +70,27 @@ def view_statistics(quiz_manager: QuizManager, llm_client: LLMClient) -> None:
         print("No questions available!")
         return
 
-    print(f"\nTotal questions: {len(quiz_manager.questions)}")
+    #Running aggregates kept by QuizManager, nothing is recounted here
+    overall = quiz_manager.get_overall_stats()
+    print(f"\nTotal questions: {overall['total']}")
+    print(f"Topics: {overall['topics']}")
 
-    #Group by topic
-    topics = {}
-    for q in quiz_manager.questions:
-        if q.topic not in topics:
-            topics[q.topic] = []
-        topics[q.topic].append(q)
+    for topic, stats in quiz_manager.get_topic_stats().items():
+        print(f"\n  {topic}: {stats['total']} questions ({stats['enabled']} enabled)")
 
-    print(f"Topics: {len(topics)}")
+        if stats["attempted"]:
+            print(f"    Average success rate: {stats['avg_success']:.1f}%")
+            print(f"    Questions attempted: {stats['attempted']}/{stats['total']}")
 
-    for topic, questions in topics.items():
-        enabled_count = sum(1 for q in questions if q.enabled)
-        print(f"\n  {topic}: {len(questions)} questions ({enabled_count} enabled)")
-
-        #Calculate average success rate
-        shown_questions = [q for q in questions if q.times_shown > 0]
-        if shown_questions:
-            avg_success = sum(q.get_correct_percentage() for q in shown_questions) / len(shown_questions)
-            print(f"    Average success rate: {avg_success:.1f}%")
-            print(f"    Questions attempted: {len(shown_questions)}/{len(questions)}")
+    #Daily rollups from the results history, one row per day
+    daily = results_store.daily_summary(start_day=(date.today() - timedelta(days=29)).isoformat())
+    if daily:
+        questions = sum(d["questions"] for d in daily)
+        avg_score = sum(d["score_pct"] * d["questions"] for d in daily) / questions if questions else 0.0
+        print("\n=== Last 30 Days ===")
+        print(f"Quizzes: {sum(d['tests'] for d in daily)} | Questions answered: {questions} | Average score: {avg_score:.1f}%")
+        for d in daily[-7:]:
+            print(f"  {d['day']}: {d['tests']} quizzes, {d['score_pct']:.0f}%")
 
     #Display token usage
     token_usage = llm_client.get_token_usage()
@@ -57,13 +99,54 @@ def view_statistics(quiz_manager: QuizManager, llm_client: LLMClient) -> None:
     print(f"Completion tokens: {token_usage['completion_tokens']}")
     print(f"Total tokens: {token_usage['total_tokens']}")
 
-def run_quiz(quiz_manager: QuizManager, llm_client: LLMClient, mode: str) -> None:
+    grading = llm_client.get_grading_stats()
+    print("\n=== Freeform Grading ===")
+    print(f"Graded locally: {grading['local']} | Cache hits: {grading['cached']} | API calls: {grading['api']}")
+    print(f"API calls avoided: {grading['avoided_pct']:.1f}%")
+
+    calls = llm_client.get_call_stats()
+    if calls:
+        print("\n=== API Call Latency (ms) ===")
+        for kind, stats in calls.items():
+            print(f"{kind}: {stats['calls']} calls, {stats['errors']} errors, {stats['cache_hits']} cache hits | "
+                  f"p50 {stats['p50_ms']:.0f} p95 {stats['p95_ms']:.0f} p99 {stats['p99_ms']:.0f} | "
+                  f"{stats['prompt_tokens'] + stats['completion_tokens']} tokens")
+
+    scheduler = llm_client.get_scheduler_stats()
+    print("\n=== API Requests ===")
+    print(f"Retried requests: {scheduler['retries']} | Waited for rate limit: {scheduler['throttled_seconds']:.1f}s")
+
+def _ask_values(prompt: str, allowed: List[str]) -> List[str]:
+    """Comma separated choices, unknown ones are reported and ignored"""
+    answer = input(f"{prompt} ({', '.join(allowed)}; enter for any): ").strip()
+    values = [value.strip() for value in answer.split(",") if value.strip()]
+    unknown = [value for value in values if value not in allowed]
+    if unknown:
+        print(f"Ignoring unknown value(s): {', '.join(unknown)}")
+    return [value for value in values if value in allowed]
+
+def ask_quiz_filter(quiz_manager: QuizManager) -> Optional[QuizFilter]:
+    """Optionally restrict a session by topic, type, source and difficulty"""
+    if input("\nFocus on some questions only? (y/n, default n): ").strip().lower() != "y":
+        return None
+    quiz_filter = QuizFilter(
+        topics=_ask_values("Topics", quiz_manager.get_topics()),
+        types=_ask_values("Types", list(QUESTION_TYPES)),
+        sources=_ask_values("Sources", list(QUESTION_SOURCES)),
+        difficulties=_ask_values("Difficulty", list(DIFFICULTY_BANDS))
+    )
+    print(f"{quiz_manager.count_matching(quiz_filter)} enabled questions match: {quiz_filter.describe()}")
+    return quiz_filter
+
+def run_quiz(quiz_manager: QuizManager, llm_client: LLMClient, results_store: ResultsStore, mode: str) -> None:
     """Run a quiz session (shared by practice and test modes)"""
 
     if not quiz_manager.questions:
         print("\nNo questions available! Please generate questions first.")
         return
 
+    quiz_filter = ask_quiz_filter(quiz_manager)
+
     try:
         num_questions = int(input("\nHow many questions? (default 5): ").strip() or "5")
     except ValueError:
@@ -72,13 +155,15 @@ def run_quiz(quiz_manager: QuizManager, llm_client: LLMClient, mode: str) -> Non
 
     print("\nLet's start the quiz!\n")
     score = 0
+    outcomes = []
+    started = time.time()
 
     for i in range(num_questions):
         #Select question based on mode
         if mode == "practice":
-            question = quiz_manager.selecting_weighted_question()
+            question = quiz_manager.selecting_weighted_question(quiz_filter)
         else:
-            question = quiz_manager.select_question_random()
+            question = quiz_manager.select_question_random(quiz_filter)
 
         if not question:
             print("No more questions available!")
@@ -94,14 +179,16 @@ def run_quiz(quiz_manager: QuizManager, llm_client: LLMClient, mode: str) -> Non
                 print(f" {idx}. {option}")
 
         #Get user answer
+        shown_at = time.perf_counter()
         user_answer = input("Your answer: ").strip()
+        latency = time.perf_counter() - shown_at
 
         #Evaluate answer
         is_correct = llm_client.evaluate_answer(question, user_answer)
 
         #Record attempt
-        question.record_attempt(is_correct)
-        quiz_manager.save_questions()
+        quiz_manager.record_attempt(question, is_correct)
+        outcomes.append((question, is_correct, latency))
 
         #Show feedback
         if is_correct:
@@ -115,13 +202,16 @@ def run_quiz(quiz_manager: QuizManager, llm_client: LLMClient, mode: str) -> Non
     print(f"Quiz complete! You scored {score}/{num_questions}")
     print(f"{'='*50}")
 
-def practice_mode(quiz_manager: QuizManager, llm_client: LLMClient) -> None:
+    if outcomes:
+        results_store.record_test(mode, outcomes, taken_at=started, duration=time.time() - started)
+
+def practice_mode(quiz_manager: QuizManager, llm_client: LLMClient, results_store: ResultsStore) -> None:
     """Practice mode with weighted question selection"""
     print("\n=== Practice Mode ===")
-    print("(Focuses on difficult questions)")
-    run_quiz(quiz_manager, llm_client, "practice")
+    print("(Questions due for review first, then difficult ones)")
+    run_quiz(quiz_manager, llm_client, results_store, "practice")
 
-def test_mode(quiz_manager: QuizManager, llm_client: LLMClient) -> None:
+def test_mode(quiz_manager: QuizManager, llm_client: LLMClient, results_store: ResultsStore) -> None:
     """Test mode with unique random questions and results logging"""
     print("\n=== Test Mode ===")
     print("(Random questions, no repetition)")
@@ -130,6 +220,8 @@ def test_mode(quiz_manager: QuizManager, llm_client: LLMClient) -> None:
         print("\nNo questions available! Please generate questions first.")
         return
 
+    quiz_filter = ask_quiz_filter(quiz_manager)
+
     try:
         num_questions = int(input("\nHow many questions? (default 5): ").strip() or "5")
     except ValueError:
@@ -137,7 +229,7 @@ def test_mode(quiz_manager: QuizManager, llm_client: LLMClient) -> None:
         num_questions = 5
 
     #Select unique random questions (no repetition)
-    questions = quiz_manager.select_unique_random_questions(num_questions)
+    questions = quiz_manager.select_unique_random_questions(num_questions, quiz_filter)
 
     if not questions:
         print("\nNo enabled questions available!")
@@ -147,8 +239,15 @@ def test_mode(quiz_manager: QuizManager, llm_client: LLMClient) -> None:
     if actual_count < num_questions:
         print(f"\nOnly {actual_count} questions available (requested {num_questions})")
 
+    #Deferred feedback grades every answer in one batch at the end
+    deferred = input("Show feedback only at the end? (y/n, default y): ").strip().lower() != "n"
+
     print(f"\nLet's start the test with {actual_count} questions!\n")
     score = 0
+    answers = []
+    latencies = []
+    outcomes = []
+    started = time.time()
 
     #Loop through pre-selected questions
     for i, question in enumerate(questions, 1):
@@ -162,14 +261,21 @@ def test_mode(quiz_manager: QuizManager, llm_client: LLMClient) -> None:
                 print(f" {idx}. {option}")
 
         #Get user answer
+        shown_at = time.perf_counter()
         user_answer = input("Your answer: ").strip()
+        latency = time.perf_counter() - shown_at
+
+        if deferred:
+            answers.append((question, user_answer))
+            latencies.append(latency)
+            continue
 
         #Evaluate answer
         is_correct = llm_client.evaluate_answer(question, user_answer)
 
         #Record attempt
-        question.record_attempt(is_correct)
-        quiz_manager.save_questions()
+        quiz_manager.record_attempt(question, is_correct)
+        outcomes.append((question, is_correct, latency))
 
         #Show feedback
         if is_correct:
@@ -178,16 +284,28 @@ def test_mode(quiz_manager: QuizManager, llm_client: LLMClient) -> None:
         else:
             print(f"Incorrect. Correct answer is: {question.correct_answer}")
 
+    if deferred:
+        print("\nGrading your answers...")
+        results = llm_client.evaluate_answers(answers)
+        for i, ((question, user_answer), is_correct, latency) in enumerate(zip(answers, results, latencies), 1):
+            quiz_manager.record_attempt(question, is_correct)
+            outcomes.append((question, is_correct, latency))
+            if is_correct:
+                score += 1
+                print(f"\n{i}. Correct! {question.text[:70]}")
+            else:
+                print(f"\n{i}. Incorrect. {question.text[:70]}")
+                print(f"   Your answer: {user_answer}")
+                print(f"   Correct answer is: {question.correct_answer}")
+
     #Final results
     print(f"\n{'='*50}")
     print(f"Test complete! You scored {score}/{actual_count}")
     print(f"{'='*50}")
 
-    #Log results to file with timestamp
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    with open("results.txt", "a") as f:
-        f.write(f"{timestamp} - Score: {score}/{actual_count}\n")
-    print("\nResults saved to results.txt")
+    #Per-question outcomes go to the indexed results history
+    results_store.record_test("test", outcomes, taken_at=started, duration=time.time() - started)
+    print(f"\nResults saved to {results_store.filename}")
 
 def manage_questions(quiz_manager: QuizManager) -> None:
     """Manage questions (enable/disable/list)"""
@@ -200,7 +318,8 @@ def manage_questions(quiz_manager: QuizManager) -> None:
     while True:
         print("\n1. List all questions")
         print("2. Enable/Disable question by ID")
-        print("3. Back to main menu")
+        print("3. Find and disable near-duplicates")
+        print("4. Back to main menu")
 
         choice = input("\nEnter choice: ").strip()
 
@@ -242,14 +361,31 @@ def manage_questions(quiz_manager: QuizManager) -> None:
             confirm = input(f"\nDo you want to {action} this question? (y/n): ").strip().lower()
 
             if confirm == 'y':
-                question.enabled = not question.enabled
-                quiz_manager.save_questions()
+                quiz_manager.set_enabled(question, not question.enabled)
                 new_status = "enabled" if question.enabled else "disabled"
                 print(f"\nQuestion {new_status}!")
             else:
                 print("\nAction cancelled.")
 
         elif choice == "3":
+            # Near-duplicates among enabled questions, the first added copy is kept
+            pairs = quiz_manager.find_near_duplicates()
+            if not pairs:
+                print("\nNo near-duplicates found.")
+                continue
+
+            for kept, duplicate in pairs:
+                print(f"\n[{duplicate.topic}] {duplicate.text[:80]}")
+                print(f"    duplicates: {kept.text[:80]}")
+
+            confirm = input(f"\nDisable these {len(pairs)} duplicates? (y/n): ").strip().lower()
+            if confirm == 'y':
+                disabled = quiz_manager.disable_near_duplicates()
+                print(f"\n{len(disabled)} questions disabled!")
+            else:
+                print("\nAction cancelled.")
+
+        elif choice == "4":
             break
         else:
             print("Invalid choice!")
@@ -257,8 +393,12 @@ def manage_questions(quiz_manager: QuizManager) -> None:
 def main():
     print("=== AI Learning Companion ===")
 
-    quiz_manager = QuizManager()
+    #Lazy loading keeps startup fast, question text is read when a question is shown
+    quiz_manager = QuizManager(lazy=True, vectorized=NUMPY_AVAILABLE)
     llm_client = LLMClient()
+    results_store = ResultsStore()
+    #Scores logged to results.txt by earlier versions become part of the history
+    results_store.import_legacy_results()
 
     print("Welcome to your personal study quiz!")
 
@@ -278,14 +418,17 @@ def main():
         if choice == "1":
             generate_questions_mode(quiz_manager, llm_client)
         elif choice == "2":
-            view_statistics(quiz_manager, llm_client)
+            view_statistics(quiz_manager, llm_client, results_store)
         elif choice == "3":
-            practice_mode(quiz_manager, llm_client)
+            practice_mode(quiz_manager, llm_client, results_store)
         elif choice == "4":
-            test_mode(quiz_manager, llm_client)
+            test_mode(quiz_manager, llm_client, results_store)
         elif choice == "5":
             manage_questions(quiz_manager)
         elif choice == "6":
+            quiz_manager.flush()
+            llm_client.grading_cache.save()
+            results_store.close()
             print("\nThank you for using AI Learning Companion!")
             break
         else:
@@ -0,0 +1,131 @@
+from difflib import SequenceMatcher
+from typing import List, Optional
+from question import Question
+from grading_cache import normalize_answer
+
+#Answers the grading prompt always marks incorrect (rule 1). Words that can
+#be real answers ("Na" for sodium, "None", "pass") are left to the LLM
+NON_ANSWERS = {
+    "", "idk", "i dont know", "dont know", "i do not know", "do not know",
+    "not sure", "im not sure", "i am not sure", "no idea", "i have no idea",
+    "no clue", "skip", "n a", "dunno"
+}
+
+#Words that flip meaning, answers differing in these always go to the LLM
+NEGATIONS = {"not", "no", "never", "without", "cannot", "cant", "isnt", "doesnt", "dont", "wont"}
+
+STOP_WORDS = {"a", "an", "the", "of", "and", "in", "on", "for", "to", "is", "are", "was", "by", "at"}
+
+ROMAN_NUMERALS = {"i": "1", "ii": "2", "iii": "3", "iv": "4", "v": "5",
+                  "vi": "6", "vii": "7", "viii": "8", "ix": "9", "x": "10"}
+
+NUMBER_WORDS = {"one": "1", "two": "2", "three": "3", "four": "4", "five": "5",
+                "six": "6", "seven": "7", "eight": "8", "nine": "9", "ten": "10",
+                "first": "1", "second": "2", "third": "3"}
+
+#Thresholds are strict on purpose, anything below them is escalated
+TOKEN_OVERLAP_THRESHOLD = 0.9
+MIN_TYPO_TOKEN_LENGTH = 5  # "cat" vs "car" is a different word, not a typo
+MAX_FUZZY_LENGTH = 60  # longer answers are too nuanced for string matching
+
+
+def _tokens(text: str) -> List[str]:
+    """Normalized tokens with numerals unified ("World War II", "two" -> "2")
+
+    Roman numerals are only read as numbers after a word ("Henry VIII"),
+    a lone "I" or "x" stays a word."""
+    tokens = []
+    previous = None
+    for token in normalize_answer(text).split():
+        if previous is not None and previous.isalpha() and previous not in STOP_WORDS:
+            token = ROMAN_NUMERALS.get(token, token)
+        previous = token
+        tokens.append(NUMBER_WORDS.get(token, token))
+    return tokens
+
+
+def _initialisms(tokens: List[str]) -> set:
+    """Abbreviations a phrase is commonly written as, e.g. WW2, USA"""
+    def build(words: List[str]) -> str:
+        return "".join(w if w.isdigit() else w[0] for w in words)
+    forms = {build(tokens)}
+    content = [t for t in tokens if t not in STOP_WORDS]
+    if content:
+        forms.add(build(content))
+    return {f for f in forms if len(f) >= 2}
+
+
+def _is_abbreviation(short: List[str], long: List[str]) -> bool:
+    if len(short) != 1 or len(long) < 2:
+        return False
+    #"ww2" and "wwii" both compare against the digit form
+    compact = short[0]
+    #Longest suffix first, "wwiii" must not be read as "wwi" + "ii"
+    for roman, digit in sorted(ROMAN_NUMERALS.items(), key=lambda item: -len(item[0])):
+        if compact.endswith(roman) and len(compact) > len(roman) and roman != "i":
+            compact = compact[:-len(roman)] + digit
+            break
+    return compact in _initialisms(long) or short[0] in _initialisms(long)
+
+
+def _is_typo(word: str, target: str) -> bool:
+    """One missing, extra or swapped letter; substitutions are not accepted
+    because they often form a different word (nitrate/nitrite)"""
+    if word == target:
+        return True
+    if min(len(word), len(target)) < MIN_TYPO_TOKEN_LENGTH or word.isdigit() or target.isdigit():
+        return False
+    if len(word) == len(target):
+        diffs = [i for i in range(len(word)) if word[i] != target[i]]
+        return (len(diffs) == 2 and diffs[1] == diffs[0] + 1
+                and word[diffs[0]] == target[diffs[1]] and word[diffs[1]] == target[diffs[0]])
+    if abs(len(word) - len(target)) != 1:
+        return False
+    shorter, longer = sorted((word, target), key=len)
+    for i in range(len(longer)):
+        if longer[:i] + longer[i + 1:] == shorter:
+            return True
+    return False
+
+
+def pre_grade(question: Question, user_answer: str) -> Optional[bool]:
+    """Grade obvious freeform answers locally
+
+    Returns True/False when the verdict is certain, or None when the
+    answer is ambiguous and has to be graded by the LLM."""
+    answer = normalize_answer(user_answer)
+    reference = normalize_answer(question.correct_answer)
+    answer_tokens = _tokens(user_answer)
+    reference_tokens = _tokens(question.correct_answer)
+    #An exact match wins even if the answer looks like a non-answer ("N/A")
+    if answer == reference or answer_tokens == reference_tokens:
+        return True
+
+    if answer in NON_ANSWERS:
+        return False
+
+    #Only the answer may abbreviate the reference, "Richard Avedon" is not "Ra"
+    if _is_abbreviation(answer_tokens, reference_tokens):
+        return True
+
+    if len(answer) > MAX_FUZZY_LENGTH or len(reference) > MAX_FUZZY_LENGTH:
+        return None
+    if (NEGATIONS & set(answer_tokens)) != (NEGATIONS & set(reference_tokens)):
+        return None
+
+    #Word order matters ("Sun orbits the Earth" is not "Earth orbits the Sun"),
+    #so the content words are compared as sequences, not sets
+    answer_words = [t for t in answer_tokens if t not in STOP_WORDS]
+    reference_words = [t for t in reference_tokens if t not in STOP_WORDS]
+    if answer_words and reference_words and \
+            SequenceMatcher(None, answer_words, reference_words).ratio() >= TOKEN_OVERLAP_THRESHOLD:
+        return True
+
+    #Small typos, e.g. "Treaty of Versailes". A single word one letter away is
+    #often a different word (dessert/desert), so at least one other word must match
+    if len(answer_words) >= 2 and len(answer_words) == len(reference_words) and \
+            any(a == r for a, r in zip(answer_words, reference_words)):
+        if all(_is_typo(a, r) for a, r in zip(answer_words, reference_words)):
+            return True
+
+    return None
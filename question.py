@@ -1,9 +1,18 @@
 from typing import Dict, List, Optional
+import sys
 import uuid # Generates unique ID for each question
 
+#Starting ease factor of the spaced repetition schedule (SM-2)
+DEFAULT_EASE = 2.5
+
 #Blueprint for creating question objects
 class Question:
     """Study question with performance tracking"""
+    #No per-instance __dict__, keeps large banks small in memory
+    __slots__ = ("enabled", "times_shown", "times_correct", "topic", "text", "type",
+                 "correct_answer", "options", "source", "id",
+                 "interval", "ease", "repetitions", "due")
+
     def __init__(self, topic: str, text: str, question_type: str, correct_answer: str,
                  options: Optional[List[str]] = None, source: str = "manual", 
                  question_id: Optional[str] = None) -> None:
@@ -11,12 +20,19 @@ class Question:
         self.enabled = True 
         self.times_shown = 0
         self.times_correct = 0 
-        self.topic = topic  #Store question data 
+        #Review schedule: days until the next review, ease factor, correct
+        #answers in a row and due time (unix seconds, 0 = never reviewed)
+        self.interval = 0.0
+        self.ease = DEFAULT_EASE
+        self.repetitions = 0
+        self.due = 0.0
+        #Topic, type and source repeat across the bank, interning shares one string object
+        self.topic = sys.intern(topic)  #Store question data 
         self.text = text
-        self.type = question_type
+        self.type = sys.intern(question_type)
         self.correct_answer = correct_answer
         self.options = options
-        self.source = source
+        self.source = sys.intern(source)
         #If no ID is provided, generate unique one
         self.id = question_id if question_id else str(uuid.uuid4())
         
@@ -46,7 +62,11 @@ class Question:
                 "source": self.source,
                 "enabled": self.enabled,
                 "times_shown": self.times_shown,
-                "times_correct": self.times_correct
+                "times_correct": self.times_correct,
+                "interval": self.interval,
+                "ease": self.ease,
+                "repetitions": self.repetitions,
+                "due": self.due
                 }
              
     @classmethod
@@ -70,8 +90,20 @@ class Question:
         question.enabled = data.get("enabled", True)
         question.times_shown = data.get("times_shown", 0)
         question.times_correct = data.get("times_correct", 0)
+        question.set_schedule(data)
     
-        return question       
+        return question
+
+    def set_schedule(self, data: Dict) -> None:
+        """Review schedule from a dictionary (to_dict or a journal record)"""
+        self.interval = data.get("interval", 0.0)
+        self.ease = data.get("ease", DEFAULT_EASE)
+        self.repetitions = data.get("repetitions", 0)
+        self.due = data.get("due", 0.0)
+
+    def schedule_dict(self) -> Dict:
+        return {"interval": self.interval, "ease": self.ease,
+                "repetitions": self.repetitions, "due": self.due}       
     
     
     
\ No newline at end of file
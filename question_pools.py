@@ -0,0 +1,126 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+from question import Question
+from spaced_repetition import DueQueue
+from weighted_sampler import WeightedSampler
+
+QUESTION_TYPES = ("mcq", "freeform")
+QUESTION_SOURCES = ("generated", "manual")
+#Difficulty bands by correct percentage: new (never shown), hard below
+#HARD_BELOW %, easy from EASY_FROM %, medium in between
+DIFFICULTY_BANDS = ("new", "hard", "medium", "easy")
+HARD_BELOW = 50
+EASY_FROM = 80
+
+
+def difficulty_band(question: Question) -> str:
+    """Difficulty band of a question from its attempt counters"""
+    shown, correct = question.times_shown, question.times_correct
+    if shown == 0:
+        return "new"
+    #Integer comparisons, the NumPy engine uses the same ones on its arrays
+    if 100 * correct < HARD_BELOW * shown:
+        return "hard"
+    if 100 * correct >= EASY_FROM * shown:
+        return "easy"
+    return "medium"
+
+
+def _value_set(values: Optional[Iterable[str]]) -> Optional[Tuple[str, ...]]:
+    return tuple(sorted(set(values))) if values else None
+
+
+class QuizFilter:
+    """Which questions a quiz session draws from, None (or empty) means any
+
+    topics, types, sources and difficulties are each a set of allowed
+    values. Two filters with the same values have the same key, so
+    sessions with the same filter share one candidate pool."""
+    __slots__ = ("topics", "types", "sources", "difficulties")
+
+    def __init__(self, topics: Optional[Iterable[str]] = None, types: Optional[Iterable[str]] = None,
+                 sources: Optional[Iterable[str]] = None,
+                 difficulties: Optional[Iterable[str]] = None) -> None:
+        self.topics = _value_set(topics)
+        self.types = _value_set(types)
+        self.sources = _value_set(sources)
+        self.difficulties = _value_set(difficulties)
+        unknown = set(self.difficulties or ()) - set(DIFFICULTY_BANDS)
+        if unknown:
+            raise ValueError(f"Unknown difficulty band(s): {', '.join(sorted(unknown))}")
+
+    @property
+    def key(self) -> Tuple:
+        return (self.topics, self.types, self.sources, self.difficulties)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, QuizFilter) and self.key == other.key
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    def is_empty(self) -> bool:
+        return self.key == (None, None, None, None)
+
+    def matches(self, question: Question) -> bool:
+        """True if the question passes every filter, enabled is checked by the caller"""
+        return ((self.topics is None or question.topic in self.topics)
+                and (self.types is None or question.type in self.types)
+                and (self.sources is None or question.source in self.sources)
+                and (self.difficulties is None or difficulty_band(question) in self.difficulties))
+
+    def describe(self) -> str:
+        """Short human readable summary, e.g. "Math, History | mcq | hard" """
+        parts = [", ".join(values) for values in self.key if values]
+        return " | ".join(parts) if parts else "All questions"
+
+
+class QuestionPool:
+    """Enabled questions matching one QuizFilter, with their own selection indexes
+
+    Holds the same structures QuizManager keeps for the whole bank (a list
+    for uniform draws, a weighted sampler and a due queue), restricted to
+    the filter. QuizManager builds a pool once and then updates it on
+    every change to a question, O(log n) per pool, so selecting from a
+    filtered session never scans the bank."""
+    def __init__(self, quiz_filter: QuizFilter) -> None:
+        self.filter = quiz_filter
+        self.members: List[Question] = []
+        self._positions: Dict[str, int] = {}
+        self.sampler = WeightedSampler()
+        self.due_queue = DueQueue()
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def __contains__(self, question: Question) -> bool:
+        return question.id in self._positions
+
+    def extend(self, entries: List[Tuple[Question, float]]) -> None:
+        """Bulk load (question, practice weight) pairs that match the filter"""
+        entries = [(q, weight) for q, weight in entries if q.id not in self._positions]
+        for question, _ in entries:
+            self._positions[question.id] = len(self.members)
+            self.members.append(question)
+        self.sampler.extend([(q.id, q, weight) for q, weight in entries])
+        self.due_queue.extend(q for q, _ in entries)
+
+    def update(self, question: Question, weight: float) -> None:
+        """Add, refresh or drop a question after it changed"""
+        if question.enabled and self.filter.matches(question):
+            if question.id not in self._positions:
+                self._positions[question.id] = len(self.members)
+                self.members.append(question)
+            self.sampler.set(question.id, question, weight)
+            self.due_queue.push(question)
+        elif question.id in self._positions:
+            self._remove(question)
+
+    def _remove(self, question: Question) -> None:
+        #Swap-remove like QuizManager's enabled list, weight 0 keeps it out of the sampler
+        position = self._positions.pop(question.id)
+        last = self.members.pop()
+        if last.id != question.id:
+            self.members[position] = last
+            self._positions[last.id] = position
+        self.sampler.set(question.id, question, 0.0)
+        self.due_queue.discard(question)
@@ -1,78 +1,404 @@
-import json
 import random
-from typing import List, Optional
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 from question import Question
+from duplicate_index import DuplicateIndex
+from storage import QuestionStorage, JSONStorage, SQLiteStorage, apply_record
+from weighted_sampler import WeightedSampler
+from spaced_repetition import DueQueue, schedule_review
+from topic_stats import TopicStats
+from selection_engine import NumpySelectionEngine
+from question_pools import QuestionPool, QuizFilter
+
+#Background compaction waits this long after the last change
+SAVE_DEBOUNCE_SECONDS = 2.0
+#...but is never postponed longer than this during continuous activity
+SAVE_MAX_DELAY_SECONDS = 30.0
+#Candidate pools kept for filtered sessions, least recently used ones are dropped
+MAX_POOLS = 8
 
 class QuizManager:
     """Manages questions, flow, quiz session"""
-    def __init__(self, filename: str = "questions.json") -> None:
+    def __init__(self, filename: str = "questions.json",
+                 storage: Optional[QuestionStorage] = None, lazy: bool = False,
+                 save_delay: float = SAVE_DEBOUNCE_SECONDS, vectorized: bool = False) -> None:
         self.filename = filename
         self.questions: List[Question] = []
+        #Pick backend from the file extension unless one is given
+        if storage is None:
+            if filename.endswith((".db", ".sqlite", ".sqlite3")):
+                storage = SQLiteStorage(filename)
+            else:
+                storage = JSONStorage(filename, lazy=lazy)
+        self.storage = storage
+        #Practice mode weights, updated incrementally on every change
+        self.sampler = WeightedSampler()
+        #Enabled questions by next review time, practice serves due ones first
+        self.due_queue = DueQueue()
+        #Optional NumPy mirror of the bank that builds filtered pools (needs numpy)
+        self.engine: Optional[NumpySelectionEngine] = NumpySelectionEngine() if vectorized else None
+        #Indexes kept in sync by load, add and set_enabled
+        self._by_id: Dict[str, Question] = {}
+        self._by_topic: Dict[str, Dict[str, Question]] = {}
+        self._enabled: List[Question] = []
+        self._enabled_pos: Dict[str, int] = {}
+        #Statistics per topic and for the whole bank, updated on every change
+        self._topic_stats: Dict[str, TopicStats] = {}
+        self._totals = TopicStats()
+        #Near-duplicate indexes per topic, built the first time a topic gets new questions
+        self._duplicates: Dict[str, DuplicateIndex] = {}
+        #Candidate pools of filtered quiz sessions by filter key, updated like the sampler
+        self._pools: "OrderedDict[Tuple, QuestionPool]" = OrderedDict()
+        #Guards questions, indexes and the sampler. One manager can be shared by
+        #every Streamlit session of a process, so the lock is only held for the
+        #in-memory update plus one journal append, never for a full file write
+        self.lock = threading.RLock()
+        self.save_delay = save_delay
+        self._save_timer: Optional[threading.Timer] = None
+        self._dirty_since: Optional[float] = None
         self.load_questions()
         
     def load_questions(self) -> None:
-        """Loading questions from JSON"""
-        try:
-            with open(self.filename,'r') as file:   
-                data = json.load(file)              
-                for q_dict in data:                
-                    question = Question.from_dict(q_dict)
-                    self.questions.append(question)        
-        except FileNotFoundError:
-            pass 
+        """Loading questions from storage"""
+        loaded = self.storage.load()
+        self.questions.extend(loaded)
+        for question in loaded:
+            self._index_question(question)
+        self.sampler.extend([(q.id, q, self._practice_weight(q)) for q in loaded])
+        if self.engine is not None:
+            self.engine.extend(loaded)
+
+    def _index_question(self, question: Question) -> None:
+        self._by_id[question.id] = question
+        self._by_topic.setdefault(question.topic, {})[question.id] = question
+        self._index_enabled(question)
+        self._count(question)
+        duplicates = self._duplicates.get(question.topic)
+        if duplicates is not None:
+            duplicates.add(question)
+
+    def _duplicate_index(self, topic: str) -> DuplicateIndex:
+        index = self._duplicates.get(topic)
+        if index is None:
+            index = self._duplicates[topic] = DuplicateIndex()
+            for question in self._by_topic.get(topic, {}).values():
+                index.add(question)
+        return index
+
+    def _count(self, question: Question, sign: int = 1) -> None:
+        """Add (or with sign=-1 remove) a question's share of the statistics"""
+        stats = self._topic_stats.get(question.topic)
+        if stats is None:
+            stats = self._topic_stats[question.topic] = TopicStats()
+        stats.add(question, sign)
+        self._totals.add(question, sign)
+
+    def _index_enabled(self, question: Question) -> None:
+        """Keep the enabled list and due queue in sync, swap-remove keeps the list O(1)"""
+        if question.enabled:
+            self.due_queue.push(question)
+        else:
+            self.due_queue.discard(question)
+        position = self._enabled_pos.get(question.id)
+        if question.enabled and position is None:
+            self._enabled_pos[question.id] = len(self._enabled)
+            self._enabled.append(question)
+        elif not question.enabled and position is not None:
+            last = self._enabled.pop()
+            if last.id != question.id:
+                self._enabled[position] = last
+                self._enabled_pos[last.id] = position
+            del self._enabled_pos[question.id]
+
+    @staticmethod
+    def _practice_weight(question: Question) -> float:
+        """Weight formula: 100 - correct %, disabled questions and scheduled ones not yet due get 0"""
+        # 20% correct = 80 weight (high priority)
+        # Never shown - 100 weight (high priority)
+        if not question.enabled:
+            return 0.0
+        #A question answered a moment ago waits for its review date, the due
+        #queue hands it back then and _restore_due puts its weight back
+        if question.due > time.time():
+            return 0.0
+        return 100 - question.get_correct_percentage()
+
+    def _restore_due(self, questions: List[Question]) -> None:
+        """Give questions the due queue reports as due their practice weight again"""
+        for question in questions:
+            if self.sampler.get_weight(question.id) == 0.0 and self._practice_weight(question) > 0:
+                self._update_weight(question)
+
+    def _update_weight(self, question: Question) -> None:
+        weight = self._practice_weight(question)
+        self.sampler.set(question.id, question, weight)
+        if self.engine is not None:
+            self.engine.update(question)
+        #A question can enter or leave a pool (enabled, difficulty band), O(log n) per pool
+        for pool in self._pools.values():
+            pool.update(question, weight)
+
+    def _pool(self, quiz_filter: QuizFilter) -> QuestionPool:
+        """Candidate pool of a filter, built on first use and kept up to date afterwards"""
+        pool = self._pools.get(quiz_filter.key)
+        if pool is not None:
+            self._pools.move_to_end(quiz_filter.key)
+            return pool
+        pool = QuestionPool(quiz_filter)
+        pool.extend([(q, self._practice_weight(q)) for q in self._filter_candidates(quiz_filter)])
+        self._pools[quiz_filter.key] = pool
+        if len(self._pools) > MAX_POOLS:
+            self._pools.popitem(last=False)
+        return pool
+
+    def _filter_candidates(self, quiz_filter: QuizFilter) -> List[Question]:
+        """Enabled questions matching a filter, only the chosen topics are scanned"""
+        if self.engine is not None:
+            return self.engine.matching(quiz_filter)
+        if quiz_filter.topics is None:
+            candidates = self._enabled
+        else:
+            candidates = [q for topic in quiz_filter.topics for q in self._by_topic.get(topic, {}).values()]
+        return [q for q in candidates if q.enabled and quiz_filter.matches(q)]
+
+    def _selection_indexes(self, quiz_filter: Optional[QuizFilter]) -> Tuple[DueQueue, WeightedSampler, List[Question]]:
+        """Due queue, sampler and enabled list of the whole bank or of a filter's pool"""
+        if quiz_filter is None or quiz_filter.is_empty():
+            return self.due_queue, self.sampler, self._enabled
+        pool = self._pool(quiz_filter)
+        return pool.due_queue, pool.sampler, pool.members
+
+    def count_matching(self, quiz_filter: Optional[QuizFilter] = None) -> int:
+        """Enabled questions a session with this filter can draw from"""
+        with self.lock:
+            return len(self._selection_indexes(quiz_filter)[2])
             
     def save_questions(self) -> None:
-        """Save questions to JSON file"""
-        data = []
-        for question in self.questions: 
-            data.append(question.to_dict())
-            
-        with open(self.filename, 'w') as file:
-            json.dump(data, file, indent=4)
+        """Save all questions to storage"""
+        with self.lock:
+            self.storage.save(self.questions)
+
+    def record_attempt(self, question: Question, was_correct: bool) -> None:
+        """Update question statistics and review schedule, persist only that attempt"""
+        with self.lock:
+            self._count(question, -1)
+            question.record_attempt(was_correct)
+            schedule_review(question, was_correct)
+            self._count(question)
+            self._update_weight(question)
+            if question.enabled:
+                self.due_queue.push(question)
+            self.storage.record_attempt(question, was_correct)
+        self._after_change()
+
+    def set_enabled(self, question: Question, enabled: bool) -> None:
+        """Enable or disable a question and persist only that change"""
+        with self.lock:
+            self._count(question, -1)
+            question.enabled = enabled
+            self._count(question)
+            self._index_enabled(question)
+            self._update_weight(question)
+            self.storage.set_enabled(question)
+        self._after_change()
+
+    def compact(self) -> None:
+        """Fold pending journal records back into the main store
+
+        Runs without holding the manager lock, answers keep being recorded
+        while the snapshot is written. Changes other processes made to the
+        same bank are merged into memory afterwards."""
+        merged = self.storage.compact()
+        if merged is None:
+            return
+        with self.lock:
+            #Our own changes made while the snapshot was written are not in it yet
+            by_id = {q_dict["id"]: q_dict for q_dict in merged}
+            for record in self.storage.pending_records():
+                apply_record(record, by_id, merged, make_question=dict)
+            for q_dict in merged:
+                self._merge_question(q_dict)
+
+    def _merge_question(self, data: Dict) -> None:
+        """Bring one question in line with the merged bank"""
+        question = self._by_id.get(data["id"])
+        if question is None:
+            question = Question.from_dict(data)
+            self.questions.append(question)
+            self._index_question(question)
+        elif (question.times_shown, question.times_correct, question.enabled, question.due) == \
+                (data.get("times_shown", 0), data.get("times_correct", 0), data.get("enabled", True),
+                 data.get("due", 0.0)):
+            return
+        else:
+            self._count(question, -1)
+            question.times_shown = data.get("times_shown", 0)
+            question.times_correct = data.get("times_correct", 0)
+            question.enabled = data.get("enabled", True)
+            question.set_schedule(data)
+            self._count(question)
+            self._index_enabled(question)
+        self._update_weight(question)
+
+    def _after_change(self) -> None:
+        """Schedule one debounced background compaction for a burst of changes"""
+        if not self.storage.needs_compaction():
+            return
+        with self.lock:
+            now = time.monotonic()
+            if self._dirty_since is None:
+                self._dirty_since = now
+            if self._save_timer is not None:
+                #Keep the running timer once the maximum delay is reached
+                if now - self._dirty_since >= SAVE_MAX_DELAY_SECONDS:
+                    return
+                self._save_timer.cancel()
+            self._save_timer = threading.Timer(self.save_delay, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush(self) -> None:
+        """Write pending changes now, call before exiting"""
+        with self.lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            self._dirty_since = None
+        self.compact()
     
             
-    def add_questions(self, new_questions: List[Question]) -> None:
-        """Add new question to the question list and save"""
-        self.questions.extend(new_questions)
-        self.save_questions()
+    def add_questions(self, new_questions: List[Question], skip_duplicates: bool = True) -> List[Question]:
+        """Add new questions to the question list and save, returns the ones added
+
+        Near-duplicates of a question already in the topic (or earlier in
+        the same batch) are skipped unless skip_duplicates is False."""
+        with self.lock:
+            if skip_duplicates:
+                new_questions = [q for q in new_questions if q.id not in self._by_id and
+                                 self._duplicate_index(q.topic).add_unless_duplicate(q) is None]
+            if not new_questions:
+                return []
+            self.questions.extend(new_questions)
+            for question in new_questions:
+                self._index_question(question)
+                self._update_weight(question)
+            self.storage.add(new_questions)
+        self._after_change()
+        return new_questions
+
+    def find_near_duplicates(self) -> List[Tuple[Question, Question]]:
+        """(kept, duplicate) pairs among enabled questions, the first added question is kept"""
+        pairs = []
+        with self.lock:
+            for topic, questions in self._by_topic.items():
+                #A fresh index of enabled questions only, disabled ones were already dealt with
+                index = DuplicateIndex()
+                for question in questions.values():
+                    if not question.enabled:
+                        continue
+                    kept = index.add_unless_duplicate(question)
+                    if kept is not None:
+                        pairs.append((kept, question))
+        return pairs
+
+    def disable_near_duplicates(self) -> List[Tuple[Question, Question]]:
+        """Disable every duplicate found by find_near_duplicates, returns the pairs
+
+        Duplicates are disabled rather than deleted, their attempt history is
+        kept and they can be enabled again from Manage Questions."""
+        pairs = self.find_near_duplicates()
+        for _, duplicate in pairs:
+            self.set_enabled(duplicate, False)
+        return pairs
      
             
-    def selecting_weighted_question(self) -> Optional[Question]:
-        """Prioritize difficult questions"""    
-        #Filter enabled questions, return None if no questions available  
-        enabled = [q for q in self.questions if q.enabled]
-        if not enabled:
-            return None
-        
-        # Weight formula: 100 - correct %
-        # 20% correct = 80 weight (high priority)
-        # Never shown - 100 weight (high priority)
-        
-        weights = [100 - q.get_correct_percentage() for q in enabled]
-        #k=1 picks 1 question, [0] extracts it from the returned list
-        return random.choices(enabled, weights=weights, k=1)[0]
+    #The selection methods below draw from the whole bank, or with a quiz_filter
+    #from that filter's candidate pool
+
+    def select_due_question(self, quiz_filter: Optional[QuizFilter] = None) -> Optional[Question]:
+        """The most overdue question for review, None if nothing is due, O(log n)"""
+        with self.lock:
+            return self._selection_indexes(quiz_filter)[0].peek()
+
+    def selecting_weighted_question(self, quiz_filter: Optional[QuizFilter] = None) -> Optional[Question]:
+        """Next due review, otherwise prioritize difficult questions, O(log n) per draw"""    
+        with self.lock:
+            due_queue, sampler, _ = self._selection_indexes(quiz_filter)
+            question = due_queue.peek()
+            if question is not None:
+                self._restore_due([question])
+            else:
+                question = sampler.sample()
+        if question is None:
+            #Every enabled question is mastered or waiting for its review (weight 0), pick uniformly
+            return self.select_question_random(quiz_filter)
+        return question
+
+    def select_weighted_questions(self, count: int, quiz_filter: Optional[QuizFilter] = None) -> List[Question]:
+        """Due reviews first, the rest drawn by weight in one pass (repetition allowed)"""
+        with self.lock:
+            due_queue, sampler, enabled = self._selection_indexes(quiz_filter)
+            questions = due_queue.due_questions(count)
+            self._restore_due(questions)
+            remaining = count - len(questions)
+            if not remaining:
+                return questions
+            drawn = sampler.sample_many(remaining)
+            if not drawn and enabled:
+                drawn = [random.choice(enabled) for _ in range(remaining)]
+            return questions + drawn
     
-    def select_question_random(self) -> Optional[Question]:
+    def select_question_random(self, quiz_filter: Optional[QuizFilter] = None) -> Optional[Question]:
         """Test mode, generates random questions"""
-        enabled = [q for q in self.questions if q.enabled]
-        if not enabled:
-            return None
-        #Returns 1 item directly (not a list like random.choices)
-        return random.choice(enabled)
+        with self.lock:
+            enabled = self._selection_indexes(quiz_filter)[2]
+            if not enabled:
+                return None
+            #Returns 1 item directly (not a list like random.choices)
+            return random.choice(enabled)
 
-    def select_unique_random_questions(self, count: int) -> List[Question]:
+    def select_unique_random_questions(self, count: int, quiz_filter: Optional[QuizFilter] = None) -> List[Question]:
         """Select unique random questions for test mode (no repetition)"""
-        enabled = [q for q in self.questions if q.enabled]
-        if not enabled:
-            return []
+        with self.lock:
+            enabled = self._selection_indexes(quiz_filter)[2]
+            if not enabled:
+                return []
 
-        #Select up to 'count' questions, or all available if fewer
-        actual_count = min(count, len(enabled))
-        return random.sample(enabled, actual_count)
+            #Select up to 'count' questions, or all available if fewer
+            actual_count = min(count, len(enabled))
+            return random.sample(enabled, actual_count)
 
     def find_question_by_id(self, question_id: str) -> Optional[Question]:
         """Find a question by its UUID"""
-        for question in self.questions:
-            if question.id == question_id:
-                return question
-        return None
\ No newline at end of file
+        return self._by_id.get(question_id)
+
+    def get_topics(self) -> List[str]:
+        """Sorted list of topics in the bank"""
+        with self.lock:
+            return sorted(self._by_topic)
+
+    def questions_by_topic(self, topic: str) -> List[Question]:
+        """Questions of one topic, in insertion order"""
+        with self.lock:
+            return list(self._by_topic.get(topic, {}).values())
+
+    def enabled_count(self) -> int:
+        """Number of enabled questions"""
+        return len(self._enabled)
+
+    def get_topic_stats(self) -> Dict[str, Dict]:
+        """Per topic totals: total, enabled, attempted, avg_success (None if never attempted)
+
+        Read from running aggregates, cost depends on the number of topics only."""
+        with self.lock:
+            return {topic: stats.to_dict() for topic, stats in sorted(self._topic_stats.items())
+                    if stats.total}
+
+    def get_overall_stats(self) -> Dict:
+        """Bank-wide totals in the same shape as get_topic_stats, plus the topic count"""
+        with self.lock:
+            stats = self._totals.to_dict()
+            stats["topics"] = sum(1 for topic_stats in self._topic_stats.values() if topic_stats.total)
+            return stats
@@ -0,0 +1,95 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Set, Tuple
+from question import Question
+from quiz_manager import QuizManager
+
+#Grading threads shared by every quiz session of the process
+PIPELINE_WORKERS = 8
+#Generation has its own, smaller pool so slow generation requests never
+#hold up grading
+GENERATION_WORKERS = 2
+#A topic with fewer enabled questions than this is topped up in the background
+TOP_UP_THRESHOLD = 10
+TOP_UP_COUNT = 5
+
+_shared_lock = threading.Lock()
+_shared_executor: Optional[ThreadPoolExecutor] = None
+_generation_executor: Optional[ThreadPoolExecutor] = None
+#(bank filename, topic) of every top-up in flight, shared by all sessions of the process
+_topping_up: Set[Tuple[str, str]] = set()
+
+
+def get_shared_executor() -> ThreadPoolExecutor:
+    """One worker pool for background grading and prefetching"""
+    global _shared_executor
+    with _shared_lock:
+        if _shared_executor is None:
+            _shared_executor = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS,
+                                                  thread_name_prefix="quiz-pipeline")
+        return _shared_executor
+
+
+def get_generation_executor() -> ThreadPoolExecutor:
+    """One worker pool for background question generation"""
+    global _generation_executor
+    with _shared_lock:
+        if _generation_executor is None:
+            _generation_executor = ThreadPoolExecutor(max_workers=GENERATION_WORKERS,
+                                                      thread_name_prefix="quiz-generation")
+        return _generation_executor
+
+
+class QuizPipeline:
+    """Background work for an interactive quiz
+
+    Answers are graded (and their attempts recorded) on worker threads, so
+    the next question can be shown straight away. The next question's text
+    is loaded from disk while the current one is answered, and topics that
+    are running out of questions get new ones generated behind the scenes."""
+    def __init__(self, quiz_manager: QuizManager, llm_client,
+                 executor: Optional[ThreadPoolExecutor] = None,
+                 generation_executor: Optional[ThreadPoolExecutor] = None,
+                 top_up_threshold: int = TOP_UP_THRESHOLD, top_up_count: int = TOP_UP_COUNT) -> None:
+        self.quiz_manager = quiz_manager
+        self.llm_client = llm_client
+        self.executor = executor or get_shared_executor()
+        self.generation_executor = generation_executor or get_generation_executor()
+        self.top_up_threshold = top_up_threshold
+        self.top_up_count = top_up_count
+
+    def grade(self, question: Question, user_answer: str) -> "Future[bool]":
+        """Grade and record one answer in the background, the future holds the verdict"""
+        return self.executor.submit(self._grade, question, user_answer)
+
+    def _grade(self, question: Question, user_answer: str) -> bool:
+        is_correct = self.llm_client.evaluate_answer(question, user_answer)
+        self.quiz_manager.record_attempt(question, is_correct)
+        return is_correct
+
+    def prefetch(self, question: Optional[Question]) -> None:
+        """Load a lazily loaded question's text and options before it is shown"""
+        if question is not None and not getattr(question, "is_loaded", True):
+            self.executor.submit(lambda: question.options)
+
+    def top_up(self, topic: str) -> Optional["Future[int]"]:
+        """Generate more questions for topic if it is running thin, returns None if not needed"""
+        stats = self.quiz_manager.get_topic_stats().get(topic)
+        if stats is not None and stats["enabled"] >= self.top_up_threshold:
+            return None
+        #At most one generation request per topic, whichever session asked first
+        key = (self.quiz_manager.filename, topic)
+        with _shared_lock:
+            if key in _topping_up:
+                return None
+            _topping_up.add(key)
+        return self.generation_executor.submit(self._top_up, topic, key)
+
+    def _top_up(self, topic: str, key: Tuple[str, str]) -> int:
+        try:
+            questions = self.llm_client.generate_questions(topic, self.top_up_count)
+            #Near-duplicates of questions already in the bank are dropped here
+            return len(self.quiz_manager.add_questions(questions))
+        finally:
+            with _shared_lock:
+                _topping_up.discard(key)
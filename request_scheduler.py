@@ -0,0 +1,174 @@
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Optional, Tuple, Type
+
+#Provider limits for gpt-4o-mini on the first usage tier, shared by every client of a process
+DEFAULT_REQUESTS_PER_MINUTE = 500
+DEFAULT_TOKENS_PER_MINUTE = 200_000
+
+#Retries after the first attempt, waits grow as BASE * 2^attempt up to MAX
+DEFAULT_MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 30.0
+
+
+class TokenBucket:
+    """Refills rate units per minute up to capacity, reservations may go into debt
+
+    reserve() never blocks, it returns how long the caller has to wait, so
+    the same bucket serves threads (time.sleep) and coroutines (asyncio.sleep)."""
+    def __init__(self, per_minute: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.clock = clock
+        self.level = self.capacity
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Take amount units now, return the seconds to wait before using them"""
+        with self.lock:
+            now = self.clock()
+            self._refill(now)
+            #A request larger than the bucket would wait forever, cap it at a full bucket
+            self.level -= min(amount, self.capacity)
+            return 0.0 if self.level >= 0 else -self.level / self.rate
+
+    def refund(self, amount: float) -> None:
+        """Give back units (or take more when negative) once the real cost is known"""
+        with self.lock:
+            self._refill(self.clock())
+            self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute buckets plus a shared pause after 429s"""
+    def __init__(self, requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = DEFAULT_TOKENS_PER_MINUTE,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.requests = TokenBucket(requests_per_minute, clock=clock)
+        self.tokens = TokenBucket(tokens_per_minute, clock=clock)
+        self.clock = clock
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def reserve(self, estimated_tokens: int) -> float:
+        """Reserve one request and its estimated tokens, return the seconds to wait"""
+        delay = max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+        with self.lock:
+            return max(delay, self.paused_until - self.clock())
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Correct the token bucket once a response reports its real usage"""
+        self.tokens.refund(estimated_tokens - actual_tokens)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller, used when the provider says it is overloaded"""
+        with self.lock:
+            self.paused_until = max(self.paused_until, self.clock() + seconds)
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE_SECONDS,
+                  cap: float = BACKOFF_MAX_SECONDS, rng: random.Random = random) -> float:
+    """Exponential backoff with full jitter, attempt counts from 0"""
+    return rng.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Read retry-after-ms / retry-after from the HTTP response attached to an error"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    #HTTP date form
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RequestScheduler:
+    """Runs API calls under a rate limiter, retrying transient failures with backoff
+
+    retryable lists the exception types worth another attempt (429s,
+    connection errors, 5xx), anything else is raised straight away."""
+    def __init__(self, limiter: Optional[RateLimiter] = None,
+                 retryable: Tuple[Type[BaseException], ...] = (),
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 sleep: Callable[[float], None] = time.sleep,
+                 rng: Optional[random.Random] = None) -> None:
+        self.limiter = limiter if limiter is not None else RateLimiter()
+        self.retryable = retryable
+        self.max_retries = max_retries
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+        #Counters for statistics
+        self.retries = 0
+        self.throttled_seconds = 0.0
+
+    def _retry_delay(self, error: BaseException, attempt: int) -> float:
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            #Every caller waits, not just the one that got the 429
+            self.limiter.pause(retry_after)
+            return retry_after
+        return backoff_delay(attempt, rng=self.rng)
+
+    def call(self, request: Callable[[], Any], estimated_tokens: int = 0) -> Any:
+        """Run request, waiting for rate limit capacity and retrying transient errors"""
+        attempt = 0
+        while True:
+            delay = self.limiter.reserve(estimated_tokens)
+            if delay > 0:
+                self.throttled_seconds += delay
+                self.sleep(delay)
+            try:
+                return request()
+            except self.retryable as e:
+                if attempt >= self.max_retries:
+                    raise
+                self.retries += 1
+                self.sleep(self._retry_delay(e, attempt))
+                attempt += 1
+
+    async def call_async(self, request: Callable[[], Awaitable[Any]], estimated_tokens: int = 0) -> Any:
+        """Async version of call(), waits with asyncio.sleep"""
+        attempt = 0
+        while True:
+            delay = self.limiter.reserve(estimated_tokens)
+            if delay > 0:
+                self.throttled_seconds += delay
+                await asyncio.sleep(delay)
+            try:
+                return await request()
+            except self.retryable as e:
+                if attempt >= self.max_retries:
+                    raise
+                self.retries += 1
+                await asyncio.sleep(self._retry_delay(e, attempt))
+                attempt += 1
+
+    def get_stats(self) -> dict:
+        """Retry and throttling counters"""
+        return {"retries": self.retries, "throttled_seconds": self.throttled_seconds}
@@ -0,0 +1,225 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+from question import Question
+
+DEFAULT_RESULTS_FILE = "results.db"
+LEGACY_RESULTS_FILE = "results.txt"
+
+#Lines written by earlier versions, e.g. "2026-02-10 11:46:31 - Score: 1/3"
+_LEGACY_LINE = re.compile(r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) - Score: (\d+)/(\d+)\s*$")
+
+
+class ResultsStore:
+    """SQLite history of finished quizzes with per-question outcomes
+
+    Tests are indexed by time, and a per-day rollup table is updated with
+    every insert, so progress charts read one row per day instead of
+    scanning every answer ever given."""
+    def __init__(self, filename: str = DEFAULT_RESULTS_FILE) -> None:
+        self.filename = filename
+        #Shared by Streamlit sessions on different threads, the lock serializes access
+        self.connection = sqlite3.connect(filename, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.lock = threading.Lock()
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        with self.lock, self.connection:
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS tests (
+                    id INTEGER PRIMARY KEY,
+                    taken_at REAL NOT NULL,
+                    day TEXT NOT NULL,
+                    mode TEXT NOT NULL,
+                    score INTEGER NOT NULL,
+                    total INTEGER NOT NULL,
+                    duration REAL,
+                    session_key TEXT UNIQUE
+                );
+                CREATE INDEX IF NOT EXISTS idx_tests_taken_at ON tests (taken_at);
+                CREATE INDEX IF NOT EXISTS idx_tests_mode_taken_at ON tests (mode, taken_at);
+                CREATE TABLE IF NOT EXISTS answers (
+                    test_id INTEGER NOT NULL REFERENCES tests (id),
+                    position INTEGER NOT NULL,
+                    question_id TEXT,
+                    topic TEXT,
+                    correct INTEGER NOT NULL,
+                    latency REAL,
+                    PRIMARY KEY (test_id, position)
+                );
+                CREATE INDEX IF NOT EXISTS idx_answers_question ON answers (question_id);
+                CREATE TABLE IF NOT EXISTS daily_totals (
+                    day TEXT NOT NULL,
+                    mode TEXT NOT NULL,
+                    tests INTEGER NOT NULL,
+                    correct INTEGER NOT NULL,
+                    questions INTEGER NOT NULL,
+                    PRIMARY KEY (day, mode)
+                );
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+            """)
+
+    def record_test(self, mode: str, outcomes: Sequence[Tuple[Question, bool, Optional[float]]],
+                    taken_at: Optional[float] = None, duration: Optional[float] = None,
+                    session_key: Optional[str] = None) -> Optional[int]:
+        """Store one finished quiz, outcomes are (question, was_correct, answer seconds)
+
+        A session_key that was already stored is ignored, so a page rerun
+        cannot save the same quiz twice. Returns the new test id or None."""
+        taken_at = taken_at if taken_at is not None else time.time()
+        score = sum(1 for _, correct, _ in outcomes if correct)
+        return self._insert(mode, taken_at, score, len(outcomes), duration, session_key,
+                            [(q.id, q.topic, correct, latency) for q, correct, latency in outcomes])
+
+    def _insert(self, mode: str, taken_at: float, score: int, total: int, duration: Optional[float],
+                session_key: Optional[str], answers: List[tuple]) -> Optional[int]:
+        day = datetime.fromtimestamp(taken_at).strftime("%Y-%m-%d")
+        with self.lock, self.connection:
+            cursor = self.connection.execute(
+                "INSERT OR IGNORE INTO tests (taken_at, day, mode, score, total, duration, session_key) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (taken_at, day, mode, score, total, duration, session_key)
+            )
+            if not cursor.rowcount:
+                return None
+            test_id = cursor.lastrowid
+            self.connection.executemany(
+                "INSERT INTO answers (test_id, position, question_id, topic, correct, latency) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(test_id, position, question_id, topic, int(correct), latency)
+                 for position, (question_id, topic, correct, latency) in enumerate(answers)]
+            )
+            self.connection.execute(
+                "INSERT INTO daily_totals (day, mode, tests, correct, questions) VALUES (?, ?, 1, ?, ?) "
+                "ON CONFLICT(day, mode) DO UPDATE SET tests = tests + 1, "
+                "correct = correct + excluded.correct, questions = questions + excluded.questions",
+                (day, mode, score, total)
+            )
+            return test_id
+
+    @staticmethod
+    def _mode_filter(mode: Optional[str], clauses: List[str], params: List) -> None:
+        if mode is not None:
+            clauses.append("mode = ?")
+            params.append(mode)
+
+    def tests_between(self, start: Optional[float] = None, end: Optional[float] = None,
+                      mode: Optional[str] = None) -> List[Dict]:
+        """Tests taken in [start, end) (unix time), oldest first, via the time index"""
+        clauses, params = [], []
+        self._mode_filter(mode, clauses, params)
+        if start is not None:
+            clauses.append("taken_at >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("taken_at < ?")
+            params.append(end)
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT id, taken_at, mode, score, total, duration FROM tests{where} ORDER BY taken_at",
+                params
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def test_answers(self, test_id: int) -> List[Dict]:
+        """Per-question outcomes of one test in the order they were asked"""
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT question_id, topic, correct, latency FROM answers WHERE test_id = ? ORDER BY position",
+                (test_id,)
+            ).fetchall()
+        return [dict(row, correct=bool(row["correct"])) for row in rows]
+
+    def daily_summary(self, start_day: Optional[str] = None, end_day: Optional[str] = None,
+                      mode: Optional[str] = None) -> List[Dict]:
+        """Per day (YYYY-MM-DD, inclusive range): tests, questions and score percentage"""
+        clauses, params = [], []
+        self._mode_filter(mode, clauses, params)
+        if start_day is not None:
+            clauses.append("day >= ?")
+            params.append(start_day)
+        if end_day is not None:
+            clauses.append("day <= ?")
+            params.append(end_day)
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT day, SUM(tests) AS tests, SUM(correct) AS correct, SUM(questions) AS questions "
+                f"FROM daily_totals{where} GROUP BY day ORDER BY day",
+                params
+            ).fetchall()
+        return [{"day": row["day"], "tests": row["tests"], "questions": row["questions"],
+                 "score_pct": (row["correct"] / row["questions"] * 100) if row["questions"] else 0.0}
+                for row in rows]
+
+    def topic_accuracy(self, start: Optional[float] = None, end: Optional[float] = None) -> Dict[str, Dict]:
+        """Per topic answers, correct percentage and mean answer time over a time range"""
+        clauses, params = [], []
+        if start is not None:
+            clauses.append("t.taken_at >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("t.taken_at < ?")
+            params.append(end)
+        where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT a.topic, COUNT(*) AS answers, AVG(a.correct) * 100 AS correct_pct, "
+                f"AVG(a.latency) AS mean_latency "
+                f"FROM tests t JOIN answers a ON a.test_id = t.id{where} "
+                f"GROUP BY a.topic ORDER BY a.topic",
+                params
+            ).fetchall()
+        return {row["topic"]: {"answers": row["answers"], "correct_pct": row["correct_pct"],
+                               "mean_latency": row["mean_latency"]}
+                for row in rows if row["topic"] is not None}
+
+    def import_legacy_results(self, filename: str = LEGACY_RESULTS_FILE) -> int:
+        """Import score lines from results.txt once, returns the number of new tests
+
+        Only the part of the file added since the last import is read."""
+        try:
+            size = os.path.getsize(filename)
+        except OSError:
+            return 0
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT value FROM meta WHERE key = ?", ("legacy_imported_bytes",)
+            ).fetchone()
+        offset = int(row["value"]) if row else 0
+        if offset >= size:
+            return 0
+
+        imported = 0
+        with open(filename, 'rb') as file:
+            file.seek(offset)
+            for raw in file:
+                #The byte offset makes each line's key unique even for identical lines
+                key = f"legacy:{offset}"
+                offset += len(raw)
+                match = _LEGACY_LINE.match(raw.decode("utf-8", errors="replace"))
+                if not match:
+                    continue
+                taken_at = datetime.strptime(match.group(1), "%Y-%m-%d %H:%M:%S").timestamp()
+                if self._insert("test", taken_at, int(match.group(2)), int(match.group(3)),
+                                None, key, []) is not None:
+                    imported += 1
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                ("legacy_imported_bytes", str(offset))
+            )
+        return imported
+
+    def close(self) -> None:
+        self.connection.close()
@@ -0,0 +1,118 @@
+from typing import Dict, Iterable, List
+from question import Question
+from question_pools import EASY_FROM, HARD_BELOW, QuizFilter
+
+try:
+    import numpy as np
+except ImportError:      # optional, QuizManager works without it
+    np = None
+
+NUMPY_AVAILABLE = np is not None
+
+
+class _Codes:
+    """Small integer code per distinct string (topic, type or source)"""
+    def __init__(self) -> None:
+        self.codes: Dict[str, int] = {}
+
+    def code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.codes)
+        return code
+
+    def lookup(self, values: Iterable[str]) -> List[int]:
+        """Codes of the values seen so far, unknown values match nothing"""
+        return [self.codes[value] for value in values if value in self.codes]
+
+
+class NumpySelectionEngine:
+    """Question state mirrored into NumPy arrays for vectorized filtering
+
+    One row per question holds enabled, topic/type/source codes and the
+    attempt counters. QuizManager updates a row on every change, so
+    building a filtered pool is a few array operations instead of a
+    Python loop over Question objects."""
+    def __init__(self, capacity: int = 1024) -> None:
+        if np is None:
+            raise ImportError("The vectorized selection engine needs NumPy: pip install numpy")
+        self.questions: List[Question] = []
+        self.rows: Dict[str, int] = {}
+        self.topics, self.types, self.sources = _Codes(), _Codes(), _Codes()
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int) -> None:
+        size = len(self.questions)
+        old = getattr(self, "enabled", None)
+        arrays = {"enabled": np.bool_, "topic": np.int32, "type": np.int16, "source": np.int16,
+                  "times_shown": np.int64, "times_correct": np.int64}
+        for name, dtype in arrays.items():
+            array = np.zeros(capacity, dtype=dtype)
+            if old is not None:
+                array[:size] = getattr(self, name)[:size]
+            setattr(self, name, array)
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    def _write(self, row: int, question: Question) -> None:
+        self.enabled[row] = question.enabled
+        self.topic[row] = self.topics.code(question.topic)
+        self.type[row] = self.types.code(question.type)
+        self.source[row] = self.sources.code(question.source)
+        self.times_shown[row] = question.times_shown
+        self.times_correct[row] = question.times_correct
+
+    def update(self, question: Question) -> None:
+        """Add a question or refresh its row after a change, O(1) amortized"""
+        row = self.rows.get(question.id)
+        if row is None:
+            row = len(self.questions)
+            if row == len(self.enabled):
+                self._allocate(2 * row)
+            self.rows[question.id] = row
+            self.questions.append(question)
+        self._write(row, question)
+
+    def extend(self, questions: List[Question]) -> None:
+        """Bulk load, one allocation for the whole bank"""
+        needed = len(self.questions) + len(questions)
+        if needed > len(self.enabled):
+            self._allocate(max(needed, 2 * len(self.enabled)))
+        for question in questions:
+            self.update(question)
+
+    def _mask(self, quiz_filter: QuizFilter):
+        """Vectorized QuizFilter.matches over the enabled rows"""
+        size = len(self.questions)
+        mask = self.enabled[:size].copy()
+        for values, codes, column in ((quiz_filter.topics, self.topics, self.topic),
+                                      (quiz_filter.types, self.types, self.type),
+                                      (quiz_filter.sources, self.sources, self.source)):
+            if values is None:
+                continue
+            wanted = codes.lookup(values)
+            #A single value is a plain comparison, several need isin (about 10x slower)
+            mask &= (column[:size] == wanted[0]) if len(wanted) == 1 else np.isin(column[:size], wanted)
+        if quiz_filter.difficulties is not None:
+            mask &= self._difficulty_mask(size, quiz_filter.difficulties)
+        return mask
+
+    def _difficulty_mask(self, size: int, difficulties):
+        """Rows in the given bands, same integer comparisons as question_pools.difficulty_band"""
+        shown, correct = self.times_shown[:size], self.times_correct[:size]
+        new = shown == 0
+        hard = ~new & (100 * correct < HARD_BELOW * shown)
+        easy = ~new & (100 * correct >= EASY_FROM * shown)
+        bands = {"new": new, "hard": hard, "easy": easy, "medium": ~(new | hard | easy)}
+        mask = np.zeros(size, dtype=np.bool_)
+        for band in difficulties:
+            mask |= bands[band]
+        return mask
+
+    def matching(self, quiz_filter: QuizFilter) -> List[Question]:
+        """Every enabled question the filter matches, in insertion order"""
+        return self._questions_at(np.flatnonzero(self._mask(quiz_filter)))
+
+    def _questions_at(self, rows) -> List[Question]:
+        return [self.questions[row] for row in rows.tolist()]
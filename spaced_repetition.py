@@ -0,0 +1,123 @@
+import heapq
+import itertools
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from question import Question
+
+#SM-2 parameters. A binary verdict maps to answer quality 4 (correct) or 2 (wrong)
+MIN_EASE = 1.3
+CORRECT_QUALITY = 4
+INCORRECT_QUALITY = 2
+FIRST_INTERVAL_DAYS = 1.0
+SECOND_INTERVAL_DAYS = 6.0
+#A missed question comes back in the same session, but not straight away
+RELEARN_DELAY_SECONDS = 10 * 60
+DAY_SECONDS = 24 * 60 * 60
+
+
+def next_review(interval: float, ease: float, repetitions: int, was_correct: bool,
+                now: float) -> Tuple[float, float, int, float]:
+    """SM-2 step, returns (interval in days, ease, repetitions, due unix time)"""
+    quality = CORRECT_QUALITY if was_correct else INCORRECT_QUALITY
+    ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    if not was_correct:
+        return 0.0, ease, 0, now + RELEARN_DELAY_SECONDS
+    repetitions += 1
+    if repetitions == 1:
+        interval = FIRST_INTERVAL_DAYS
+    elif repetitions == 2:
+        interval = SECOND_INTERVAL_DAYS
+    else:
+        interval = interval * ease
+    return interval, ease, repetitions, now + interval * DAY_SECONDS
+
+
+def schedule_review(question: Question, was_correct: bool, now: Optional[float] = None) -> None:
+    """Move a question to its next review date after an answer"""
+    question.interval, question.ease, question.repetitions, question.due = next_review(
+        question.interval, question.ease, question.repetitions, was_correct,
+        time.time() if now is None else now
+    )
+
+
+class DueQueue:
+    """Min-heap of (due time, question), the caller keeps disabled questions out
+
+    Only questions with a review date are queued. Questions that were never
+    scheduled (due 0: new ones, and every question saved before schedules
+    existed) are left to the difficulty weighting, otherwise they would all
+    be "overdue" and served in file order.
+
+    Entries are never updated in place. A rescheduled question gets a new
+    entry and the old one is skipped when it reaches the top, so every
+    change is one O(log n) push. The heap is rebuilt once stale entries
+    outnumber live ones."""
+    def __init__(self) -> None:
+        self.heap: List[Tuple[float, int, Question]] = []
+        self._counter = itertools.count()
+        #Question id -> (due time, sequence number) of its one valid entry
+        self._current: Dict[str, Tuple[float, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._current)
+
+    def _valid(self, entry: Tuple[float, int, Question]) -> bool:
+        due, sequence, question = entry
+        return self._current.get(question.id) == (due, sequence)
+
+    def push(self, question: Question) -> None:
+        """Add or reschedule a question at its current due time"""
+        if question.due <= 0:
+            self.discard(question)
+            return
+        current = self._current.get(question.id)
+        if current is not None and current[0] == question.due:
+            return
+        entry = (question.due, next(self._counter), question)
+        self._current[question.id] = entry[:2]
+        heapq.heappush(self.heap, entry)
+        if len(self.heap) > 2 * len(self._current) + 64:
+            self._rebuild()
+
+    def discard(self, question: Question) -> None:
+        """Stop serving a question, its entry is dropped lazily"""
+        self._current.pop(question.id, None)
+
+    def extend(self, questions: Iterable[Question]) -> None:
+        """Bulk insert, O(n) heapify instead of n pushes"""
+        for question in questions:
+            if question.due <= 0:
+                continue
+            entry = (question.due, next(self._counter), question)
+            self._current[question.id] = entry[:2]
+            self.heap.append(entry)
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        self.heap = [entry for entry in self.heap if self._valid(entry)]
+        heapq.heapify(self.heap)
+
+    def _drop_stale(self) -> None:
+        while self.heap and not self._valid(self.heap[0]):
+            heapq.heappop(self.heap)
+
+    def peek(self, now: Optional[float] = None) -> Optional[Question]:
+        """The most overdue question if one is due by now, else None"""
+        self._drop_stale()
+        if not self.heap:
+            return None
+        due, _, question = self.heap[0]
+        return question if due <= (time.time() if now is None else now) else None
+
+    def due_questions(self, count: int, now: Optional[float] = None) -> List[Question]:
+        """Up to count distinct due questions, most overdue first, in O(count log n)"""
+        now = time.time() if now is None else now
+        taken = []
+        while len(taken) < count:
+            self._drop_stale()
+            if not self.heap or self.heap[0][0] > now:
+                break
+            taken.append(heapq.heappop(self.heap))
+        for entry in taken:
+            heapq.heappush(self.heap, entry)
+        return [question for _, _, question in taken]
@@ -0,0 +1,322 @@
+import json
+import os
+import sqlite3
+import stat
+import tempfile
+import threading
+from typing import Dict, List, Optional, Tuple
+from question import Question
+from attempt_journal import AttemptJournal, FileLock
+from lazy_loader import SNAPSHOT_HEADER_KEY, iter_records, load_lazy_questions
+
+#Number of journaled records before they are folded back into the JSON file
+JOURNAL_COMPACTION_THRESHOLD = 500
+#Review schedule fields written with every attempt
+SCHEDULE_FIELDS = ("interval", "ease", "repetitions", "due")
+
+
+class QuestionStorage:
+    """Interface for persisting the question bank"""
+
+    def load(self) -> List[Question]:
+        """Return every stored question"""
+        raise NotImplementedError
+
+    def save(self, questions: List[Question]) -> None:
+        """Write the whole bank"""
+        raise NotImplementedError
+
+    def add(self, new_questions: List[Question]) -> None:
+        """Persist new questions"""
+        raise NotImplementedError
+
+    def record_attempt(self, question: Question, was_correct: bool) -> None:
+        """Persist one attempt, question counters and review schedule are already updated"""
+        raise NotImplementedError
+
+    def set_enabled(self, question: Question) -> None:
+        """Persist the current enabled flag of a question"""
+        raise NotImplementedError
+
+    def needs_compaction(self) -> bool:
+        """True when pending changes should be folded into the main store"""
+        return False
+
+    def compact(self) -> Optional[List[Dict]]:
+        """Fold pending changes into the main store
+
+        Backends shared between processes return the merged bank as dicts
+        so callers can pick up other processes' changes, None otherwise."""
+        return None
+
+    def pending_records(self) -> List[Dict]:
+        """Changes this process made after the last compaction"""
+        return []
+
+
+def apply_record(record: Dict, by_id: Dict, questions: list, make_question=Question.from_dict) -> None:
+    """Apply one journal record to questions (Question objects or their dicts)"""
+    if "add" in record:
+        if record["id"] not in by_id:
+            question = make_question(record["add"])
+            by_id[record["id"]] = question
+            questions.append(question)
+        return
+    question = by_id.get(record.get("id"))
+    if question is None:
+        return
+    if isinstance(question, dict):
+        if "enabled" in record:
+            question["enabled"] = bool(record["enabled"])
+        else:
+            question["times_shown"] = question.get("times_shown", 0) + 1
+            if record.get("correct"):
+                question["times_correct"] = question.get("times_correct", 0) + 1
+            #Attempts carry the schedule they resulted in, replay never recomputes it
+            question.update((key, record[key]) for key in SCHEDULE_FIELDS if key in record)
+    elif "enabled" in record:
+        question.enabled = bool(record["enabled"])
+    else:
+        question.record_attempt(bool(record.get("correct")))
+        if "due" in record:
+            question.set_schedule(record)
+
+
+def split_snapshot_header(data: List[Dict]) -> Tuple[Optional[str], List[Dict]]:
+    """(last folded rotation marker, question dicts) of a loaded questions.json"""
+    if data and SNAPSHOT_HEADER_KEY in data[0]:
+        return data[0][SNAPSHOT_HEADER_KEY].get("folded"), data[1:]
+    return None, data
+
+
+class JSONStorage(QuestionStorage):
+    """questions.json snapshot plus an append-only journal for attempts, toggles and additions
+
+    Several processes can share one bank. Every change is journaled, and a
+    compaction folds the journal into the snapshot on disk instead of
+    writing one process's in-memory copy, so no process overwrites another
+    one's attempts."""
+    def __init__(self, filename: str = "questions.json", lazy: bool = False) -> None:
+        self.filename = filename
+        #Lazy mode streams the file and leaves question text on disk until it is shown.
+        #It keeps questions.json open, and Windows cannot replace an open file, so
+        #compaction would fail there: the bank is loaded eagerly on Windows
+        self.lazy = lazy and os.name != "nt"
+        self.journal = AttemptJournal(filename + ".journal")
+        #Only one process folds the journal at a time
+        self.compaction_lock = FileLock(filename + ".lock")
+
+    def load(self) -> List[Question]:
+        questions = []
+        folded = None
+        #Shared with other readers, a compaction never swaps the snapshot while
+        #its rotated records are being replayed
+        with self.compaction_lock.shared():
+            try:
+                if self.lazy:
+                    questions = load_lazy_questions(self.filename)
+                    folded = self._read_folded_marker()
+                else:
+                    with open(self.filename, 'r') as file:
+                        folded, data = split_snapshot_header(json.load(file))
+                    questions = [Question.from_dict(q_dict) for q_dict in data]
+            except FileNotFoundError:
+                pass
+            self._replay_journal(questions, folded)
+        return questions
+
+    def _read_folded_marker(self) -> Optional[str]:
+        """Folded rotation marker from the header, only the first record is parsed"""
+        for _, _, record in iter_records(self.filename):
+            return split_snapshot_header([record])[0]
+        return None
+
+    def _replay_journal(self, questions: List[Question], folded: Optional[str] = None) -> None:
+        """Apply changes recorded after the last snapshot"""
+        by_id = {q.id: q for q in questions}
+        for record in self.journal.replay(folded):
+            apply_record(record, by_id, questions)
+
+    def save(self, questions: List[Question]) -> None:
+        """Overwrite the bank with questions and drop the journal"""
+        #Exclusive like a compaction, no other process loads or folds the journal in between
+        with self.compaction_lock.exclusive():
+            self._write_snapshot([question.to_dict() for question in questions])
+            #Snapshot now contains every journaled change
+            self.journal.clear()
+
+    def _write_snapshot(self, data: List[Dict], folded: Optional[str] = None) -> None:
+        """Write the snapshot to a temp file and atomically replace the old one
+
+        folded is the last journal rotation marker the snapshot contains."""
+        #A crash or a concurrent reader never sees a half-written questions.json
+        directory = os.path.dirname(os.path.abspath(self.filename))
+        fd, temp_name = tempfile.mkstemp(prefix=".questions-", suffix=".tmp", dir=directory)
+        try:
+            if folded is not None:
+                data = [{SNAPSHOT_HEADER_KEY: {"folded": folded}}] + data
+            with os.fdopen(fd, 'w') as file:
+                json.dump(data, file, indent=4)
+                file.flush()
+                os.fsync(file.fileno())
+            try:
+                os.chmod(temp_name, stat.S_IMODE(os.stat(self.filename).st_mode))
+            except FileNotFoundError:
+                os.chmod(temp_name, 0o644)
+            os.replace(temp_name, self.filename)
+        except BaseException:
+            try:
+                os.remove(temp_name)
+            except OSError:
+                pass
+            raise
+
+    def add(self, new_questions: List[Question]) -> None:
+        #An empty snapshot is created up front, additions are journaled like any other change
+        if not os.path.exists(self.filename):
+            with self.compaction_lock.exclusive():
+                if not os.path.exists(self.filename):
+                    self._write_snapshot([])
+        for question in new_questions:
+            self.journal.append_added(question)
+
+    def record_attempt(self, question: Question, was_correct: bool) -> None:
+        self.journal.append(question.id, was_correct, question.schedule_dict())
+
+    def set_enabled(self, question: Question) -> None:
+        self.journal.append_enabled(question.id, question.enabled)
+
+    def needs_compaction(self) -> bool:
+        return self.journal.entries >= JOURNAL_COMPACTION_THRESHOLD
+
+    def compact(self) -> Optional[List[Dict]]:
+        """Merge the journal into the snapshot on disk and return the merged bank
+
+        With no journal records the snapshot is returned as it is, it may
+        hold changes another process compacted since this one loaded."""
+        with self.compaction_lock.exclusive():
+            rotated = self.journal.rotate()
+            try:
+                with open(self.filename, 'r') as file:
+                    folded, data = split_snapshot_header(json.load(file))
+            except FileNotFoundError:
+                folded, data = None, []
+            if rotated:
+                by_id = {q_dict["id"]: q_dict for q_dict in data}
+                #Records an interrupted compaction already folded in are skipped
+                for record in self.journal.read_rotated(folded):
+                    apply_record(record, by_id, data, make_question=dict)
+                self._write_snapshot(data, folded=self.journal.last_rotation())
+                self.journal.discard_rotated()
+        return data
+
+    def pending_records(self) -> List[Dict]:
+        return list(self.journal.own_records())
+
+
+class SQLiteStorage(QuestionStorage):
+    """SQLite database keyed by question id
+
+    Every attempt and toggle is a single-row UPDATE on the primary key.
+    The bank is loaded whole: QuizManager answers lookups, topic lists and
+    filtered selection from its in-memory indexes, not from SQL queries,
+    so the table has no secondary indexes."""
+
+    COLUMNS = ("id", "topic", "text", "type", "correct_answer", "options",
+               "source", "enabled", "times_shown", "times_correct") + SCHEDULE_FIELDS
+
+    def __init__(self, filename: str = "questions.db") -> None:
+        self.filename = filename
+        #Streamlit reruns scripts on different threads, the lock serializes access
+        self.connection = sqlite3.connect(filename, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.lock = threading.Lock()
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        with self.lock, self.connection:
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS questions (
+                    id TEXT PRIMARY KEY,
+                    topic TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    correct_answer TEXT NOT NULL,
+                    options TEXT,
+                    source TEXT NOT NULL DEFAULT 'manual',
+                    enabled INTEGER NOT NULL DEFAULT 1,
+                    times_shown INTEGER NOT NULL DEFAULT 0,
+                    times_correct INTEGER NOT NULL DEFAULT 0,
+                    interval REAL NOT NULL DEFAULT 0,
+                    ease REAL NOT NULL DEFAULT 2.5,
+                    repetitions INTEGER NOT NULL DEFAULT 0,
+                    due REAL NOT NULL DEFAULT 0
+                );
+                -- Older databases had topic/source indexes that no query used
+                DROP INDEX IF EXISTS idx_questions_topic;
+                DROP INDEX IF EXISTS idx_questions_enabled_topic;
+                DROP INDEX IF EXISTS idx_questions_source;
+            """)
+            #Databases created before review scheduling get the new columns with their defaults
+            existing = {row["name"] for row in self.connection.execute("PRAGMA table_info(questions)")}
+            for column, definition in (("interval", "REAL NOT NULL DEFAULT 0"),
+                                       ("ease", "REAL NOT NULL DEFAULT 2.5"),
+                                       ("repetitions", "INTEGER NOT NULL DEFAULT 0"),
+                                       ("due", "REAL NOT NULL DEFAULT 0")):
+                if column not in existing:
+                    self.connection.execute(f"ALTER TABLE questions ADD COLUMN {column} {definition}")
+
+    @staticmethod
+    def _to_row(question: Question) -> tuple:
+        return (question.id, question.topic, question.text, question.type,
+                question.correct_answer, json.dumps(question.options), question.source,
+                int(question.enabled), question.times_shown, question.times_correct,
+                question.interval, question.ease, question.repetitions, question.due)
+
+    @staticmethod
+    def _from_row(row: sqlite3.Row) -> Question:
+        data = dict(row)
+        data["options"] = json.loads(data["options"]) if data["options"] else None
+        data["enabled"] = bool(data["enabled"])
+        return Question.from_dict(data)
+
+    def _upsert(self, questions: List[Question]) -> None:
+        placeholders = ", ".join("?" for _ in self.COLUMNS)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in self.COLUMNS if c != "id")
+        with self.lock, self.connection:
+            self.connection.executemany(
+                f"INSERT INTO questions ({', '.join(self.COLUMNS)}) VALUES ({placeholders}) "
+                f"ON CONFLICT(id) DO UPDATE SET {updates}",
+                (self._to_row(q) for q in questions)
+            )
+
+    def load(self) -> List[Question]:
+        with self.lock:
+            rows = self.connection.execute("SELECT * FROM questions ORDER BY rowid").fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def save(self, questions: List[Question]) -> None:
+        self._upsert(questions)
+
+    def add(self, new_questions: List[Question]) -> None:
+        self._upsert(new_questions)
+
+    def record_attempt(self, question: Question, was_correct: bool) -> None:
+        with self.lock, self.connection:
+            self.connection.execute(
+                "UPDATE questions SET times_shown = times_shown + 1, "
+                "times_correct = times_correct + ?, interval = ?, ease = ?, repetitions = ?, due = ? "
+                "WHERE id = ?",
+                (int(was_correct), question.interval, question.ease, question.repetitions,
+                 question.due, question.id)
+            )
+
+    def set_enabled(self, question: Question) -> None:
+        with self.lock, self.connection:
+            self.connection.execute(
+                "UPDATE questions SET enabled = ? WHERE id = ?",
+                (int(question.enabled), question.id)
+            )
+
+    def close(self) -> None:
+        self.connection.close()
@@ -0,0 +1,31 @@
+"""Tests for the benchmark baseline comparison"""
+from benchmarks.harness import percentile, find_regressions, save_baseline, load_baseline
+
+
+def test_percentile_nearest_rank():
+    """Test percentiles pick existing samples"""
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile(values, 100) == 100
+    assert percentile([], 50) == 0.0
+
+
+def test_find_regressions_respects_tolerance_and_noise(tmp_path):
+    """Test only slowdowns beyond tolerance and noise floor are reported"""
+    baseline = {
+        "op/a": {"p50_us": 10.0, "p99_us": 20.0},
+        "op/b": {"seconds": 1.0, "peak_mib": 100.0},
+        "op/c": {"p50_us": 0.2},
+    }
+    filename = str(tmp_path / "baseline.json")
+    save_baseline(baseline, filename)
+    results = {
+        "op/a": {"p50_us": 14.0, "p99_us": 90.0},   # +40% p50, p99 is not compared
+        "op/b": {"seconds": 1.1, "peak_mib": 100.2},
+        "op/c": {"p50_us": 0.6},                    # 3x slower but below the noise floor
+        "op/new": {"p50_us": 5.0},
+    }
+    regressions = find_regressions(results, load_baseline(filename), tolerance=0.25)
+    assert len(regressions) == 1
+    assert regressions[0].startswith("op/a p50_us")
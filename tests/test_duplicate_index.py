@@ -0,0 +1,50 @@
+"""Tests for DuplicateIndex class"""
+from duplicate_index import DuplicateIndex, jaccard, minhash, shingles
+from question import Question
+
+
+def test_minhash_estimates_similarity():
+    """Test signature agreement tracks the exact shingle similarity"""
+    first = shingles("What year did World War II end?")
+    second = shingles("In what year did World War II end?")
+    signature_a, signature_b = minhash(first), minhash(second)
+
+    agreement = sum(a == b for a, b in zip(signature_a, signature_b)) / len(signature_a)
+    assert abs(agreement - jaccard(first, second)) < 0.15
+    assert minhash(first) == signature_a
+
+
+def test_paraphrase_with_same_answer_is_duplicate():
+    """Test rewordings and case changes are found, the original is returned"""
+    index = DuplicateIndex()
+    original = Question("Geography", "What is the capital of France?", "freeform", "Paris")
+    index.add(original)
+
+    reworded = Question("Geography", "Which city is the capital of France?", "freeform", "paris")
+    assert index.add_unless_duplicate(reworded) is original
+    assert index.add_unless_duplicate(Question("Geography", "what is the capital of france", "mcq", "Paris",
+                                               ["Paris", "Rome"])) is original
+    assert len(index) == 1
+
+
+def test_similar_text_with_other_answer_is_not_duplicate():
+    """Test questions differing in one word that changes the answer are kept"""
+    index = DuplicateIndex()
+    index.add(Question("Geography", "What is the capital of France?", "freeform", "Paris"))
+    index.add(Question("History", "What year did World War II end?", "freeform", "1945"))
+
+    spain = Question("Geography", "What is the capital of Spain?", "freeform", "Madrid")
+    assert index.add_unless_duplicate(spain) is None
+    assert index.add_unless_duplicate(Question("History", "What year did World War I end?", "freeform", "1918")) is None
+    assert index.add_unless_duplicate(Question("Geography", "Name a river in Paris", "freeform", "Paris")) is None
+
+
+def test_add_unless_duplicate_indexes_only_new_questions():
+    """Test a duplicate is returned without being indexed"""
+    index = DuplicateIndex()
+    first = Question("Math", "What is the square root of 81?", "freeform", "9")
+    second = Question("Math", "What's the square root of 81?", "freeform", "9")
+
+    assert index.add_unless_duplicate(first) is None
+    assert index.add_unless_duplicate(second) is first
+    assert len(index) == 1
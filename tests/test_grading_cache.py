@@ -0,0 +1,127 @@
+"""Tests for GradingCache class"""
+import threading
+import pytest
+import grading_cache
+from grading_cache import GradingCache, normalize_answer
+from question import Question
+
+
+@pytest.fixture
+def question():
+    return Question("History", "Which war ended in 1945?", "freeform", "World War II")
+
+
+def test_normalize_answer():
+    """Test case, whitespace and punctuation are ignored"""
+    assert normalize_answer("  World  War, II! ") == "world war ii"
+    assert normalize_answer("") == ""
+
+
+def test_hit_after_put(question):
+    """Test equivalent answers share a cache entry"""
+    cache = GradingCache(filename=None)
+    assert cache.get(question, "world war ii") is None
+
+    cache.put(question, "world war ii", True)
+
+    assert cache.get(question, "World War II.") is True
+    assert cache.get_stats()["hits"] == 1
+    assert cache.get_stats()["misses"] == 1
+
+
+def test_reference_answer_is_part_of_key(question):
+    """Test editing the reference answer invalidates old verdicts"""
+    cache = GradingCache(filename=None)
+    cache.put(question, "ww2", True)
+    question.correct_answer = "The Second World War"
+    assert cache.get(question, "ww2") is None
+
+
+def test_lru_and_ttl(question, monkeypatch):
+    """Test old and least recently used entries are evicted"""
+    now = [1000.0]
+    monkeypatch.setattr(grading_cache.time, "time", lambda: now[0])
+    cache = GradingCache(filename=None, max_entries=2, ttl_seconds=60)
+
+    cache.put(question, "a", False)
+    cache.put(question, "b", False)
+    cache.get(question, "a")
+    cache.put(question, "c", True)
+    assert cache.get(question, "b") is None
+    assert cache.get(question, "a") is False
+
+    now[0] += 61
+    assert cache.get(question, "c") is None
+
+
+def test_persistence(tmp_path, question):
+    """Test verdicts survive a restart"""
+    filename = str(tmp_path / "cache.json")
+    cache = GradingCache(filename=filename)
+    cache.put(question, "ww2", True)
+    cache.save()
+
+    assert GradingCache(filename=filename).get(question, "WW2") is True
+
+
+def test_saves_are_batched(tmp_path, question):
+    """Test the file is only rewritten once save_every verdicts are waiting"""
+    filename = tmp_path / "cache.json"
+    cache = GradingCache(filename=str(filename), save_every=3)
+    for i in range(2):
+        cache.put(question, f"answer {i}", True)
+        cache.save_if_due()
+    assert not filename.exists()
+    cache.put(question, "answer 2", True)
+    cache.save_if_due()
+    assert len(GradingCache(filename=str(filename)).entries) == 3
+    assert cache.unsaved == 0
+
+
+def test_save_keeps_other_writers_entries(tmp_path, question):
+    """Test two caches on one file do not drop each other's verdicts"""
+    filename = str(tmp_path / "cache.json")
+    first, second = GradingCache(filename=filename), GradingCache(filename=filename)
+    first.put(question, "ww2", True)
+    second.put(question, "ww1", False)
+    first.save()
+    second.save()
+
+    reloaded = GradingCache(filename=filename)
+    assert reloaded.get(question, "ww2") is True
+    assert reloaded.get(question, "ww1") is False
+    assert second.get(question, "ww2") is True
+
+
+def test_concurrent_put_and_save(tmp_path, question):
+    """Test worker threads can grade and save the same cache file at once"""
+    filename = str(tmp_path / "cache.json")
+    caches = [GradingCache(filename=filename), GradingCache(filename=filename)]
+    errors = []
+
+    def work(cache, worker):
+        try:
+            for i in range(100):
+                cache.put(question, f"answer {worker} {i}", True)
+                cache.save()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(caches[i % 2], i)) for i in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert [path.name for path in tmp_path.iterdir()] == ["cache.json"]
+    #Whichever save came last wrote a complete file
+    assert len(GradingCache(filename=filename).entries) >= 100
+
+
+def test_failed_save_does_not_raise(tmp_path, question, capsys):
+    """Test a cache write error is reported, not raised"""
+    cache = GradingCache(filename=str(tmp_path / "missing" / "cache.json"))
+    cache.put(question, "ww2", True)
+    cache.save()
+    assert "Could not save grading cache" in capsys.readouterr().out
@@ -0,0 +1,31 @@
+"""Tests for JSONArrayStreamParser class"""
+import json
+from json_stream import JSONArrayStreamParser
+
+
+def test_elements_arrive_before_array_closes():
+    """Test objects are returned as soon as they are complete"""
+    parser = JSONArrayStreamParser()
+    assert parser.feed('```json\n[{"text": "Q1", "opt') == []
+    assert parser.feed('ions": ["a", "b]"]}, {"te') == [{"text": "Q1", "options": ["a", "b]"]}]
+    assert parser.feed('xt": "say \\"hi\\" {"}]\n```') == [{"text": 'say "hi" {'}]
+    assert parser.done
+
+
+def test_any_chunking_gives_same_result():
+    """Test feeding one character at a time matches json.loads"""
+    data = [{"text": "Q1", "options": None}, 3, "four", [5, {"six": 6}], True]
+    raw = json.dumps(data, indent=4)
+    parser = JSONArrayStreamParser()
+    elements = []
+    for char in raw:
+        elements.extend(parser.feed(char))
+    assert elements == data
+
+
+def test_malformed_element_is_skipped():
+    """Test one broken element does not stop the stream"""
+    parser = JSONArrayStreamParser()
+    elements = parser.feed('[{"a": 1}, {"b": nope}, {"c": 3}]')
+    assert elements == [{"a": 1}, {"c": 3}]
+    assert parser.errors == 1
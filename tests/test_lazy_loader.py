@@ -0,0 +1,105 @@
+"""Tests for lazy, streaming question loading"""
+import json
+import os
+import threading
+import time
+import pytest
+from lazy_loader import LazyBankFile, iter_records, load_lazy_questions
+from quiz_manager import QuizManager
+from question import Question
+from storage import JSONStorage
+
+
+@pytest.fixture
+def bank_file(tmp_path):
+    """questions.json with non-ASCII text and Windows line endings"""
+    questions = [
+        Question("Café", f"Qüestion {i} ✓?", "mcq", "B", ["A", "B"]).to_dict() for i in range(50)
+    ]
+    filename = tmp_path / "questions.json"
+    filename.write_bytes(json.dumps(questions, indent=4, ensure_ascii=False).replace("\n", "\r\n").encode("utf-8"))
+    return str(filename), questions
+
+
+def test_iter_records_small_chunks(bank_file):
+    """Test records and byte offsets are right across chunk boundaries"""
+    filename, questions = bank_file
+    with open(filename, 'rb') as file:
+        raw = file.read()
+
+    records = list(iter_records(filename, chunk_size=7))
+
+    assert [r for _, _, r in records] == questions
+    for offset, length, record in records:
+        assert json.loads(raw[offset:offset + length]) == record
+
+
+def test_heavy_fields_load_on_demand(bank_file):
+    """Test only touched questions read their text from disk"""
+    filename, questions = bank_file
+    lazy = load_lazy_questions(filename, chunk_size=64)
+
+    assert not any(q.is_loaded for q in lazy)
+    assert lazy[3].topic == "Café"
+    assert not lazy[3].is_loaded
+
+    assert lazy[3].text == "Qüestion 3 ✓?"
+    assert lazy[3].options == ["A", "B"]
+    assert lazy[3].is_loaded
+    assert sum(q.is_loaded for q in lazy) == 1
+    assert [q.to_dict() for q in lazy] == questions
+
+
+def test_concurrent_first_access_loads_once(bank_file, monkeypatch):
+    """Test a prefetch thread and the UI reading the same question at once both get its text"""
+    filename, _ = bank_file
+    lazy = load_lazy_questions(filename)
+    read_record = LazyBankFile.read_record
+    reads = []
+
+    def slow_read(self, offset, length):
+        reads.append(offset)
+        time.sleep(0.05)
+        return read_record(self, offset, length)
+
+    monkeypatch.setattr(LazyBankFile, "read_record", slow_read)
+    texts, errors = [], []
+
+    def read_text():
+        try:
+            texts.append(lazy[7].text)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=read_text) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert texts == ["Qüestion 7 ✓?"] * 4
+    assert len(reads) == 1
+
+
+def test_lazy_manager_round_trip(bank_file):
+    """Test a lazily loaded bank can be used and saved like a normal one"""
+    filename, questions = bank_file
+    manager = QuizManager(filename=filename, lazy=True)
+    question = manager.find_question_by_id(questions[0]["id"])
+    manager.record_attempt(question, True)
+    manager.compact()
+
+    reloaded = QuizManager(filename=filename)
+    assert len(reloaded.questions) == 50
+    assert reloaded.find_question_by_id(question.id).times_correct == 1
+    assert reloaded.questions[10].text == "Qüestion 10 ✓?"
+
+
+def test_windows_loads_eagerly(bank_file, monkeypatch):
+    """Test lazy mode is off where an open questions.json cannot be replaced"""
+    filename, _ = bank_file
+    monkeypatch.setattr(os, "name", "nt")
+    storage = JSONStorage(filename, lazy=True)
+    monkeypatch.undo()
+    assert not storage.lazy
+    assert all(type(q) is Question for q in storage.load())
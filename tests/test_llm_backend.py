@@ -0,0 +1,138 @@
+"""Tests for the offline FakeBackend driving a real LLMClient"""
+import asyncio
+import time
+import pytest
+
+pytest.importorskip("openai")
+
+from llm_backend import FakeBackend
+from llm_client import AsyncLLMClient, LLMClient, RETRYABLE_ERRORS
+from llm_metrics import LLMMetrics
+from grading_cache import GradingCache
+from request_scheduler import RequestScheduler, RateLimiter
+from question import Question
+
+
+def make_scheduler():
+    return RequestScheduler(RateLimiter(requests_per_minute=10**6, tokens_per_minute=10**9),
+                            retryable=RETRYABLE_ERRORS, sleep=lambda seconds: None)
+
+
+def make_client(backend):
+    """Client without API key, cache file or shared rate limits"""
+    return LLMClient(backend=backend, grading_cache=GradingCache(filename=None), scheduler=make_scheduler(),
+                     metrics=LLMMetrics(filename=None))
+
+
+def make_async_client(backend, **kwargs):
+    return AsyncLLMClient(backend=backend, grading_cache=GradingCache(filename=None),
+                          scheduler=make_scheduler(), metrics=LLMMetrics(filename=None), **kwargs)
+
+
+def test_fake_backend_generates_questions(monkeypatch):
+    """Test chunked and streamed generation work without an API key"""
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    client = make_client(FakeBackend())
+
+    questions = client.generate_questions("Chemistry", 25)
+    assert len(questions) == 25
+    assert len({q.text for q in questions}) == 25
+    assert all(q.topic == "Chemistry" for q in questions)
+
+    streamed = list(client.stream_questions("Chemistry", 4))
+    assert [q.type for q in streamed] == ["mcq", "freeform", "mcq", "freeform"]
+    assert client.get_token_usage()["total_tokens"] > 0
+
+
+def test_fake_backend_grading_is_deterministic():
+    """Test the same seed gives the same verdicts for single and batch grading"""
+    questions = [Question("Math", f"Q{i}", "freeform", f"answer {i}") for i in range(10)]
+    answers = [(q, f"something else {i}") for i, q in enumerate(questions)]
+
+    single = [make_client(FakeBackend(seed=3)).evaluate_answer(q, a) for q, a in answers]
+    batch = make_client(FakeBackend(seed=3)).evaluate_answers(answers)
+    assert single == batch
+
+
+def test_fake_backend_errors_are_retried():
+    """Test simulated 429s are absorbed by the scheduler's retries"""
+    backend = FakeBackend(error_rate=0.3, seed=1)
+    client = make_client(backend)
+    questions = client.generate_questions("History", 30)
+    assert len(questions) == 30
+    assert backend.get_stats()["errors"] > 0
+    assert client.get_scheduler_stats()["retries"] == backend.get_stats()["errors"]
+
+
+def test_calls_are_instrumented(tmp_path):
+    """Test every API call and cache hit is recorded per call kind"""
+    client = make_client(FakeBackend())
+    questions = client.generate_questions("Physics", 4)
+    list(client.stream_questions("Physics", 2))
+    freeform = [q for q in questions if q.type == "freeform"][0]
+    client.evaluate_answer(freeform, "a wrong guess")
+    client.evaluate_answer(freeform, "a wrong guess")
+
+    stats = client.get_call_stats()
+    assert stats["generation"]["calls"] == 1
+    assert stats["generation_stream"]["ttft_p50_ms"] > 0
+    assert stats["grading"]["calls"] == 1
+    assert stats["grading"]["cache_hits"] == 1
+    assert client.export_call_records(str(tmp_path / "calls.jsonl")) == 4
+
+
+def test_topics_are_generated_concurrently():
+    """Test a multi-topic batch takes about as long as one call, not the sum"""
+    client = make_client(FakeBackend(latency=0.2))
+    topics = ["Math", "History", "Physics", "Biology"]
+
+    started = time.perf_counter()
+    results = client.generate_questions_for_topics(topics, 3, max_concurrency=4)
+    elapsed = time.perf_counter() - started
+
+    assert list(results) == topics
+    assert all(len(questions) == 3 and {q.topic for q in questions} == {topic}
+               for topic, questions in results.items())
+    #Sequential calls would take 0.8s
+    assert elapsed < 0.5
+
+
+def test_concurrency_is_bounded():
+    """Test the semaphore limits requests in flight"""
+    client = make_client(FakeBackend(latency=0.2))
+    started = time.perf_counter()
+    client.generate_questions_for_topics(["A", "B", "C", "D"], 2, max_concurrency=2)
+    #Two rounds of two calls, sequential calls would take 0.8s
+    assert 0.4 <= time.perf_counter() - started < 0.7
+
+
+def test_request_timeout(capsys):
+    """Test a call slower than the timeout is abandoned and grades as incorrect"""
+    async def run():
+        async with make_async_client(FakeBackend(latency=5), request_timeout=0.05) as client:
+            question = Question("Math", "Why?", "freeform", "Because of gravity")
+            started = time.perf_counter()
+            verdict = await client.evaluate_answer(question, "some long explanation")
+            questions = await client.generate_questions("Math", 2)
+            return verdict, questions, time.perf_counter() - started, client
+
+    verdict, questions, elapsed, client = asyncio.run(run())
+    assert verdict is False and questions == []
+    assert elapsed < 1
+    assert "timed out" in capsys.readouterr().out
+    assert client.get_token_usage()["total_tokens"] == 0
+    assert client.metrics.summary()["grading"]["errors"] == 1
+
+
+def test_async_token_usage_is_merged():
+    """Test tokens used by the async client are added to the LLMClient totals"""
+    client = make_client(FakeBackend(prompt_tokens=10, completion_tokens=5))
+    client.generate_questions("Math", 2)
+    before = client.get_token_usage()
+
+    client.generate_questions_for_topics(["History", "Physics"], 2)
+
+    after = client.get_token_usage()
+    assert after["prompt_tokens"] == before["prompt_tokens"] + 20
+    assert after["completion_tokens"] == before["completion_tokens"] + 10
+    assert after["total_tokens"] == before["total_tokens"] + 30
@@ -0,0 +1,42 @@
+"""Tests for LLM client helpers that do not call the API"""
+import json
+import pytest
+
+pytest.importorskip("openai")
+
+from llm_client import split_into_chunks, parse_generated_questions
+
+
+def test_split_into_chunks():
+    """Test large requests are split into fixed-size chunks"""
+    assert split_into_chunks(5) == [5]
+    assert split_into_chunks(25) == [10, 10, 5]
+    assert split_into_chunks(0) == []
+
+
+def test_parse_drops_invalid_items():
+    """Test malformed items are dropped without losing the batch"""
+    response = json.dumps([
+        {"text": "Q1", "type": "mcq", "correct_answer": "A", "options": ["A", "B"]},
+        {"text": "Q2", "type": "mcq", "correct_answer": "C", "options": ["A", "B"]},
+        {"text": "", "type": "freeform", "correct_answer": "X", "options": None},
+        {"text": "Q4", "type": "freeform", "correct_answer": "Y", "options": None},
+    ])
+
+    questions = parse_generated_questions(response, "Test")
+
+    assert [q.text for q in questions] == ["Q1", "Q4"]
+    assert all(q.source == "generated" for q in questions)
+
+
+def test_parse_rejects_non_array():
+    """Test a JSON object instead of an array counts as a parse error"""
+    with pytest.raises(json.JSONDecodeError):
+        parse_generated_questions('{"text": "Q1"}', "Test")
+
+
+def test_parse_batch_verdicts():
+    """Test batch verdicts are matched by item number, gaps stay None"""
+    from llm_client import parse_batch_verdicts
+    reply = '```json\n[{"item": 2, "verdict": "Correct"}, {"item": 1, "verdict": "incorrect"}, {"item": 9, "verdict": "correct"}]\n```'
+    assert parse_batch_verdicts(reply, 3) == [False, True, None]
@@ -0,0 +1,38 @@
+"""Tests for LLM call instrumentation"""
+import time
+from types import SimpleNamespace
+from llm_metrics import LLMMetrics, LatencyHistogram, load_records
+
+
+def test_histogram_percentiles_are_close():
+    """Test bucketed percentiles stay within the bucket resolution"""
+    histogram = LatencyHistogram()
+    for ms in range(1, 1001):
+        histogram.add(float(ms))
+    assert abs(histogram.percentile(50) - 500) / 500 < 0.1
+    assert abs(histogram.percentile(99) - 990) / 990 < 0.1
+    assert histogram.percentile(100) == 1000
+    assert LatencyHistogram().percentile(50) == 0.0
+
+
+def test_records_are_aggregated_and_persisted(tmp_path):
+    """Test summaries per kind and the JSON lines file survive a restart"""
+    filename = str(tmp_path / "llm_calls.jsonl")
+    metrics = LLMMetrics(filename)
+    usage = SimpleNamespace(prompt_tokens=100, completion_tokens=5)
+    started = time.perf_counter()
+    metrics.record("grading", "gpt-4o-mini", started, usage=usage, cache="miss")
+    metrics.record("grading", "gpt-4o-mini", started, outcome="RateLimitError", cache="miss")
+    metrics.record("grading", None, started, cache="hit")
+    metrics.record("generation", "gpt-4o-mini", started, usage=usage, ttft=started)
+
+    summary = metrics.summary()
+    assert summary["grading"]["calls"] == 2
+    assert summary["grading"]["errors"] == 1
+    assert summary["grading"]["cache_hits"] == 1
+    assert summary["grading"]["prompt_tokens"] == 100
+    assert summary["generation"]["ttft_p50_ms"] <= summary["generation"]["p50_ms"]
+
+    restored = LLMMetrics.from_records(load_records(filename))
+    assert restored.summary()["grading"]["calls"] == 2
+    assert metrics.export_jsonl(str(tmp_path / "export.jsonl")) == 4
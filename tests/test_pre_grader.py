@@ -0,0 +1,51 @@
+"""Tests for the local pre-grader"""
+import pytest
+from pre_grader import pre_grade
+from question import Question
+
+
+def freeform(answer):
+    return Question("Test", "Question?", "freeform", answer)
+
+
+@pytest.mark.parametrize("answer", ["", "   ", "I don't know", "idk", "Not sure.", "no idea"])
+def test_non_answers_are_incorrect(answer):
+    assert pre_grade(freeform("Treaty of Versailles"), answer) is False
+
+
+@pytest.mark.parametrize("reference, answer", [
+    ("Paris Agreement", "paris agreement"),
+    ("COVID-19 pandemic", "covid 19 pandemic"),
+    ("World War II", "WW2"),
+    ("World War II", "WWII"),
+    ("World War III", "WWIII"),
+    ("Henry VIII", "Henry 8"),
+    ("World War II", "world war 2"),
+    ("United States of America", "USA"),
+    ("Treaty of Versailles", "the treaty of versailes"),
+])
+def test_obvious_matches_are_correct(reference, answer):
+    assert pre_grade(freeform(reference), answer) is True
+
+
+@pytest.mark.parametrize("answer", ["Na", "None", "pass", "Unknown", "N/A"])
+def test_exact_match_wins_over_non_answer(answer):
+    assert pre_grade(freeform(answer), answer) is True
+
+
+@pytest.mark.parametrize("reference, answer", [
+    ("Type 1 diabetes", "Type 2 diabetes"),
+    ("Potassium nitrate", "Potassium nitrite"),
+    ("The mitochondria produces energy", "The mitochondria does not produce energy"),
+    ("Political instability, economic troubles and invasions", "The economy collapsed"),
+    ("Nikita Khrushchev", "Stalin"),
+    ("Ra", "Richard Avedon"),
+    ("desert", "dessert"),
+    ("Earth orbits the Sun", "Sun orbits the Earth"),
+    ("Electrons flow from the anode to the cathode", "Electrons flow from the cathode to the anode"),
+    ("1", "I"),
+    ("10", "x"),
+    ("Sodium", "Na"),
+])
+def test_ambiguous_answers_escalate(reference, answer):
+    assert pre_grade(freeform(reference), answer) is None
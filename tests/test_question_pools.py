@@ -0,0 +1,102 @@
+"""Tests for quiz filters and the per-filter candidate pools"""
+import pytest
+from question import Question
+from question_pools import QuestionPool, QuizFilter, difficulty_band
+from quiz_manager import QuizManager
+
+
+@pytest.fixture
+def temp_file(tmp_path):
+    """Temporary file for testing"""
+    return str(tmp_path / "test_questions.json")
+
+
+def _bank():
+    math = [Question("Math", f"Math {i}", "mcq" if i % 2 else "freeform", str(i), ["0", "1"],
+                     source="generated") for i in range(6)]
+    history = [Question("History", f"History {i}", "freeform", str(i)) for i in range(4)]
+    return math, history
+
+
+def test_difficulty_bands():
+    """Test new, hard (<50%), medium and easy (>=80%) bands"""
+    q = Question("Math", "What is 2+2?", "freeform", "4")
+    assert difficulty_band(q) == "new"
+    for (shown, correct), band in (((2, 0), "hard"), ((2, 1), "medium"), ((5, 4), "easy"), ((4, 3), "medium")):
+        q.times_shown, q.times_correct = shown, correct
+        assert difficulty_band(q) == band
+
+
+def test_filter_key_and_matching():
+    """Test equal filters share a key, empty values mean any"""
+    assert QuizFilter(topics=["Math", "History"]) == QuizFilter(topics={"History", "Math"}, types=[])
+    assert QuizFilter().is_empty() and QuizFilter(types=[]).is_empty()
+    math, history = _bank()
+    mcq_math = QuizFilter(topics=["Math"], types=["mcq"], difficulties=["new"])
+    assert [q.text for q in math + history if mcq_math.matches(q)] == ["Math 1", "Math 3", "Math 5"]
+    assert QuizFilter(sources=["manual"]).describe() == "manual"
+    with pytest.raises(ValueError):
+        QuizFilter(difficulties=["impossible"])
+
+
+def test_pool_update_adds_and_removes():
+    """Test a pool follows enabled state and filter changes incrementally"""
+    math, _ = _bank()
+    pool = QuestionPool(QuizFilter(types=["mcq"]))
+    pool.extend([(q, 100.0) for q in math if q.type == "mcq"])
+    assert len(pool) == 3
+    math[1].enabled = False
+    pool.update(math[1], 0.0)
+    assert math[1] not in pool and len(pool) == 2
+    assert pool.sampler.get_weight(math[1].id) == 0.0
+    math[1].enabled = True
+    pool.update(math[1], 100.0)
+    pool.update(math[0], 100.0)  #freeform, stays out
+    assert sorted(q.text for q in pool.members) == ["Math 1", "Math 3", "Math 5"]
+
+
+def test_filtered_sessions_draw_only_from_pool(temp_file):
+    """Test every selection method respects the filter"""
+    manager = QuizManager(filename=temp_file)
+    math, history = _bank()
+    manager.add_questions(math + history)
+    math_only = QuizFilter(topics=["Math"])
+
+    assert manager.count_matching(math_only) == 6
+    assert manager.count_matching() == 10
+    assert {q.topic for q in manager.select_unique_random_questions(10, math_only)} == {"Math"}
+    assert len(manager.select_unique_random_questions(10, math_only)) == 6
+    assert all(q.topic == "Math" for q in manager.select_weighted_questions(20, math_only))
+    assert manager.selecting_weighted_question(math_only).topic == "Math"
+    assert manager.select_question_random(QuizFilter(topics=["History"], types=["mcq"])) is None
+
+
+def test_pools_follow_attempts_and_toggles(temp_file):
+    """Test questions move between difficulty pools as they are answered"""
+    manager = QuizManager(filename=temp_file)
+    math, history = _bank()
+    manager.add_questions(math + history)
+    new, hard = QuizFilter(difficulties=["new"]), QuizFilter(difficulties=["hard"])
+    assert manager.count_matching(new) == 10 and manager.count_matching(hard) == 0
+
+    manager.record_attempt(math[0], False)
+    assert manager.count_matching(new) == 9
+    assert manager.select_unique_random_questions(5, hard) == [math[0]]
+    #The pool's own due queue holds it back until the relearn delay has passed
+    assert manager.select_due_question(hard) is None
+
+    manager.set_enabled(math[0], False)
+    assert manager.count_matching(hard) == 0
+    manager.add_questions([Question("Math", "A brand new question", "freeform", "x")])
+    assert manager.count_matching(new) == 10
+
+
+def test_pools_are_evicted_least_recently_used(temp_file, monkeypatch):
+    """Test only the most recently used pools are kept"""
+    monkeypatch.setattr("quiz_manager.MAX_POOLS", 2)
+    manager = QuizManager(filename=temp_file)
+    math, history = _bank()
+    manager.add_questions(math + history)
+    for topic in ("Math", "History", "Math", "Physics"):
+        manager.count_matching(QuizFilter(topics=[topic]))
+    assert list(manager._pools) == [QuizFilter(topics=["Math"]).key, QuizFilter(topics=["Physics"]).key]
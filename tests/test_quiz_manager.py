@@ -1,6 +1,8 @@
 """Tests for QuizManager class"""
 import pytest
 import os
+import threading
+import time
 from quiz_manager import QuizManager
 from question import Question
 
@@ -50,3 +52,251 @@ def test_select_random_question(temp_file):
 
     selected = manager.select_question_random()
     assert selected in manager.questions
+
+
+def test_record_attempt_is_journaled(temp_file):
+    """Test attempts survive a reload without rewriting the JSON file"""
+    manager = QuizManager(filename=temp_file)
+    q = Question("Math", "What is 3+3?", "mcq", "6", ["5", "6", "7"])
+    manager.add_questions([q])
+    snapshot_mtime = os.path.getmtime(temp_file)
+
+    manager.record_attempt(q, True)
+    manager.record_attempt(q, False)
+
+    assert os.path.getmtime(temp_file) == snapshot_mtime
+    assert os.path.exists(temp_file + ".journal")
+
+    reloaded = QuizManager(filename=temp_file)
+    found = reloaded.find_question_by_id(q.id)
+    assert found.times_shown == 2
+    assert found.times_correct == 1
+
+
+def test_compact_clears_journal(temp_file):
+    """Test compaction folds attempts into the snapshot"""
+    manager = QuizManager(filename=temp_file)
+    q = Question("Math", "What is 4+4?", "mcq", "8", ["7", "8", "9"])
+    manager.add_questions([q])
+    manager.record_attempt(q, True)
+
+    manager.compact()
+
+    assert not os.path.exists(temp_file + ".journal")
+    reloaded = QuizManager(filename=temp_file)
+    assert reloaded.find_question_by_id(q.id).times_correct == 1
+
+
+def test_weighted_selection_tracks_changes(temp_file):
+    """Test practice weights follow attempts and toggles"""
+    manager = QuizManager(filename=temp_file)
+    q1 = Question("Math", "Question 1", "mcq", "A", ["A", "B"])
+    q2 = Question("Math", "Question 2", "mcq", "B", ["A", "B"])
+    manager.add_questions([q1, q2])
+
+    manager.set_enabled(q2, False)
+    assert manager.select_weighted_questions(10) == [q1] * 10
+
+    # Fully mastered questions still get selected when nothing else is left
+    manager.record_attempt(q1, True)
+    assert manager.selecting_weighted_question() is q1
+
+
+def test_topic_and_enabled_indexes(temp_file):
+    """Test secondary indexes stay consistent through toggles and reloads"""
+    manager = QuizManager(filename=temp_file)
+    q1 = Question("Math", "Question 1", "mcq", "A", ["A", "B"])
+    q2 = Question("History", "Question 2", "freeform", "B")
+    q3 = Question("Math", "Question 3", "freeform", "C")
+    manager.add_questions([q1, q2, q3])
+
+    assert manager.get_topics() == ["History", "Math"]
+    assert manager.questions_by_topic("Math") == [q1, q3]
+    assert manager.enabled_count() == 3
+
+    manager.set_enabled(q1, False)
+    assert manager.enabled_count() == 2
+    assert q1 not in manager.select_unique_random_questions(3)
+
+    reloaded = QuizManager(filename=temp_file)
+    assert reloaded.enabled_count() == 2
+    assert [q.id for q in reloaded.questions_by_topic("Math")] == [q1.id, q3.id]
+
+
+def test_compaction_is_debounced(temp_file, monkeypatch):
+    """Test a burst of answers causes one background snapshot write"""
+    monkeypatch.setattr("storage.JOURNAL_COMPACTION_THRESHOLD", 2)
+    manager = QuizManager(filename=temp_file, save_delay=60)
+    q = Question("Math", "What is 5+5?", "mcq", "10", ["9", "10"])
+    manager.add_questions([q])
+
+    saves = []
+    original_write = manager.storage._write_snapshot
+    monkeypatch.setattr(manager.storage, "_write_snapshot", lambda data, **kwargs: saves.append(1) or original_write(data, **kwargs))
+
+    for _ in range(10):
+        manager.record_attempt(q, True)
+    assert saves == []
+
+    manager.flush()
+    assert saves == [1]
+    assert not os.path.exists(temp_file + ".journal")
+    assert QuizManager(filename=temp_file).find_question_by_id(q.id).times_shown == 10
+
+
+def test_concurrent_attempts_are_not_lost(temp_file):
+    """Test sessions sharing one manager from several threads keep every answer"""
+    manager = QuizManager(filename=temp_file)
+    questions = [Question("Math", f"Q{i}", "freeform", str(i)) for i in range(5)]
+    manager.add_questions(questions)
+
+    def answer():
+        for i in range(200):
+            manager.record_attempt(questions[i % 5], i % 2 == 0)
+            if i == 100:
+                manager.compact()
+
+    threads = [threading.Thread(target=answer) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(q.times_shown for q in manager.questions) == 800
+    manager.flush()
+    reloaded = QuizManager(filename=temp_file)
+    assert sum(q.times_shown for q in reloaded.questions) == 800
+    assert sum(q.times_correct for q in reloaded.questions) == 400
+
+
+def test_compaction_merges_other_writers(temp_file):
+    """Test two managers on the same file never overwrite each other's attempts"""
+    first = QuizManager(filename=temp_file)
+    q = Question("Math", "What is 2+2?", "mcq", "4", ["3", "4", "5"])
+    first.add_questions([q])
+    second = QuizManager(filename=temp_file)
+
+    first.record_attempt(q, True)
+    second.record_attempt(second.find_question_by_id(q.id), False)
+    second.add_questions([Question("History", "Who was Napoleon?", "freeform", "Emperor")])
+    first.compact()
+
+    #The compacting manager picks up the other writer's changes
+    assert first.find_question_by_id(q.id).times_shown == 2
+    assert len(first.questions) == 2
+
+    second.record_attempt(second.find_question_by_id(q.id), True)
+    second.compact()
+    assert second.find_question_by_id(q.id).times_shown == 3
+    assert QuizManager(filename=temp_file).find_question_by_id(q.id).times_shown == 3
+
+    #Nothing left to fold, the snapshot still carries the other writer's attempt
+    first.flush()
+    assert first.find_question_by_id(q.id).times_shown == 3
+
+
+def test_topic_stats_follow_every_change(temp_file):
+    """Test running aggregates match a full recount after attempts, toggles and additions"""
+    manager = QuizManager(filename=temp_file)
+    q1 = Question("Math", "What is 2+2?", "mcq", "4", ["3", "4", "5"])
+    q2 = Question("Math", "What is 3+3?", "freeform", "6")
+    q3 = Question("History", "Who was Napoleon?", "freeform", "Emperor")
+    manager.add_questions([q1, q2, q3])
+    manager.record_attempt(q1, True)
+    manager.record_attempt(q1, False)
+    manager.record_attempt(q2, True)
+    manager.set_enabled(q3, False)
+
+    stats = manager.get_topic_stats()
+    assert list(stats) == ["History", "Math"]
+    assert stats["Math"] == {"total": 2, "enabled": 2, "attempted": 2, "avg_success": 75.0}
+    assert stats["History"] == {"total": 1, "enabled": 0, "attempted": 0, "avg_success": None}
+    assert manager.get_overall_stats() == {"total": 3, "enabled": 2, "attempted": 2,
+                                           "avg_success": 75.0, "topics": 2}
+
+    #A fresh load builds the same aggregates from the stored counters
+    assert QuizManager(filename=temp_file).get_topic_stats() == stats
+
+
+def test_add_questions_skips_near_duplicates(temp_file):
+    """Test regenerated paraphrases are not added, within a batch or across batches"""
+    manager = QuizManager(filename=temp_file)
+    original = Question("Geography", "What is the capital of France?", "freeform", "Paris")
+    assert manager.add_questions([original]) == [original]
+
+    batch = [Question("Geography", "Which city is the capital of France?", "freeform", "Paris"),
+             Question("Geography", "What is the capital of Italy?", "freeform", "Rome"),
+             Question("Geography", "What is the capital of Italy ?", "freeform", "Rome")]
+    added = manager.add_questions(batch)
+
+    assert added == [batch[1]]
+    assert len(manager.questions) == 2
+    assert len(QuizManager(filename=temp_file).questions) == 2
+    #Other topics and explicit requests are not deduplicated
+    assert manager.add_questions([Question("Trivia", "What is the capital of France?", "freeform", "Paris")])
+    assert manager.add_questions([batch[0]], skip_duplicates=False) == [batch[0]]
+
+
+def test_disable_near_duplicates(temp_file):
+    """Test bulk dedup keeps the first copy and disables later ones"""
+    manager = QuizManager(filename=temp_file)
+    first = Question("Geography", "What is the capital of France?", "freeform", "Paris")
+    second = Question("Geography", "Which city is the capital of France?", "freeform", "Paris")
+    other = Question("Geography", "What is the capital of Italy?", "freeform", "Rome")
+    manager.add_questions([first, second, other], skip_duplicates=False)
+
+    assert manager.find_near_duplicates() == [(first, second)]
+    assert manager.disable_near_duplicates() == [(first, second)]
+
+    assert second.enabled is False
+    assert first.enabled and other.enabled
+    assert manager.find_near_duplicates() == []
+    assert QuizManager(filename=temp_file).find_question_by_id(second.id).enabled is False
+
+
+def test_practice_serves_due_questions_and_persists_schedule(temp_file, monkeypatch):
+    """Test an answered question is not served again until due, and its schedule is saved"""
+    manager = QuizManager(filename=temp_file)
+    q1 = Question("Math", "What is 2+2?", "freeform", "4")
+    q2 = Question("Math", "What is 3+3?", "freeform", "6")
+    q3 = Question("Math", "What is 4+4?", "freeform", "8")
+    manager.add_questions([q1, q2, q3])
+
+    #New questions have no review date yet, the difficulty weighting picks them
+    assert manager.select_due_question() is None
+    manager.record_attempt(q1, True)
+    manager.record_attempt(q2, False)
+    #The missed question is not served again before the relearn delay...
+    assert manager.select_due_question() is None
+    assert {manager.selecting_weighted_question() for _ in range(200)} == {q3}
+    assert manager.select_weighted_questions(3) == [q3, q3, q3]
+    #...and comes first once the clock passes its due time
+    monkeypatch.setattr(time, "time", lambda: q2.due + 1)
+    assert manager.selecting_weighted_question() is q2
+    assert manager.select_weighted_questions(1) == [q2]
+    assert manager.sampler.get_weight(q2.id) == 100
+    monkeypatch.undo()
+
+    reloaded = QuizManager(filename=temp_file)
+    assert reloaded.find_question_by_id(q1.id).due == q1.due
+    assert reloaded.find_question_by_id(q2.id).ease == q2.ease
+    manager.flush()
+    compacted = QuizManager(filename=temp_file)
+    assert compacted.find_question_by_id(q1.id).repetitions == 1
+    assert compacted.find_question_by_id(q2.id).due == q2.due
+
+
+def test_unscheduled_questions_follow_difficulty(temp_file):
+    """Test questions saved before schedules existed are weighted, not served in file order"""
+    manager = QuizManager(filename=temp_file)
+    mastered = [Question("Math", f"Mastered {i}", "freeform", str(i)) for i in range(10)]
+    missed = [Question("Math", f"Missed {i}", "freeform", str(i)) for i in range(10)]
+    for q in mastered:
+        q.times_shown = q.times_correct = 5
+    for q in missed:
+        q.times_shown = 5
+    manager.add_questions(mastered + missed)
+    reloaded = QuizManager(filename=temp_file)
+
+    assert reloaded.select_due_question() is None
+    assert all(q.text.startswith("Missed") for q in reloaded.select_weighted_questions(10))
@@ -0,0 +1,81 @@
+"""Tests for QuizPipeline class"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from question import Question
+from quiz_manager import QuizManager
+from quiz_pipeline import QuizPipeline
+
+
+class StubClient:
+    """Grades "right" as correct, generation blocks until released"""
+    def __init__(self):
+        self.release = threading.Event()
+        self.generated = []
+
+    def evaluate_answer(self, question, user_answer):
+        return user_answer == "right"
+
+    def generate_questions(self, topic, num_questions):
+        self.release.wait(5)
+        self.generated.append(topic)
+        return [Question(topic, f"Generated {topic} question about subject {i * 7919}?", "freeform", f"answer {i}")
+                for i in range(num_questions)]
+
+
+@pytest.fixture
+def executor():
+    pool = ThreadPoolExecutor(max_workers=4)
+    yield pool
+    pool.shutdown(wait=True)
+
+
+def test_grading_runs_in_background_and_records_attempts(tmp_path, executor):
+    """Test verdicts arrive through futures and attempts are recorded"""
+    manager = QuizManager(filename=str(tmp_path / "questions.json"))
+    q = Question("Math", "What is 2+2?", "freeform", "4")
+    manager.add_questions([q])
+    pipeline = QuizPipeline(manager, StubClient(), executor=executor)
+
+    assert pipeline.grade(q, "right").result(5) is True
+    assert pipeline.grade(q, "wrong").result(5) is False
+    assert (q.times_shown, q.times_correct) == (2, 1)
+
+
+def test_thin_topics_are_topped_up_once(tmp_path, executor):
+    """Test one generation per thin topic at a time, and none for full topics"""
+    manager = QuizManager(filename=str(tmp_path / "questions.json"))
+    manager.add_questions([Question("Math", f"Sum question {i}", "freeform", str(i)) for i in range(3)])
+    client = StubClient()
+    pipeline = QuizPipeline(manager, client, executor=executor, generation_executor=executor,
+                            top_up_threshold=3, top_up_count=2)
+    other_session = QuizPipeline(manager, client, executor=executor, generation_executor=executor,
+                                 top_up_threshold=3, top_up_count=2)
+
+    assert pipeline.top_up("Math") is None
+    future = pipeline.top_up("History")
+    assert future is not None
+    assert pipeline.top_up("History") is None
+    assert other_session.top_up("History") is None
+
+    client.release.set()
+    assert future.result(5) == 2
+    assert client.generated == ["History"]
+    assert len(manager.questions_by_topic("History")) == 2
+    #Still below the threshold, the repeated questions are dropped as duplicates
+    assert pipeline.top_up("History").result(5) == 0
+
+
+def test_generation_does_not_block_grading(tmp_path):
+    """Test answers are graded while every generation worker is busy"""
+    manager = QuizManager(filename=str(tmp_path / "questions.json"))
+    q = Question("Math", "What is 2+2?", "freeform", "4")
+    manager.add_questions([q])
+    client = StubClient()
+    with ThreadPoolExecutor(max_workers=1) as grading, ThreadPoolExecutor(max_workers=1) as generation:
+        pipeline = QuizPipeline(manager, client, executor=grading, generation_executor=generation)
+        future = pipeline.top_up("History")
+        assert pipeline.grade(q, "right").result(5) is True
+        assert not future.done()
+        client.release.set()
+        assert future.result(5) == 5
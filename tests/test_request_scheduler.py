@@ -0,0 +1,123 @@
+"""Tests for the rate limiter and retry scheduler"""
+import asyncio
+import random
+import pytest
+from request_scheduler import (TokenBucket, RateLimiter, RequestScheduler,
+                               backoff_delay, retry_after_seconds)
+
+
+class FakeClock:
+    """Manually advanced clock, sleeping moves it forward"""
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TransientError(Exception):
+    def __init__(self, headers=None):
+        super().__init__("429")
+        self.response = type("Response", (), {"headers": headers or {}})()
+
+
+def test_token_bucket_waits_when_empty():
+    """Test reservations beyond capacity report the refill wait"""
+    clock = FakeClock()
+    bucket = TokenBucket(60, clock=clock)  # one unit per second
+    assert bucket.reserve(60) == 0.0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+    clock.now += 5
+    assert bucket.reserve(1) == 0.0
+
+
+def test_limiter_uses_slower_bucket_and_refunds():
+    """Test the token bucket throttles large requests and actual usage is credited back"""
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=6000, clock=clock)
+    assert limiter.reserve(6000) == 0.0
+    assert limiter.reserve(100) == pytest.approx(1.0)
+    limiter.record_usage(estimated_tokens=6100, actual_tokens=100)
+    assert limiter.reserve(100) == 0.0
+
+
+def test_backoff_delay_is_capped_and_jittered():
+    """Test delays stay within the exponential envelope"""
+    rng = random.Random(1)
+    for attempt in range(10):
+        delay = backoff_delay(attempt, base=0.5, cap=4.0, rng=rng)
+        assert 0 <= delay <= min(4.0, 0.5 * 2 ** attempt)
+
+
+def test_retry_after_headers():
+    """Test retry-after-ms wins over retry-after and missing headers give None"""
+    assert retry_after_seconds(TransientError({"retry-after-ms": "1500", "retry-after": "9"})) == 1.5
+    assert retry_after_seconds(TransientError({"retry-after": "2"})) == 2.0
+    assert retry_after_seconds(TransientError()) is None
+    assert retry_after_seconds(ValueError()) is None
+
+
+def test_scheduler_retries_transient_errors():
+    """Test a request failing twice with 429 still succeeds and honours Retry-After"""
+    clock = FakeClock()
+    scheduler = RequestScheduler(RateLimiter(clock=clock), retryable=(TransientError,),
+                                 sleep=clock.sleep, rng=random.Random(0))
+    calls = []
+
+    def request():
+        calls.append(clock.now)
+        if len(calls) == 1:
+            raise TransientError({"retry-after": "3"})
+        if len(calls) == 2:
+            raise TransientError()
+        return "ok"
+
+    assert scheduler.call(request) == "ok"
+    assert len(calls) == 3
+    assert calls[1] - calls[0] >= 3
+    assert scheduler.get_stats()["retries"] == 2
+
+
+def test_scheduler_gives_up_and_skips_other_errors():
+    """Test retries stop at max_retries and non-retryable errors are raised at once"""
+    clock = FakeClock()
+    scheduler = RequestScheduler(RateLimiter(clock=clock), retryable=(TransientError,),
+                                 max_retries=2, sleep=clock.sleep)
+    calls = []
+
+    def always_failing():
+        calls.append(1)
+        raise TransientError()
+
+    with pytest.raises(TransientError):
+        scheduler.call(always_failing)
+    assert len(calls) == 3
+
+    def broken():
+        calls.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        scheduler.call(broken)
+    assert len(calls) == 4
+
+
+def test_scheduler_async_call():
+    """Test the async path retries the same way"""
+    scheduler = RequestScheduler(retryable=(TransientError,), rng=random.Random(0))
+    scheduler._retry_delay = lambda error, attempt: 0
+    attempts = []
+
+    async def request():
+        attempts.append(1)
+        if len(attempts) < 2:
+            raise TransientError()
+        return 42
+
+    assert asyncio.run(scheduler.call_async(request)) == 42
+    assert len(attempts) == 2
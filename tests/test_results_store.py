@@ -0,0 +1,82 @@
+"""Tests for the results history"""
+import pytest
+from datetime import datetime
+from question import Question
+from results_store import ResultsStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Temporary results database for testing"""
+    results_store = ResultsStore(str(tmp_path / "results.db"))
+    yield results_store
+    results_store.close()
+
+
+def _ts(text):
+    return datetime.strptime(text, "%Y-%m-%d %H:%M").timestamp()
+
+
+def test_record_test_keeps_per_question_outcomes(store):
+    """Test score, totals and answers are stored in the order asked"""
+    q1 = Question("Math", "What is 2+2?", "mcq", "4", ["3", "4", "5"])
+    q2 = Question("History", "Who was Napoleon?", "freeform", "Emperor")
+
+    test_id = store.record_test("test", [(q1, True, 2.5), (q2, False, 7.0)], duration=10.0)
+
+    [test] = store.tests_between()
+    assert test["id"] == test_id
+    assert (test["mode"], test["score"], test["total"], test["duration"]) == ("test", 1, 2, 10.0)
+    assert store.test_answers(test_id) == [
+        {"question_id": q1.id, "topic": "Math", "correct": True, "latency": 2.5},
+        {"question_id": q2.id, "topic": "History", "correct": False, "latency": 7.0}
+    ]
+
+
+def test_session_key_makes_recording_idempotent(store):
+    """Test a rerun saving the same quiz again does not add a second test"""
+    q = Question("Math", "What is 2+2?", "mcq", "4", ["3", "4", "5"])
+
+    assert store.record_test("test", [(q, True, 1.0)], session_key="abc") is not None
+    assert store.record_test("test", [(q, True, 1.0)], session_key="abc") is None
+
+    assert len(store.tests_between()) == 1
+    assert store.daily_summary()[0]["tests"] == 1
+
+
+def test_range_and_aggregate_queries(store):
+    """Test time ranges, mode filters, daily rollups and topic accuracy"""
+    q = Question("Math", "What is 2+2?", "mcq", "4", ["3", "4", "5"])
+    store.record_test("test", [(q, True, 1.0), (q, True, 3.0)], taken_at=_ts("2026-01-01 09:00"))
+    store.record_test("practice", [(q, False, 2.0)], taken_at=_ts("2026-01-01 18:00"))
+    store.record_test("test", [(q, False, 4.0), (q, True, 5.0)], taken_at=_ts("2026-01-03 09:00"))
+
+    assert [t["score"] for t in store.tests_between(_ts("2026-01-01 12:00"), _ts("2026-01-04 00:00"))] == [0, 1]
+    assert [t["mode"] for t in store.tests_between(mode="test")] == ["test", "test"]
+
+    daily = store.daily_summary()
+    assert [(d["day"], d["tests"], d["questions"]) for d in daily] == [("2026-01-01", 2, 3), ("2026-01-03", 1, 2)]
+    assert daily[0]["score_pct"] == pytest.approx(200 / 3)
+    assert store.daily_summary(start_day="2026-01-02", mode="test")[0]["score_pct"] == 50.0
+
+    accuracy = store.topic_accuracy(end=_ts("2026-01-02 00:00"))
+    assert accuracy["Math"]["answers"] == 3
+    assert accuracy["Math"]["mean_latency"] == pytest.approx(2.0)
+
+
+def test_legacy_results_are_imported_once(store, tmp_path):
+    """Test results.txt lines are imported, and only new lines on later imports"""
+    legacy = tmp_path / "results.txt"
+    legacy.write_text("2026-02-10 11:46:31 - Score: 1/3\n"
+                      "not a score line\n"
+                      "2026-02-10 11:46:31 - Score: 1/3\n")
+
+    assert store.import_legacy_results(str(legacy)) == 2
+    assert store.import_legacy_results(str(legacy)) == 0
+
+    with open(legacy, 'a') as file:
+        file.write("2026-02-11 08:00:00 - Score: 3/3\n")
+    assert store.import_legacy_results(str(legacy)) == 1
+
+    assert [(t["score"], t["total"]) for t in store.tests_between(mode="test")] == [(1, 3), (1, 3), (3, 3)]
+    assert store.import_legacy_results(str(tmp_path / "missing.txt")) == 0
@@ -0,0 +1,61 @@
+"""Tests for NumpySelectionEngine class"""
+import pytest
+from question import Question
+from quiz_manager import QuizManager
+
+pytest.importorskip("numpy")
+from selection_engine import NumpySelectionEngine
+from question_pools import DIFFICULTY_BANDS, QuizFilter
+
+
+def _questions():
+    questions = [Question("Math", f"Math {i}", "mcq" if i % 2 else "freeform", str(i), ["0", "1"],
+                          source="generated" if i < 6 else "manual") for i in range(8)]
+    questions += [Question("History", f"History {i}", "freeform", str(i)) for i in range(4)]
+    return questions
+
+
+def test_matching_filters_rows():
+    """Test topic/type/source filters, disabled rows and unknown values"""
+    engine = NumpySelectionEngine(capacity=2)
+    questions = _questions()
+    engine.extend(questions)
+    questions[1].enabled = False
+    engine.update(questions[1])
+
+    math_mcq = QuizFilter(topics=["Math"], types=["mcq"])
+    assert [q.text for q in engine.matching(math_mcq)] == ["Math 3", "Math 5", "Math 7"]
+    assert [q.text for q in engine.matching(QuizFilter(topics=["Math"], sources=["manual"]))] == ["Math 6", "Math 7"]
+    assert engine.matching(QuizFilter(topics=["Unknown"])) == []
+    assert len(engine.matching(QuizFilter())) == len(engine) - 1 == 11
+
+
+def test_vectorized_manager_stays_in_sync(tmp_path):
+    """Test the engine mirrors attempts, toggles and additions made through QuizManager"""
+    manager = QuizManager(filename=str(tmp_path / "questions.json"), vectorized=True)
+    questions = _questions()
+    manager.add_questions(questions)
+    manager.set_enabled(questions[0], False)
+    manager.record_attempt(questions[2], True)
+
+    row = manager.engine.rows[questions[2].id]
+    assert (manager.engine.times_shown[row], manager.engine.times_correct[row]) == (1, 1)
+    math = QuizFilter(topics=["Math"])
+    assert questions[0] not in manager.select_unique_random_questions(20, math)
+    assert manager.count_matching(math) == 7
+
+
+def test_matching_agrees_with_quiz_filter():
+    """Test the vectorized filter selects exactly what QuizFilter.matches accepts"""
+    engine = NumpySelectionEngine()
+    questions = _questions()
+    counters = [(0, 0), (1, 1), (2, 2), (3, 3), (4, 0), (5, 1), (0, 0), (1, 0), (2, 0), (3, 1), (4, 2), (5, 3)]
+    for q, (shown, correct) in zip(questions, counters):
+        q.times_shown, q.times_correct = shown, correct
+    engine.extend(questions)
+    filters = [QuizFilter(difficulties=[band]) for band in DIFFICULTY_BANDS]
+    filters += [QuizFilter(topics=["History"], difficulties=["new", "hard"]),
+                QuizFilter(topics=["Math", "History"], types=["freeform"], sources=["generated", "manual"]),
+                QuizFilter(types=["mcq"], difficulties=["easy", "medium"])]
+    for quiz_filter in filters:
+        assert engine.matching(quiz_filter) == [q for q in questions if quiz_filter.matches(q)]
@@ -0,0 +1,68 @@
+"""Tests for the spaced repetition schedule and due queue"""
+import pytest
+from question import Question
+from spaced_repetition import (DAY_SECONDS, MIN_EASE, RELEARN_DELAY_SECONDS, DueQueue,
+                               next_review, schedule_review)
+
+
+def test_intervals_grow_with_correct_answers():
+    """Test SM-2 intervals 1, 6, then multiplied by the ease"""
+    q = Question("Math", "What is 2+2?", "freeform", "4")
+    schedule_review(q, True, now=0)
+    assert (q.interval, q.repetitions, q.due) == (1.0, 1, DAY_SECONDS)
+    schedule_review(q, True, now=0)
+    assert q.interval == 6.0
+    schedule_review(q, True, now=0)
+    assert q.interval == pytest.approx(6.0 * q.ease)
+    assert q.repetitions == 3
+
+
+def test_wrong_answer_resets_and_lowers_ease():
+    """Test a miss comes back after the relearn delay with a lower ease"""
+    interval, ease, repetitions, due = next_review(15.0, 2.5, 4, False, now=1000)
+    assert (interval, repetitions, due) == (0.0, 0, 1000 + RELEARN_DELAY_SECONDS)
+    assert ease < 2.5
+    assert next_review(0.0, MIN_EASE, 0, False, now=0)[1] == MIN_EASE
+
+
+def test_due_queue_serves_most_overdue_first():
+    """Test ordering, rescheduling, discarding and distinct due lists"""
+    questions = [Question("Math", f"Q{i}", "freeform", str(i)) for i in range(4)]
+    for due, q in zip((30, 10, 20, 500), questions):
+        q.due = due
+    queue = DueQueue()
+    queue.extend(questions)
+
+    assert queue.peek(now=100) is questions[1]
+    questions[1].due = 1000
+    queue.push(questions[1])
+    assert queue.peek(now=100) is questions[2]
+    queue.discard(questions[2])
+    assert queue.due_questions(10, now=100) == [questions[0]]
+    assert queue.due_questions(10, now=600) == [questions[0], questions[3]]
+    assert queue.peek(now=5) is None
+    assert len(queue) == 3
+
+
+def test_stale_entries_are_compacted():
+    """Test many reschedules do not grow the heap without bound"""
+    q = Question("Math", "Q", "freeform", "A")
+    queue = DueQueue()
+    for due in range(1000):
+        q.due = due
+        queue.push(q)
+    assert len(queue.heap) < 200
+    assert queue.due_questions(5, now=10**6) == [q]
+
+
+def test_unscheduled_questions_are_not_queued():
+    """Test questions without a review date stay out of the queue"""
+    queue = DueQueue()
+    new, scheduled = Question("Math", "New", "freeform", "1"), Question("Math", "Old", "freeform", "2")
+    scheduled.due = 5
+    queue.extend([new, scheduled])
+    queue.push(new)
+    assert len(queue) == 1 and queue.peek(now=10) is scheduled
+    scheduled.due = 0
+    queue.push(scheduled)
+    assert queue.peek(now=10) is None
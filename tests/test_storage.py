@@ -0,0 +1,149 @@
+"""Tests for storage backends"""
+import pytest
+from storage import JSONStorage, SQLiteStorage
+from quiz_manager import QuizManager
+from question import Question
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    """Temporary SQLite database for testing"""
+    return str(tmp_path / "test_questions.db")
+
+
+def test_json_storage_replays_toggles(tmp_path):
+    """Test enable/disable changes are journaled and replayed"""
+    filename = str(tmp_path / "test_questions.json")
+    manager = QuizManager(filename=filename)
+    q = Question("Math", "What is 2+2?", "mcq", "4", ["3", "4", "5"])
+    manager.add_questions([q])
+
+    manager.set_enabled(q, False)
+
+    reloaded = JSONStorage(filename).load()
+    assert reloaded[0].enabled is False
+
+
+def test_sqlite_round_trip(db_file):
+    """Test questions, attempts and toggles persist in SQLite"""
+    manager = QuizManager(filename=db_file)
+    assert isinstance(manager.storage, SQLiteStorage)
+
+    q1 = Question("Math", "What is 2+2?", "mcq", "4", ["3", "4", "5"])
+    q2 = Question("History", "Who was Napoleon?", "freeform", "Emperor")
+    manager.add_questions([q1, q2])
+    manager.record_attempt(q1, True)
+    manager.record_attempt(q1, False)
+    manager.set_enabled(q2, False)
+
+    reloaded = QuizManager(filename=db_file)
+    assert [q.id for q in reloaded.questions] == [q1.id, q2.id]
+    found = reloaded.find_question_by_id(q1.id)
+    assert found.times_shown == 2
+    assert found.times_correct == 1
+    assert found.options == ["3", "4", "5"]
+    assert reloaded.find_question_by_id(q2.id).enabled is False
+
+
+def test_json_storage_journals_additions(tmp_path):
+    """Test questions added after the first save are journaled, not rewritten"""
+    filename = str(tmp_path / "test_questions.json")
+    manager = QuizManager(filename=filename)
+    q1 = Question("Math", "What is 2+2?", "mcq", "4", ["3", "4", "5"])
+    manager.add_questions([q1])
+    with open(filename) as file:
+        snapshot = file.read()
+
+    q2 = Question("Math", "What is 3+3?", "freeform", "6")
+    manager.add_questions([q2])
+    manager.record_attempt(q2, True)
+
+    with open(filename) as file:
+        assert file.read() == snapshot
+    reloaded = QuizManager(filename=filename)
+    assert [q.id for q in reloaded.questions] == [q1.id, q2.id]
+    assert reloaded.find_question_by_id(q2.id).times_correct == 1
+
+    reloaded.compact()
+    assert len(JSONStorage(filename).load()) == 2
+
+
+def test_failed_save_keeps_old_snapshot(tmp_path, monkeypatch):
+    """Test a crash mid-write leaves the previous questions.json intact"""
+    filename = str(tmp_path / "test_questions.json")
+    manager = QuizManager(filename=filename)
+    manager.add_questions([Question("Math", "What is 2+2?", "mcq", "4", ["3", "4", "5"])])
+    with open(filename) as file:
+        snapshot = file.read()
+
+    def broken_dump(*args, **kwargs):
+        raise OSError("disk full")
+    monkeypatch.setattr("storage.json.dump", broken_dump)
+
+    with pytest.raises(OSError):
+        manager.save_questions()
+
+    with open(filename) as file:
+        assert file.read() == snapshot
+    assert [p.name for p in tmp_path.iterdir() if p.suffix == ".tmp"] == []
+
+
+def test_interrupted_compaction_is_recovered(tmp_path):
+    """Test records moved aside by a compaction that never finished are not lost"""
+    filename = str(tmp_path / "test_questions.json")
+    manager = QuizManager(filename=filename)
+    q = Question("Math", "What is 2+2?", "mcq", "4", ["3", "4", "5"])
+    manager.add_questions([q])
+    manager.record_attempt(q, True)
+    #Crash right after the journal was rotated
+    manager.storage.journal.rotate()
+    manager.record_attempt(q, False)
+
+    reloaded = QuizManager(filename=filename)
+    assert reloaded.find_question_by_id(q.id).times_shown == 2
+    reloaded.compact()
+    assert JSONStorage(filename).load()[0].times_shown == 2
+
+
+def test_sqlite_schedule_round_trip_and_upgrade(db_file):
+    """Test review schedule columns persist and are added to older databases"""
+    import sqlite3
+    connection = sqlite3.connect(db_file)
+    connection.execute("CREATE TABLE questions (id TEXT PRIMARY KEY, topic TEXT NOT NULL, text TEXT NOT NULL, "
+                       "type TEXT NOT NULL, correct_answer TEXT NOT NULL, options TEXT, "
+                       "source TEXT NOT NULL DEFAULT 'manual', enabled INTEGER NOT NULL DEFAULT 1, "
+                       "times_shown INTEGER NOT NULL DEFAULT 0, times_correct INTEGER NOT NULL DEFAULT 0)")
+    connection.execute("INSERT INTO questions (id, topic, text, type, correct_answer) "
+                       "VALUES ('old', 'Math', 'What is 1+1?', 'freeform', '2')")
+    connection.commit()
+    connection.close()
+
+    manager = QuizManager(filename=db_file)
+    old = manager.find_question_by_id("old")
+    assert (old.due, old.ease) == (0.0, 2.5)
+    manager.record_attempt(old, True)
+
+    reloaded = QuizManager(filename=db_file).find_question_by_id("old")
+    assert (reloaded.interval, reloaded.repetitions, reloaded.due) == (1.0, 1, old.due)
+
+
+def test_crash_after_snapshot_write_does_not_double_count(tmp_path, monkeypatch):
+    """Test records already folded into the snapshot are not replayed again"""
+    filename = str(tmp_path / "test_questions.json")
+    manager = QuizManager(filename=filename)
+    q = Question("Math", "What is 2+2?", "mcq", "4", ["3", "4", "5"])
+    manager.add_questions([q])
+    manager.record_attempt(q, True)
+    #Crash between replacing the snapshot and removing the rotated journal
+    monkeypatch.setattr(manager.storage.journal, "discard_rotated", lambda: None)
+    manager.storage.compact()
+    monkeypatch.undo()
+
+    for lazy in (False, True):
+        assert JSONStorage(filename, lazy=lazy).load()[0].times_shown == 1
+    manager.record_attempt(q, False)
+    reloaded = QuizManager(filename=filename)
+    assert reloaded.find_question_by_id(q.id).times_shown == 2
+    reloaded.compact()
+    assert JSONStorage(filename).load()[0].times_shown == 2
+    assert QuizManager(filename=filename, lazy=True).find_question_by_id(q.id).times_shown == 2
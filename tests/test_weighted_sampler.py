@@ -0,0 +1,58 @@
+"""Tests for WeightedSampler class"""
+import random
+import pytest
+from weighted_sampler import WeightedSampler
+
+
+def test_sample_follows_weights():
+    """Test draws are proportional to weights"""
+    sampler = WeightedSampler()
+    sampler.set("a", "A", 1)
+    sampler.set("b", "B", 3)
+    sampler.set("c", "C", 0)
+
+    rng = random.Random(42)
+    draws = sampler.sample_many(4000, rng)
+
+    assert "C" not in draws
+    assert 0.7 < draws.count("B") / len(draws) < 0.8
+
+
+def test_update_and_growth():
+    """Test weights can change after insert and the tree grows"""
+    sampler = WeightedSampler(capacity=2)
+    for i in range(100):
+        sampler.set(i, i, 1)
+    assert len(sampler) == 100
+    assert sampler.total == pytest.approx(100)
+
+    for i in range(99):
+        sampler.set(i, i, 0)
+    assert sampler.total == pytest.approx(1)
+    assert sampler.sample() == 99
+
+
+def test_empty_sampler():
+    """Test sampling with no weight returns nothing"""
+    sampler = WeightedSampler()
+    assert sampler.sample() is None
+    sampler.extend([("a", "A", 0)])
+    assert sampler.sample_many(3) == []
+
+
+def test_draws_after_extend_below_capacity():
+    """Test a bulk load smaller than the capacity draws every item"""
+    sampler = WeightedSampler(capacity=16)
+    sampler.extend([(i, i, 1) for i in range(5)])
+    draws = sampler.sample_many(5000, random.Random(1))
+    assert set(draws) == set(range(5))
+    assert min(draws.count(i) for i in range(5)) > 800
+
+
+def test_draws_after_growth():
+    """Test every item stays reachable after the tree grows"""
+    sampler = WeightedSampler(capacity=64)
+    sampler.extend([(i, i, 1) for i in range(100)])
+    sampler.set(100, 100, 1)
+    draws = sampler.sample_many(20000, random.Random(2))
+    assert set(draws) == set(range(101))
@@ -0,0 +1,38 @@
+from typing import Dict, Optional
+from question import Question
+
+
+class TopicStats:
+    """Running totals for a group of questions, kept up to date on every change
+
+    A question's contribution is removed before it changes and added back
+    afterwards, so each update is O(1) regardless of bank size."""
+    __slots__ = ("total", "enabled", "attempted", "success_sum")
+
+    def __init__(self) -> None:
+        self.total = 0
+        self.enabled = 0
+        #Questions shown at least once, and the sum of their correct percentages
+        self.attempted = 0
+        self.success_sum = 0.0
+
+    def add(self, question: Question, sign: int = 1) -> None:
+        """Add a question's contribution, sign=-1 removes it"""
+        self.total += sign
+        if question.enabled:
+            self.enabled += sign
+        if question.times_shown:
+            self.attempted += sign
+            self.success_sum += sign * question.get_correct_percentage()
+
+    @property
+    def avg_success(self) -> Optional[float]:
+        """Mean success rate of attempted questions, None if none were attempted"""
+        if not self.attempted:
+            return None
+        #Clamp float drift from many incremental updates
+        return min(100.0, max(0.0, self.success_sum / self.attempted))
+
+    def to_dict(self) -> Dict:
+        return {"total": self.total, "enabled": self.enabled,
+                "attempted": self.attempted, "avg_success": self.avg_success}
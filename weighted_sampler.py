@@ -0,0 +1,119 @@
+import random
+from typing import Any, Dict, Hashable, List, Optional
+
+
+class WeightedSampler:
+    """Fenwick (binary indexed) tree for weighted random selection
+
+    Updating one weight and drawing one item are both O(log n),
+    so the weights never need to be rebuilt for every selection."""
+    def __init__(self, capacity: int = 16) -> None:
+        self._capacity = max(1, capacity)
+        self._tree: List[float] = [0.0] * (self._capacity + 1)
+        self._weights: List[float] = []
+        self._items: List[Any] = []
+        self._slots: Dict[Hashable, int] = {}
+        self._total = 0.0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._slots
+
+    @property
+    def total(self) -> float:
+        """Sum of all weights"""
+        return self._total
+
+    def set(self, key: Hashable, item: Any, weight: float) -> None:
+        """Insert an item or change its weight, weight 0 excludes it from sampling"""
+        weight = max(0.0, float(weight))
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = len(self._items)
+            self._slots[key] = slot
+            self._items.append(item)
+            self._weights.append(0.0)
+            if slot >= self._capacity:
+                self._grow()
+        else:
+            self._items[slot] = item
+        delta = weight - self._weights[slot]
+        if delta:
+            self._weights[slot] = weight
+            self._total += delta
+            self._add(slot + 1, delta)
+
+    def extend(self, entries: List[tuple]) -> None:
+        """Bulk insert (key, item, weight) tuples in O(n)"""
+        for key, item, weight in entries:
+            if key in self._slots:
+                self.set(key, item, weight)
+                continue
+            self._slots[key] = len(self._items)
+            self._items.append(item)
+            self._weights.append(max(0.0, float(weight)))
+        if len(self._items) > self._capacity:
+            self._capacity = len(self._items)
+        self._rebuild()
+
+    def get_weight(self, key: Hashable) -> float:
+        slot = self._slots.get(key)
+        return self._weights[slot] if slot is not None else 0.0
+
+    def sample(self, rng: Optional[random.Random] = None) -> Optional[Any]:
+        """Draw one item with probability proportional to its weight"""
+        if self._total <= 0:
+            return None
+        rng = rng or random
+        return self._items[self._find(rng.random() * self._total)]
+
+    def sample_many(self, k: int, rng: Optional[random.Random] = None) -> List[Any]:
+        """Draw k items with replacement in O(k log n)"""
+        if self._total <= 0 or k <= 0:
+            return []
+        rng = rng or random
+        total = self._total
+        return [self._items[self._find(rng.random() * total)] for _ in range(k)]
+
+    def _add(self, index: int, delta: float) -> None:
+        tree = self._tree
+        while index <= self._capacity:
+            tree[index] += delta
+            index += index & -index
+
+    def _find(self, target: float) -> int:
+        """Return the slot whose cumulative weight range contains target"""
+        tree = self._tree
+        position = 0
+        step = 1 << (self._capacity.bit_length() - 1)
+        while step:
+            nxt = position + step
+            if nxt <= self._capacity and tree[nxt] <= target:
+                position = nxt
+                target -= tree[nxt]
+            step >>= 1
+        #Floating point drift can overshoot, fall back to the last weighted slot
+        if position >= len(self._items) or self._weights[position] <= 0:
+            for slot in range(min(position, len(self._items) - 1), -1, -1):
+                if self._weights[slot] > 0:
+                    return slot
+        return position
+
+    def _grow(self) -> None:
+        self._capacity *= 2
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        """Recreate the tree from the weight list in O(n), also clears drift"""
+        tree = [0.0] * (self._capacity + 1)
+        tree[1:len(self._weights) + 1] = self._weights
+        #Every index up to capacity passes its sum on, empty slots still link
+        #the last items to their higher parents
+        for index in range(1, self._capacity + 1):
+            parent = index + (index & -index)
+            if parent <= self._capacity:
+                tree[parent] += tree[index]
+        self._tree = tree
+        self._total = sum(self._weights)